@@ -1,13 +1,25 @@
-from flask import Flask, render_template, Response, send_from_directory
+import time
+_process_start = time.perf_counter()
+
+from flask import Flask, render_template, Response, send_from_directory, jsonify, request
 from flask_socketio import SocketIO, emit
 from flask_cors import CORS
-import cv2
-import time
 import threading
+import importlib
+import ipaddress
+import hmac
 import config
-from camera_manager import CameraManager
-from hand_detector import HandDetector
+from collections import deque
 from snake_game import SnakeGame
+from session_log import TickClock, SessionRecorder, quantize_target
+from snake_lod import SnakeSimplifier
+from metrics import metrics
+from latency import monotonic_ms, tracker as latency_tracker
+from profiler import profiler
+from tracing import tracer
+from runtime_config import settings
+from idle_governor import governor
+# cv2 / mediapipe 在后台初始化线程中按需导入，避免拖慢 Web 服务启动
 
 app = Flask(__name__, static_folder='static', template_folder='static')
 app.config['SECRET_KEY'] = 'gesture-snake-secret-key'
@@ -19,116 +31,311 @@ camera = None
 detector = None
 game = None
 game_thread = None
+init_thread = None
+pipeline = None  # 多进程模式下的 shm_pipeline.ProcessPipeline
 is_running = False
+client_count = 0  # 已连接的 Socket.IO 客户端数
 
-def initialize_game():
-    """初始化游戏组件"""
-    global camera, detector, game
-    
-    print("正在初始化游戏组件...")
-    camera = CameraManager()
-    if not camera.start():
+# 游戏时钟按 tick 推进；前端操作先入队，在下一个 tick 开始时执行，便于确定性记录与重放
+tick_clock = TickClock()
+pending_actions = deque()
+session_recorder = None
+tick_count = 0
+
+# 蛇身 LOD：推送与绘制使用按像素容差简化后的折线
+snake_lod = SnakeSimplifier()
+
+# 启动就绪状态：pending / loading / ready / error
+readiness = {'camera': 'pending', 'detector': 'pending', 'ready': False}
+readiness_lock = threading.Lock()
+startup_times = {}  # 阶段 -> 耗时 ms
+
+def _socketio_broadcast(event, data):
+    socketio.emit(event, data, namespace='/')
+
+# 向所有客户端推送事件；异步服务器模式（async_server.py）会替换为线程安全的事件循环投递
+broadcast = _socketio_broadcast
+
+def set_readiness(component, status):
+    """更新组件就绪状态并广播给前端"""
+    with readiness_lock:
+        readiness[component] = status
+        readiness['ready'] = readiness['camera'] == 'ready' and readiness['detector'] == 'ready'
+        snapshot = dict(readiness)
+    broadcast('readiness', snapshot)
+
+def _timed(phase, fn):
+    """执行 fn 并记录阶段耗时"""
+    t0 = time.perf_counter()
+    try:
+        return fn()
+    finally:
+        startup_times[phase] = (time.perf_counter() - t0) * 1000
+
+def _start_camera():
+    global camera
+    set_readiness('camera', 'loading')
+    if pipeline is not None:
+        cam = pipeline.camera  # 帧来自采集进程的共享内存帧环（监护在采集进程内）
+    else:
+        # 读帧失败时退避并重开摄像头，健康状态推送给前端
+        from camera_supervisor import CameraSupervisor, camera_sources
+        cam = CameraSupervisor(camera_sources())
+        cam.subscribe(lambda status: broadcast('camera_health', status))
+    if not _timed('camera_open', cam.start):
         print("启动摄像头失败！")
-        return False
+        set_readiness('camera', 'error')
+        return
+    camera = cam
+    set_readiness('camera', 'ready')
+
+def _start_detector():
+    global detector
+    set_readiness('detector', 'loading')
+    try:
+        if pipeline is not None:
+            # 模型加载与预热在检测进程内完成，这里只等待其就绪
+            det = pipeline.detector
+            _timed('model_load', det.start)
+            detector = det
+            set_readiness('detector', 'ready')
+            return
+        if getattr(config, "AUTO_TUNE", False):
+            _auto_tune()
+        hand_detector = _timed('detector_import', lambda: importlib.import_module('hand_detector'))
+        det = _timed('model_load', hand_detector.HandDetector)
+        # 用一帧空白图像完成图初始化，避免首帧真实推理卡顿
+        _timed('warmup_inference', det.warmup)
+        det.start()
+    except Exception as e:
+        print(f"初始化手势检测失败：{e}")
+        set_readiness('detector', 'error')
+        return
+    detector = det
+    set_readiness('detector', 'ready')
+
+def _auto_tune():
+    """本机尚未标定时，先实测选出检测后端与分辨率（结果写入本机设置，之后启动直接使用）"""
+    auto_tuner = importlib.import_module('auto_tuner')
+    if not auto_tuner.needs_calibration():
+        return
+    # 样本帧默认取自摄像头：等摄像头就绪（此时还没有视频流在读帧）
+    while readiness['camera'] in ('pending', 'loading'):
+        time.sleep(0.05)
+    _timed('auto_tune', lambda: auto_tuner.ensure_calibrated(camera))
+
+def initialize_game():
+    """在后台并行初始化摄像头与检测器，Web 服务无需等待"""
+    global pipeline
+    print("正在后台初始化游戏组件...")
+    t0 = time.perf_counter()
+    if getattr(config, "MULTIPROCESS_PIPELINE", False):
+        from shm_pipeline import ProcessPipeline
+        if getattr(config, "AUTO_TUNE", False):
+            # 子进程按本机设置启动，标定需在此之前完成（标定自行打开并释放摄像头）
+            _timed('auto_tune', lambda: importlib.import_module('auto_tuner').ensure_calibrated())
+        pipeline = ProcessPipeline()
+        pipeline.start()
+    workers = [
+        threading.Thread(target=_start_camera, name="InitCamera", daemon=True),
+        threading.Thread(target=_start_detector, name="InitDetector", daemon=True),
+    ]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    startup_times['background_init'] = (time.perf_counter() - t0) * 1000
+    startup_times['total_since_launch'] = (time.perf_counter() - _process_start) * 1000
+
+    print("启动耗时明细 (ms)：")
+    for phase, ms in startup_times.items():
+        print(f"  {phase:<20} {ms:8.1f}")
+    if readiness['ready']:
+        print("游戏组件初始化完成")
+    else:
+        print(f"游戏组件初始化未完成：{readiness}")
+    return readiness['ready']
+
+def capture_step():
+    """
+    读取一帧并送入检测器，返回 (frame, frame_seq)；读帧失败时返回 None。
+
+    Flask 的 MJPEG 生成器与异步服务器的采集线程共用这一步。
+    """
+    with metrics.timer("capture") as capture_timer:
+        captured = camera.read_frame_stamped()
+        capture_timer.seq = captured.seq
+    if captured.image is None:
+        return None
+    metrics.inc("frames_captured")
+    frame, frame_seq = captured.image, captured.seq
     
-    detector = HandDetector()
-    detector.start()
+    # 手势检测：帧序号与采集时间戳随帧一起进入检测流水线
+    detector.update_frame(captured)
     
-    game = SnakeGame()
-    print("游戏组件初始化完成")
-    return True
+    # 可视化手部关键点（可选）
+    if config.GESTURE_CONFIDENCE_THRESHOLD > 0:
+        detector.refresh()
+        results, _ = detector.get_results()
+        detector.draw_landmarks(frame, results)
+    return frame, frame_seq
+
+def encode_frame(frame, frame_seq, fps):
+    """叠加 FPS 并编码为 JPEG，返回 bytes；编码失败返回 None"""
+    import cv2
+    cv2.putText(frame, f"FPS: {int(fps)}", (10, 30), 
+               cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+    with metrics.timer("encode", frame_seq):
+        ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, settings.jpeg_quality])
+    if not ret:
+        return None
+    metrics.inc("frames_encoded")
+    return buffer.tobytes()
+
+def wait_until_ready():
+    """后台初始化尚未完成时等待摄像头与检测器就绪；出错或停止时返回 False"""
+    while is_running and not readiness['ready']:
+        if readiness['camera'] == 'error' or readiness['detector'] == 'error':
+            return False
+        time.sleep(0.05)
+    return is_running
 
 def generate_frames():
     """生成视频帧（MJPEG 流）"""
-    global camera, detector, game, is_running
-    
     prev_time = 0
+    last_encode = 0
+    
+    if not wait_until_ready():
+        return
     
     while is_running and camera is not None:
-        frame = camera.read_frame()
-        if frame is None:
+        item = capture_step()
+        if item is None:
+            # 读帧失败时 CameraSupervisor 已按退避时间等待，这里不会空转
             if not is_running:
                 break
             continue
+        frame, frame_seq = item
         
-        # 手势检测
-        detector.update_frame(frame)
-        results, gesture = detector.get_results()
-        finger_pos = detector.get_finger_position()
-        
-        # 可视化手部关键点（可选）
-        if config.GESTURE_CONFIDENCE_THRESHOLD > 0:
-            detector.draw_landmarks(frame, results)
-        
-        # 绘制手指准星
-        if finger_pos and game.state == "RUNNING":
-            fx = int(finger_pos[0] * config.CAMERA_WIDTH)
-            fy = int(finger_pos[1] * config.CAMERA_HEIGHT)
-            # 简单的准星（前端也会绘制，这里仅用于调试）
-            # cv2.circle(frame, (fx, fy), 10, (0, 255, 255), 2)
+        # 空闲时降低编码频率：帧照常读取并送入检测，只跳过编码
+        curr_time = time.time()
+        if curr_time - last_encode < governor.interval("stream"):
+            continue
+        last_encode = curr_time
         
         # FPS 显示
-        curr_time = time.time()
         fps = 1 / (curr_time - prev_time) if prev_time > 0 else 0
         prev_time = curr_time
-        cv2.putText(frame, f"FPS: {int(fps)}", (10, 30), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
         
         # 编码为 JPEG
-        ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
-        if not ret:
+        frame_bytes = encode_frame(frame, frame_seq, fps)
+        if frame_bytes is None:
             continue
-        
-        frame_bytes = buffer.tobytes()
         yield (b'--frame\r\n'
                b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
 
-def game_loop():
-    """游戏逻辑主循环（独立线程）"""
-    global game, detector, socketio
+def tick_rate():
+    """游戏循环与推送频率（Hz），随运行时设置变化"""
+    return max(1, settings.tick_rate)
+
+def tail_smooth_for(rate, base=0.35, base_rate=60):
+    """蛇身跟随系数按 tick 频率换算，使不同频率下尾部跟随的时间常数一致"""
+    return 1 - (1 - base) ** (base_rate / rate)
+
+def create_game():
+    """创建游戏实例（使用 tick 时钟），按配置开启会话日志"""
+    global session_recorder
+    new_game = SnakeGame(clock=tick_clock)
+    new_game.tail_smooth = tail_smooth_for(tick_rate())
+    if getattr(config, "SESSION_LOG", False):
+        session_recorder = SessionRecorder(new_game)
+    return new_game
+
+def game_tick():
+    """推进一次游戏逻辑，返回 (game_state, 手势事件列表)"""
+    dt = tick_clock.tick()
+    
+    # 获取手势信息（多进程模式下本 tick 的查询都来自同一份关键点板快照）
+    detector.refresh()
+    results, gesture = detector.get_results()
+    finger_pos = quantize_target(detector.get_finger_position())
+    frame_seq, capture_ts = detector.get_frame_meta()
+    hands = detector.get_hands()
+    
+    global tick_count
+    tick_count += 1
+    
+    actions = []
+    while pending_actions:
+        actions.append(pending_actions.popleft())
     
-    q_pressed_once = False
+    # tick 频率被运行时设置修改后，蛇身跟随系数随之换算（并记入会话日志，保证重放一致）
+    tail_smooth = tail_smooth_for(tick_rate())
+    if game.tail_smooth != tail_smooth:
+        game.tail_smooth = tail_smooth
+        if session_recorder:
+            session_recorder.record_setting('tail_smooth', tail_smooth)
     
+    with metrics.timer("game_tick", frame_seq):
+        for action in actions:
+            game.apply_action(action)
+        game.step(finger_pos, gesture)
+    if session_recorder:
+        session_recorder.record(dt, finger_pos, gesture, actions, game)
+    
+    game_state = {
+        'state': game.state,
+        'score': game.score,
+        'snake': [(x/config.CAMERA_WIDTH, y/config.CAMERA_HEIGHT) for x, y in snake_lod.simplify(game.snake)] if game.snake else [],
+        'snake_length': len(game.snake),
+        'food': (game.food[0]/config.CAMERA_WIDTH, game.food[1]/config.CAMERA_HEIGHT) if game.food else None,
+        'gesture': gesture,
+        'finger_pos': finger_pos,
+        'hands': [{'id': h['id'], 'handedness': h['handedness'],
+                   'finger': h['finger'], 'gesture': h['gesture']} for h in hands],
+        'difficulty': game.difficulty,
+        'frame_seq': frame_seq,
+        'capture_ts': capture_ts,
+        # 服务器 tick 序号与时刻（单调时钟 ms），前端据此插值渲染
+        'tick': tick_count,
+        'tick_ts': monotonic_ms()
+    }
+    # 去抖后确认的手势开始/结束事件
+    events = [{'hand': track_id, 'type': kind, 'gesture': event_gesture}
+              for track_id, kind, event_gesture, _ in detector.get_gesture_events()]
+    return game_state, events
+
+def game_loop():
+    """游戏逻辑主循环（独立线程）"""
     print("游戏循环已启动")
     print("控制：用手指指向移动 | OK手势开始游戏 | R键重新开始 | Q键暂停/退出")
     
+    next_tick = time.perf_counter()
     while is_running:
         if game is None or detector is None:
             time.sleep(0.1)
+            next_tick = time.perf_counter()
             continue
         
-        # 获取手势信息
-        results, gesture = detector.get_results()
-        finger_pos = detector.get_finger_position()
-        
-        # 处理暂停状态下OK手势恢复游戏
-        if game.state == "PAUSED" and gesture == "RESTART":  # OK手势
-            game.resume_game()
-            q_pressed_once = False
-            print("游戏已恢复！")
-        
-        # 如果检测到手指，更新目标位置
-        if finger_pos and game.state == "RUNNING":
-            game.set_target_position(finger_pos[0], finger_pos[1])
-        
-        game.process_gesture(gesture)
-        game.update()
+        game_state, events = game_tick()
+        governor.update(game.state)
         
         # 发送游戏状态到前端
-        game_state = {
-            'state': game.state,
-            'score': game.score,
-            'snake': [(x/config.CAMERA_WIDTH, y/config.CAMERA_HEIGHT) for x, y in game.snake] if game.snake else [],
-            'food': (game.food[0]/config.CAMERA_WIDTH, game.food[1]/config.CAMERA_HEIGHT) if game.food else None,
-            'gesture': gesture,
-            'finger_pos': finger_pos,
-            'difficulty': game.difficulty
-        }
-        
-        socketio.emit('game_state', game_state, namespace='/')
+        with metrics.timer("emit", game_state['frame_seq']):
+            broadcast('game_state', game_state)
+            for event in events:
+                broadcast('gesture_event', event)
+        metrics.inc("emits")
         
-        # 控制循环频率（60 FPS）
-        time.sleep(1/60)
+        # 固定频率：前端插值渲染，服务器只需 20-30 Hz；空闲时由调速器降低频率
+        next_tick += governor.tick_period(tick_rate())
+        delay = next_tick - time.perf_counter()
+        if delay > 0:
+            # 等待期间恢复全速（看到手、前端操作）时立即进入下一个 tick
+            if governor.sleep(delay):
+                next_tick = time.perf_counter()
+        else:
+            next_tick = time.perf_counter()  # 落后时不追帧
 
 @app.route('/')
 def index():
@@ -141,33 +348,231 @@ def video_feed():
     return Response(generate_frames(),
                    mimetype='multipart/x-mixed-replace; boundary=frame')
 
+@app.route('/ready')
+def ready():
+    """就绪探针：组件全部就绪返回 200，否则 503"""
+    with readiness_lock:
+        snapshot = dict(readiness)
+    snapshot['startup_ms'] = dict(startup_times)
+    snapshot['camera_health'] = camera_health()
+    return jsonify(snapshot), (200 if snapshot['ready'] else 503)
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus 文本格式的流水线指标"""
+    return Response(metrics.render_prometheus(),
+                   mimetype='text/plain; version=0.0.4')
+
+@app.route('/latency')
+def latency_report():
+    """采集→渲染延迟分位数（毫秒）"""
+    return jsonify(latency_tracker.percentiles())
+
+def is_loopback(addr):
+    """远端地址是否为本机回环地址（含 IPv4 映射的 IPv6 地址）"""
+    try:
+        ip = ipaddress.ip_address(addr)
+    except (TypeError, ValueError):
+        return False
+    mapped = getattr(ip, 'ipv4_mapped', None)
+    return (mapped or ip).is_loopback
+
+def is_admin(token, remote_addr):
+    """校验管理口令；未设置 ADMIN_TOKEN 时只允许本机访问（服务器监听 0.0.0.0 且允许任意跨域来源）"""
+    admin_token = getattr(config, "ADMIN_TOKEN", "")
+    if not admin_token:
+        return is_loopback(remote_addr)
+    return isinstance(token, str) and hmac.compare_digest(token, admin_token)
+
+def handle_profiler_action(action, interval=None, thread=None):
+    """执行采样分析器操作：start / stop / reset / status / dump"""
+    if action == 'start':
+        try:
+            profiler.start(interval)
+        except (TypeError, ValueError):
+            return {'error': f'无效的采样间隔：{interval}'}
+    elif action == 'stop':
+        profiler.stop()
+    elif action == 'reset':
+        profiler.reset()
+    elif action == 'dump':
+        return profiler.collapsed(thread)
+    return profiler.status()
+
+def handle_trace_action(action):
+    """执行逐帧追踪操作：start / stop / clear / status"""
+    if action == 'start':
+        tracer.start()
+    elif action == 'stop':
+        tracer.stop()
+    elif action == 'clear':
+        tracer.clear()
+    return tracer.status()
+
+@app.route('/admin/profiler', methods=['GET', 'POST'])
+def profiler_endpoint():
+    """采样分析器开关；GET 返回折叠栈（可用 ?thread=detection|game|stream 过滤）"""
+    if not is_admin(request.args.get('token') or request.headers.get('X-Admin-Token'), request.remote_addr):
+        return Response('forbidden', status=403)
+    if request.method == 'GET':
+        return Response(profiler.collapsed(request.args.get('thread')), mimetype='text/plain')
+    action = request.args.get('action', 'status')
+    interval = request.args.get('interval', type=float)
+    return jsonify(handle_profiler_action(action, interval))
+
+@app.route('/admin/trace', methods=['GET', 'POST'])
+def trace_endpoint():
+    """逐帧追踪开关；GET 导出 Chrome/Perfetto trace JSON"""
+    if not is_admin(request.args.get('token') or request.headers.get('X-Admin-Token'), request.remote_addr):
+        return Response('forbidden', status=403)
+    if request.method == 'GET':
+        response = jsonify(tracer.export())
+        response.headers['Content-Disposition'] = 'attachment; filename=snake_trace.json'
+        return response
+    return jsonify(handle_trace_action(request.args.get('action', 'status')))
+
+@socketio.on('admin_profiler')
+def handle_admin_profiler(data):
+    """通过 Socket.IO 控制采样分析器"""
+    if not isinstance(data, dict) or not is_admin(data.get('token'), request.remote_addr):
+        emit('admin_profiler', {'error': 'forbidden'})
+        return
+    result = handle_profiler_action(data.get('action', 'status'), data.get('interval'), data.get('thread'))
+    if isinstance(result, str):
+        emit('admin_profiler', {'collapsed': result})
+    else:
+        emit('admin_profiler', result)
+
+def render_settings():
+    """前端渲染相关的运行时设置：推送频率与插值延迟（默认两个 tick 周期）"""
+    return {
+        'preset': settings.preset,
+        'tick_rate': tick_rate(),
+        'interp_delay_ms': getattr(config, "INTERP_DELAY_MS", None) or 2000.0 / tick_rate(),
+    }
+
+def camera_health():
+    """摄像头健康状态（见 camera_supervisor.py）；摄像头未打开或不受监护时为 None"""
+    status = getattr(camera, 'status', None)
+    return status() if status else None
+
+def connection_payload():
+    """连接建立时发给客户端的信息"""
+    with readiness_lock:
+        snapshot = dict(readiness)
+    payload = {
+        'status': 'connected',
+        'latency_mode': getattr(config, "LATENCY_MODE", False),
+        'readiness': snapshot,
+        'camera_health': camera_health()
+    }
+    payload.update(render_settings())
+    return payload
+
+def handle_preset_action(data):
+    """
+    切换性能预设或修改运行时参数：{preset} / {values: {...}}，save 为真时写入本机设置。
+
+    编码质量与 tick 频率在下一帧 / 下一 tick 生效，摄像头与检测器在各自线程的帧边界生效；
+    推送频率变化会广播给所有前端以调整插值延迟。
+    """
+    preset = data.get('preset')
+    values = data.get('values') or {}
+    if not preset and not values:
+        return settings.status()
+    try:
+        if preset:
+            settings.apply_preset(preset)
+        if values:
+            settings.update(**values)
+        if data.get('save'):
+            settings.save_local(preset=preset, **values)
+    except (KeyError, ValueError, TypeError, OSError) as e:
+        return {'error': str(e)}
+    if pipeline is not None:
+        print("多进程模式：检测与采集参数需重启后生效")
+    broadcast('runtime_settings', render_settings())
+    status = settings.status()
+    if data.get('save'):
+        # 已保存的其他参数覆盖（如自动标定结果）下次启动时仍会叠加在预设之上
+        status['saved_overrides'] = settings.shadowed_overrides()
+    return status
+
+@app.route('/admin/preset', methods=['GET', 'POST'])
+def preset_endpoint():
+    """性能预设：GET 返回当前设置，POST ?preset=low-latency 切换预设"""
+    if not is_admin(request.args.get('token') or request.headers.get('X-Admin-Token'), request.remote_addr):
+        return Response('forbidden', status=403)
+    if request.method == 'GET':
+        return jsonify(settings.status())
+    data = request.get_json(silent=True)
+    data = dict(data) if isinstance(data, dict) else {}
+    if request.args.get('preset'):
+        data['preset'] = request.args['preset']
+    if request.args.get('save'):
+        data['save'] = True
+    return jsonify(handle_preset_action(data))
+
+@socketio.on('admin_preset')
+def handle_admin_preset(data):
+    """通过 Socket.IO 切换性能预设；不带 preset/values 时只返回当前设置"""
+    if not isinstance(data, dict) or not is_admin(data.get('token'), request.remote_addr):
+        emit('admin_preset', {'error': 'forbidden'})
+        return
+    emit('admin_preset', handle_preset_action(data))
+
+def clock_sync_reply(data):
+    """时钟偏移握手：原样带回客户端时间戳并附上服务器时钟"""
+    return {'client_ts': data.get('client_ts'), 'server_ts': monotonic_ms()}
+
+def record_render_ack(data, client=None):
+    """记录前端回传的某帧渲染时刻（已换算到服务器时钟）；client 为连接 sid，按客户端分别去重"""
+    if not isinstance(data, dict):
+        return
+    latency = latency_tracker.record(data.get('frame_seq'), data.get('capture_ts'), data.get('render_ts'), client)
+    if latency is not None:
+        metrics.observe("glass_to_glass", latency / 1000.0)
+
+def apply_game_action(action):
+    """前端发来的游戏操作：入队，由游戏循环在下一个 tick 执行"""
+    print(f"收到游戏操作: {action}")
+    pending_actions.append(action)
+    governor.activity()
+
 @socketio.on('connect')
 def handle_connect():
     """客户端连接"""
+    global client_count
     print('客户端已连接')
-    emit('connection_response', {'status': 'connected'})
+    client_count += 1
+    metrics.set_gauge("clients", client_count)
+    governor.set_clients(client_count)
+    emit('connection_response', connection_payload())
+
+@socketio.on('clock_sync')
+def handle_clock_sync(data):
+    """时钟偏移握手"""
+    emit('clock_sync', clock_sync_reply(data))
+
+@socketio.on('render_ack')
+def handle_render_ack(data):
+    """前端回传某帧的渲染时刻"""
+    record_render_ack(data, request.sid)
 
 @socketio.on('disconnect')
 def handle_disconnect():
     """客户端断开"""
+    global client_count
     print('客户端已断开')
+    client_count = max(0, client_count - 1)
+    metrics.set_gauge("clients", client_count)
+    governor.set_clients(client_count)
+    latency_tracker.forget(request.sid)
 
 @socketio.on('game_action')
 def handle_game_action(data):
     """处理游戏操作"""
-    global game
-    
-    action = data.get('action')
-    print(f"收到游戏操作: {action}")
-    
-    if action == 'restart':
-        game.start_game()
-    elif action == 'pause':
-        game.pause_game()
-    elif action == 'resume':
-        game.resume_game()
-    elif action == 'exit':
-        game.stop_game()
+    apply_game_action(data.get('action'))
 
 def cleanup():
     """清理资源"""
@@ -175,12 +580,16 @@ def cleanup():
     
     print("\n正在停止服务...")
     is_running = False
+    profiler.stop()
     
     # 等待游戏线程结束
     if game_thread and game_thread.is_alive():
         print("等待游戏线程结束...")
         game_thread.join(timeout=2.0)
     
+    if session_recorder:
+        session_recorder.close()
+    
     # 停止检测器
     if detector:
         print("正在停止手势检测...")
@@ -193,6 +602,11 @@ def cleanup():
         camera.release()
         camera = None
     
+    # 停止采集/检测子进程并释放共享内存
+    if pipeline:
+        print("正在停止多进程流水线...")
+        pipeline.stop()
+    
     print("资源已释放")
     
     # 强制退出程序
@@ -204,17 +618,19 @@ def cleanup():
 
 if __name__ == '__main__':
     try:
-        # 初始化游戏
-        if not initialize_game():
-            exit(1)
+        game = create_game()
         
         # 启动游戏循环线程
         is_running = True
-        game_thread = threading.Thread(target=game_loop, daemon=True)
+        game_thread = threading.Thread(target=game_loop, name="GameLoop", daemon=True)
         game_thread.start()
         
+        # 摄像头、模型加载与预热推理在后台进行
+        init_thread = threading.Thread(target=initialize_game, name="Init", daemon=True)
+        init_thread.start()
+        
         # 启动 Flask 服务器
-        print("正在启动 Web 服务器...")
+        print(f"正在启动 Web 服务器...（进程启动后 {(time.perf_counter() - _process_start) * 1000:.0f} ms）")
         print("请在浏览器访问: http://localhost:5000")
         print("按 Ctrl+C 停止服务器")
         socketio.run(app, host='0.0.0.0', port=5000, debug=False, allow_unsafe_werkzeug=True)
@@ -227,4 +643,3 @@ if __name__ == '__main__':
         traceback.print_exc()
     finally:
         cleanup()
-
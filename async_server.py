@@ -0,0 +1,362 @@
+"""
+异步服务器模式 / Async server mode
+
+面向大量客户端的生产部署入口：python async_server.py
+
+  - Web 与 Socket.IO 运行在单个 asyncio 事件循环上（aiohttp + python-socketio），
+    数百个连接不再对应数百个线程；
+  - 摄像头采集、手势检测与游戏循环仍在各自的工作线程中运行；
+  - 工作线程通过 loop.call_soon_threadsafe 把 JPEG 帧与待推送事件交给事件循环，
+    每个视频观看者只保留最新一帧（慢客户端丢旧帧而不是堆积），
+    事件经有界队列由单个协程统一广播；
+  - 只有一个采集线程，JPEG 每帧只编码一次，所有观看者共享。
+
+游戏逻辑、就绪状态与管理接口复用 app.py 中的实现。
+"""
+import asyncio
+import os
+import threading
+import time
+
+try:
+    import socketio
+    from aiohttp import web
+except ImportError:
+    raise SystemExit("异步服务器模式需要 aiohttp：pip install aiohttp")
+
+import app as core
+from metrics import metrics
+from latency import tracker as latency_tracker
+from profiler import profiler
+from tracing import tracer
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+VIEWER_POLL_S = 1.0  # 视频观看者等待新帧时重新检查运行状态的间隔
+
+
+class AsyncHub:
+    """工作线程 -> 事件循环的线程安全投递点"""
+
+    def __init__(self, loop, sio, outbox_size=256):
+        self.loop = loop
+        self.sio = sio
+        self.outbox = asyncio.Queue(maxsize=outbox_size)
+        self.viewers = set()  # 每个视频观看者一个只保留最新帧的队列
+        self.clients = 0
+
+    # ---------- 工作线程侧 ----------
+
+    def broadcast_threadsafe(self, event, data):
+        """替换 app.broadcast：把事件投递到事件循环"""
+        try:
+            self.loop.call_soon_threadsafe(self._enqueue, event, data)
+        except RuntimeError:
+            pass  # 事件循环已关闭
+
+    def publish_frame_threadsafe(self, frame_bytes):
+        try:
+            self.loop.call_soon_threadsafe(self._publish_frame, frame_bytes)
+        except RuntimeError:
+            pass
+
+    @property
+    def active(self):
+        """有客户端或观看者时才需要采集"""
+        return self.clients > 0 or len(self.viewers) > 0
+
+    # ---------- 事件循环侧 ----------
+
+    def _enqueue(self, event, data):
+        # 推送跟不上时丢弃最旧的事件，保持内存有界
+        if self.outbox.full():
+            self.outbox.get_nowait()
+            metrics.inc("emits_dropped")
+        self.outbox.put_nowait((event, data))
+
+    def _publish_frame(self, frame_bytes):
+        for queue in self.viewers:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(frame_bytes)
+
+    def add_viewer(self):
+        queue = asyncio.Queue(maxsize=1)
+        self.viewers.add(queue)
+        metrics.set_gauge("video_viewers", len(self.viewers))
+        return queue
+
+    def remove_viewer(self, queue):
+        self.viewers.discard(queue)
+        metrics.set_gauge("video_viewers", len(self.viewers))
+
+    def close_viewers(self):
+        """服务器关闭：向每个观看者队列放入 None，正在等待帧的处理协程立即结束"""
+        for queue in self.viewers:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(None)
+
+    async def pump(self):
+        """单个协程统一向所有客户端广播"""
+        while True:
+            event, data = await self.outbox.get()
+            try:
+                await self.sio.emit(event, data)
+            except Exception as e:
+                print(f"推送失败：{e}")
+
+
+sio = socketio.AsyncServer(async_mode='aiohttp', cors_allowed_origins='*')
+hub = None
+
+
+def capture_worker():
+    """采集线程：读帧并送入检测器，有观看者时才编码 JPEG"""
+    prev_time = 0
+    last_encode = 0
+
+    if not core.wait_until_ready():
+        return
+
+    while core.is_running and core.camera is not None:
+        if not hub.active:
+            prev_time = 0
+            time.sleep(0.05)
+            continue
+        item = core.capture_step()
+        if item is None:
+            continue
+        if not hub.viewers:
+            prev_time = 0
+            continue
+        frame, frame_seq = item
+
+        # 空闲时降低编码频率（帧照常送入检测）
+        curr_time = time.time()
+        if curr_time - last_encode < core.governor.interval("stream"):
+            continue
+        last_encode = curr_time
+        fps = 1 / (curr_time - prev_time) if prev_time > 0 else 0
+        prev_time = curr_time
+
+        frame_bytes = core.encode_frame(frame, frame_seq, fps)
+        if frame_bytes is not None:
+            hub.publish_frame_threadsafe(frame_bytes)
+
+
+# ---------- HTTP 路由 ----------
+
+async def index(request):
+    """提供前端页面"""
+    return web.FileResponse(os.path.join(STATIC_DIR, 'index.html'))
+
+
+async def video_feed(request):
+    """视频流端点：所有观看者共享同一份编码结果"""
+    response = web.StreamResponse(headers={
+        'Content-Type': 'multipart/x-mixed-replace; boundary=frame',
+        'Cache-Control': 'no-cache',
+    })
+    await response.prepare(request)
+    queue = hub.add_viewer()
+    try:
+        while core.is_running:
+            try:
+                frame_bytes = await asyncio.wait_for(queue.get(), VIEWER_POLL_S)
+            except asyncio.TimeoutError:
+                continue  # 没有新帧（空闲或摄像头故障）：重新检查运行状态
+            if frame_bytes is None:
+                break
+            await response.write(b'--frame\r\n'
+                                 b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
+    except ConnectionResetError:
+        pass
+    finally:
+        hub.remove_viewer(queue)
+    return response
+
+
+async def ready(request):
+    """就绪探针：组件全部就绪返回 200，否则 503"""
+    with core.readiness_lock:
+        snapshot = dict(core.readiness)
+    snapshot['startup_ms'] = dict(core.startup_times)
+    snapshot['camera_health'] = core.camera_health()
+    return web.json_response(snapshot, status=200 if snapshot['ready'] else 503)
+
+
+async def metrics_endpoint(request):
+    """Prometheus 文本格式的流水线指标"""
+    return web.Response(text=metrics.render_prometheus(), content_type='text/plain')
+
+
+async def latency_report(request):
+    """采集→渲染延迟分位数（毫秒）"""
+    return web.json_response(latency_tracker.percentiles())
+
+
+def _request_token(request):
+    return request.query.get('token') or request.headers.get('X-Admin-Token')
+
+
+def _is_admin_request(request):
+    return core.is_admin(_request_token(request), request.remote)
+
+
+def _is_admin_sid(sid, data):
+    """Socket.IO 管理事件：远端地址取自连接时的 environ"""
+    if not isinstance(data, dict):
+        return False
+    environ = sio.get_environ(sid) or {}
+    remote = environ.get('REMOTE_ADDR') or getattr(environ.get('aiohttp.request'), 'remote', None)
+    return core.is_admin(data.get('token'), remote)
+
+
+async def profiler_endpoint(request):
+    """采样分析器开关；GET 返回折叠栈"""
+    if not _is_admin_request(request):
+        return web.Response(text='forbidden', status=403)
+    if request.method == 'GET':
+        return web.Response(text=profiler.collapsed(request.query.get('thread')))
+    # 采样间隔由 handle_profiler_action 校验并限制范围
+    interval = request.query.get('interval')
+    return web.json_response(core.handle_profiler_action(request.query.get('action', 'status'), interval))
+
+
+async def trace_endpoint(request):
+    """逐帧追踪开关；GET 导出 Chrome/Perfetto trace JSON"""
+    if not _is_admin_request(request):
+        return web.Response(text='forbidden', status=403)
+    if request.method == 'GET':
+        return web.json_response(tracer.export(), headers={
+            'Content-Disposition': 'attachment; filename=snake_trace.json'})
+    return web.json_response(core.handle_trace_action(request.query.get('action', 'status')))
+
+
+async def preset_endpoint(request):
+    """性能预设：GET 返回当前设置，POST ?preset=low-latency 切换预设"""
+    if not _is_admin_request(request):
+        return web.Response(text='forbidden', status=403)
+    if request.method == 'GET':
+        return web.json_response(core.settings.status())
+    # 与 Flask 的 get_json(silent=True) 一致：请求体为空或不是 JSON 对象时按 {} 处理
+    try:
+        data = await request.json() if request.can_read_body else {}
+    except ValueError:
+        data = {}
+    if not isinstance(data, dict):
+        data = {}
+    if request.query.get('preset'):
+        data['preset'] = request.query['preset']
+    if request.query.get('save'):
+        data['save'] = True
+    return web.json_response(core.handle_preset_action(data))
+
+
+# ---------- Socket.IO 事件 ----------
+
+@sio.event
+async def connect(sid, environ):
+    hub.clients += 1
+    metrics.set_gauge("clients", hub.clients)
+    core.governor.set_clients(hub.clients)
+    await sio.emit('connection_response', core.connection_payload(), to=sid)
+
+
+@sio.event
+async def disconnect(sid):
+    hub.clients = max(0, hub.clients - 1)
+    metrics.set_gauge("clients", hub.clients)
+    core.governor.set_clients(hub.clients)
+    core.latency_tracker.forget(sid)
+
+
+@sio.event
+async def clock_sync(sid, data):
+    await sio.emit('clock_sync', core.clock_sync_reply(data), to=sid)
+
+
+@sio.event
+async def render_ack(sid, data):
+    core.record_render_ack(data, sid)
+
+
+@sio.event
+async def game_action(sid, data):
+    core.apply_game_action(data.get('action'))
+
+
+@sio.event
+async def admin_profiler(sid, data):
+    if not _is_admin_sid(sid, data):
+        await sio.emit('admin_profiler', {'error': 'forbidden'}, to=sid)
+        return
+    result = core.handle_profiler_action(data.get('action', 'status'), data.get('interval'), data.get('thread'))
+    if isinstance(result, str):
+        result = {'collapsed': result}
+    await sio.emit('admin_profiler', result, to=sid)
+
+
+@sio.event
+async def admin_preset(sid, data):
+    if not _is_admin_sid(sid, data):
+        await sio.emit('admin_preset', {'error': 'forbidden'}, to=sid)
+        return
+    await sio.emit('admin_preset', core.handle_preset_action(data), to=sid)
+
+
+# ---------- 启动 ----------
+
+async def on_startup(web_app):
+    global hub
+    hub = AsyncHub(asyncio.get_running_loop(), sio)
+    core.broadcast = hub.broadcast_threadsafe
+    web_app['pump'] = asyncio.ensure_future(hub.pump())
+
+    # 游戏循环、后台初始化与采集都在工作线程中运行
+    core.game_thread = threading.Thread(target=core.game_loop, name="GameLoop", daemon=True)
+    core.game_thread.start()
+    core.init_thread = threading.Thread(target=core.initialize_game, name="Init", daemon=True)
+    core.init_thread.start()
+    threading.Thread(target=capture_worker, name="Capture", daemon=True).start()
+
+
+async def on_shutdown(web_app):
+    # aiohttp 在等待处理协程结束之前调用：先让视频流协程退出，不必等到关闭超时
+    core.is_running = False
+    hub.close_viewers()
+
+
+def create_app():
+    web_app = web.Application()
+    sio.attach(web_app)
+    web_app.router.add_get('/', index)
+    web_app.router.add_get('/video_feed', video_feed)
+    web_app.router.add_get('/ready', ready)
+    web_app.router.add_get('/metrics', metrics_endpoint)
+    web_app.router.add_get('/latency', latency_report)
+    web_app.router.add_route('*', '/admin/profiler', profiler_endpoint)
+    web_app.router.add_route('*', '/admin/trace', trace_endpoint)
+    web_app.router.add_route('*', '/admin/preset', preset_endpoint)
+    web_app.router.add_static('/static/', STATIC_DIR)
+    web_app.on_startup.append(on_startup)
+    web_app.on_shutdown.append(on_shutdown)
+    return web_app
+
+
+if __name__ == '__main__':
+    try:
+        core.game = core.create_game()
+        core.is_running = True
+        print(f"正在启动异步 Web 服务器...（进程启动后 {(time.perf_counter() - core._process_start) * 1000:.0f} ms）")
+        print("请在浏览器访问: http://localhost:5000")
+        print("按 Ctrl+C 停止服务器")
+        web.run_app(create_app(), host='0.0.0.0', port=5000, print=None)
+    except KeyboardInterrupt:
+        print("\n\n用户中断")
+    except Exception as e:
+        print(f"发生错误：{e}")
+        import traceback
+        traceback.print_exc()
+    finally:
+        core.cleanup()
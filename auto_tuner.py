@@ -0,0 +1,215 @@
+"""
+启动自动标定 / Startup auto-tuner
+
+在本机上对可用的推理后端（SOLUTIONS / TASKS）与若干检测分辨率组合逐一实测单帧检测耗时，
+选出满足目标检测帧率的最佳组合（命中率优先，其次分辨率越大越好，最后越快越好），
+写入本机设置 local_settings.json，之后每次启动直接使用，不同机器各自标定。
+
+标定记录带有机器指纹（主机名、CPU 型号与核数），设置文件被拷贝到另一台机器时会重新标定。
+
+样本帧来源依次为：命令行 --source、config.CALIBRATION_SOURCE、config.REPLAY_SOURCE
+（视频文件或图片目录），都未配置时从摄像头采集。样本中有手时结果更有代表性。
+
+    python auto_tuner.py calibrate                 # 标定并保存
+    python auto_tuner.py calibrate --source clips/ --target-fps 25 --dry-run
+    python auto_tuner.py show                      # 查看本机已保存的标定结果
+"""
+import argparse
+import os
+import platform
+import time
+from collections import namedtuple
+
+import config
+from latency import monotonic_ms
+from runtime_config import settings
+
+# 一次实测结果：后端、检测几何、单帧耗时（ms，均值与 p90）、检出手的帧比例
+Trial = namedtuple("Trial", ["backend", "geometry", "mean_ms", "p90_ms", "hit_rate"])
+
+DEFAULT_SIZES = [(480, 270, 32), (320, 180, 24), (256, 144, 16), (192, 108, 12)]
+
+
+def machine_fingerprint():
+    """标识当前机器；标定结果只在同一台机器上复用。"""
+    return "|".join([platform.node(), platform.machine(), platform.processor() or "",
+                     str(os.cpu_count() or 0)])
+
+
+def load_sample_frames(source=None, count=60, camera=None):
+    """读取最多 count 帧样本（采集分辨率的 BGR 图像）；配置了样本源时优先使用，否则读 camera 或打开摄像头。"""
+    from camera_manager import CameraManager, ReplayCamera
+    source = source or getattr(config, "CALIBRATION_SOURCE", "") or getattr(config, "REPLAY_SOURCE", "")
+    owned = bool(source) or camera is None
+    if owned:
+        # 回放源不需要按帧率节拍读取
+        camera = ReplayCamera(source, fps=10000, loop=False) if source else CameraManager()
+        if not camera.start():
+            return []
+    frames = []
+    try:
+        misses = 0
+        while len(frames) < count and misses < 10:
+            captured = camera.read_frame_stamped()
+            if captured.image is None:
+                misses += 1
+                continue
+            frames.append(captured.image.copy())
+    finally:
+        if owned:
+            camera.release()
+    return frames
+
+
+class AutoTuner:
+    def __init__(self, frames, backends=None, sizes=None, target_fps=None, headroom=0.8, warmup_frames=5):
+        self.frames = frames
+        self.backends = backends or getattr(config, "CALIBRATION_BACKENDS", ["SOLUTIONS", "TASKS"])
+        self.sizes = sizes or getattr(config, "CALIBRATION_SIZES", DEFAULT_SIZES)
+        self.target_fps = target_fps or getattr(config, "CALIBRATION_TARGET_FPS", None) or settings.camera_fps
+        # 单帧耗时预算：只用目标周期的一部分，给采集、编码与游戏线程留出余量
+        self.budget_ms = 1000.0 / self.target_fps * headroom
+        self.warmup_frames = warmup_frames
+
+    def measure(self, backend, geometry):
+        """用指定后端与几何处理全部样本帧；后端不可用时返回 None。"""
+        from camera_manager import preprocess_for_detection
+        from hand_detector import HandDetector
+        # 标定统一使用同步推理，才能测到单帧耗时
+        detector = HandDetector(backend=backend, geometry=geometry, running_mode="VIDEO")
+        if (backend == "TASKS") != detector.is_tasks:
+            print(f"  {backend}: 不可用，跳过")
+            return None
+
+        inputs = [preprocess_for_detection(frame, geometry) for frame in self.frames]
+        ts = monotonic_ms()
+        for i in range(min(self.warmup_frames, len(inputs))):
+            ts += 33
+            detector.process_frame(inputs[i], (i, ts))
+
+        times = []
+        hits = 0
+        for i, image in enumerate(inputs):
+            ts += 33  # 按 30 FPS 推进时间戳，VIDEO 模式的跟踪行为与实时运行一致
+            t0 = time.perf_counter()
+            detector.process_frame(image, (i, ts))
+            times.append((time.perf_counter() - t0) * 1000)
+            if any(hand["visible"] for hand in detector.get_hands()):
+                hits += 1
+        times.sort()
+        p90 = times[min(len(times) - 1, int(len(times) * 0.9))]
+        return Trial(backend, geometry, sum(times) / len(times), p90, hits / len(times))
+
+    def meets_target(self, trial):
+        return trial.p90_ms <= self.budget_ms
+
+    def score(self, trial):
+        """排序键：达标的组合先看命中率（5% 一档），再看检测分辨率，最后越快越好；都不达标时选最快的。"""
+        width, height, _ = trial.geometry
+        if not self.meets_target(trial):
+            return (0, 0, 0, -trial.p90_ms)
+        return (1, round(trial.hit_rate * 20), width * height, -trial.p90_ms)
+
+    def run(self):
+        """逐一实测所有组合，返回 (最佳 Trial, 全部 Trial)；没有可用组合时最佳为 None。"""
+        from camera_manager import DetectionGeometry
+        trials = []
+        for backend in self.backends:
+            for size in self.sizes:
+                geometry = DetectionGeometry(*size)
+                try:
+                    trial = self.measure(backend, geometry)
+                except Exception as e:
+                    print(f"  {backend} {size[0]}x{size[1]}: 失败：{e}")
+                    continue
+                if trial is None:
+                    break  # 后端不可用，其余分辨率也不必再试
+                mark = "达标" if self.meets_target(trial) else "超时"
+                print(f"  {backend:<9} {size[0]}x{size[1]}+{size[2]}: 平均 {trial.mean_ms:.1f} ms，"
+                      f"p90 {trial.p90_ms:.1f} ms，命中率 {trial.hit_rate:.0%}（{mark}）")
+                trials.append(trial)
+        if not trials:
+            return None, trials
+        return max(trials, key=self.score), trials
+
+
+def calibration_record(best, tuner):
+    return {
+        "machine": machine_fingerprint(),
+        "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "target_fps": tuner.target_fps,
+        "frames": len(tuner.frames),
+        "backend": best.backend,
+        "geometry": list(best.geometry),
+        "p90_ms": round(best.p90_ms, 2),
+        "meets_target": tuner.meets_target(best),
+    }
+
+
+def calibrate(source=None, frames=None, target_fps=None, save=True, camera=None):
+    """实测并选出最佳组合；save 为真时写入本机设置并立即重新加载。返回最佳 Trial 或 None。"""
+    if frames is None:
+        frames = load_sample_frames(source, camera=camera)
+    if not frames:
+        print("自动标定：没有可用的样本帧，跳过")
+        return None
+    tuner = AutoTuner(frames, target_fps=target_fps)
+    print(f"自动标定：{len(frames)} 帧样本，目标 {tuner.target_fps} FPS（单帧预算 {tuner.budget_ms:.1f} ms）")
+    best, _ = tuner.run()
+    if best is None:
+        print("自动标定：没有可用的后端")
+        return None
+    width, height, pad = best.geometry
+    print(f"自动标定选用：{best.backend} {width}x{height}+{pad}，p90 {best.p90_ms:.1f} ms"
+          + ("" if tuner.meets_target(best) else "（未达到目标帧率，已选最快组合）"))
+    if save:
+        settings.save_local(calibration=calibration_record(best, tuner), hand_backend=best.backend,
+                            detection_width=width, detection_height=height, detection_pad=pad)
+        settings.reload()
+    return best
+
+
+def needs_calibration():
+    """本机还没有标定记录，或记录来自另一台机器。"""
+    record = settings.load_local().get("calibration")
+    return not record or record.get("machine") != machine_fingerprint()
+
+
+def ensure_calibrated(camera=None):
+    """启动时调用：本机尚未标定时实测一次（样本取自配置的回放源或已打开的摄像头）。"""
+    if not needs_calibration():
+        return False
+    print("本机尚未标定，正在自动标定检测后端与分辨率...")
+    return calibrate(camera=camera) is not None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="手势贪吃蛇检测后端与分辨率自动标定")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_cal = sub.add_parser("calibrate", help="实测并保存本机最佳配置")
+    p_cal.add_argument("--source", default=None, help="样本视频文件或图片目录（默认使用摄像头）")
+    p_cal.add_argument("--frames", type=int, default=60, help="样本帧数")
+    p_cal.add_argument("--target-fps", type=float, default=None, help="目标检测帧率（默认为采集帧率）")
+    p_cal.add_argument("--dry-run", action="store_true", help="只输出结果，不保存")
+    sub.add_parser("show", help="查看本机已保存的标定结果")
+    args = parser.parse_args()
+
+    if args.command == "show":
+        record = settings.load_local().get("calibration")
+        if not record:
+            print("本机尚未标定")
+            return
+        for key, value in record.items():
+            print(f"  {key:<13} {value}")
+        if record.get("machine") != machine_fingerprint():
+            print("注意：该记录来自另一台机器，下次启动（AUTO_TUNE 开启时）会重新标定")
+        return
+
+    frames = load_sample_frames(args.source, args.frames)
+    best = calibrate(frames=frames, target_fps=args.target_fps, save=not args.dry_run)
+    if best is None:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
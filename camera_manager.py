@@ -1,29 +1,76 @@
 import cv2
 import config
+import os
+import threading
 import time
+from collections import namedtuple
+from latency import monotonic_ms
+from capture_negotiator import CaptureNegotiator
+from runtime_config import settings
+
+# 采集到的一帧：图像 + 帧序号 + 单调时钟采集时间戳（ms）。
+# 下游（检测、滤波、Tasks 时间戳、延迟统计）一律使用采集时刻而非处理时刻。
+Frame = namedtuple("Frame", ["image", "seq", "capture_ts"])
+NO_FRAME = Frame(None, None, None)
+
+# 检测帧几何：检测分辨率与四周复制填充的像素数（运行时可由性能预设切换）
+DetectionGeometry = namedtuple("DetectionGeometry", ["width", "height", "pad"])
+
+def detection_geometry(values=None):
+    """由运行时设置得到当前检测帧几何。"""
+    values = values or settings.snapshot()
+    return DetectionGeometry(values["detection_width"], values["detection_height"], values["detection_pad"])
+
+def preprocess_for_detection(frame, geometry=None):
+    """把采集帧缩放到检测分辨率，并按填充像素数复制边缘填充。"""
+    geometry = geometry or detection_geometry()
+    small_frame = cv2.resize(frame, (geometry.width, geometry.height))
+    pad = geometry.pad
+    if pad and pad > 0:
+        small_frame = cv2.copyMakeBorder(
+            small_frame, pad, pad, pad, pad, cv2.BORDER_REPLICATE
+        )
+    return small_frame
+
 
 class CameraManager:
-    def __init__(self):
+    def __init__(self, devices=None):
         self.cap = None
+        self.devices = list(devices if devices is not None else getattr(config, "CAMERA_DEVICES", (0, 1)))
         self.width = config.CAMERA_WIDTH
         self.height = config.CAMERA_HEIGHT
         self.is_running = False
+        self.device = None   # 协商选中的设备索引与采集格式
+        self.profile = None
+        self.frame_seq = 0
+        self.seq_lock = threading.Lock()
+        self.applied_fps = None  # 已向驱动请求的采集帧率
+        self.pending_fps = None  # 运行时设置修改的采集帧率，由读帧线程在下一帧前生效
 
     def start(self):
         """初始化并启动摄像头。"""
         try:
-            # 首先尝试索引 0，如果失败则尝试 1
-            self.cap = cv2.VideoCapture(0, cv2.CAP_DSHOW)  # 在 Windows 上使用 DirectShow 后端
-            if not self.cap.isOpened():
-                print("警告：未找到摄像头 0。正在尝试摄像头 1...")
-                self.cap = cv2.VideoCapture(1, cv2.CAP_DSHOW)
-                
-            if not self.cap.isOpened():
-                raise RuntimeError("无法打开任何摄像头。")
-
-            # 设置分辨率
-            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
-            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+            if getattr(config, "CAMERA_NEGOTIATE", True):
+                # 逐一尝试后端/格式/分辨率组合，实测后选最优并按设备缓存
+                negotiator = CaptureNegotiator()
+                self.cap, self.device, self.profile = negotiator.open_best(self.devices)
+                if self.cap is None:
+                    raise RuntimeError("无法打开任何摄像头。")
+            else:
+                # 按顺序尝试各设备（默认先 0 后 1）
+                for device in self.devices:
+                    self.cap = cv2.VideoCapture(device, cv2.CAP_DSHOW)  # 在 Windows 上使用 DirectShow 后端
+                    if self.cap.isOpened():
+                        self.device = device
+                        break
+                    print(f"警告：未找到摄像头 {device}。")
+
+                if self.cap is None or not self.cap.isOpened():
+                    raise RuntimeError("无法打开任何摄像头。")
+
+                # 设置分辨率
+                self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+                self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
             
             # 检查分辨率是否设置正确
             actual_width = self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)
@@ -44,29 +91,59 @@ class CameraManager:
                 print("摄像头就绪！")
             
             self.is_running = True
+            # 采集帧率跟随运行时设置（启动预设与之后的切换）
+            self.applied_fps = self.profile.fps if self.profile else None
+            self.apply_settings(settings.snapshot())
+            settings.subscribe(self.apply_settings)
             return True
         except Exception as e:
             print(f"启动摄像头时出错：{e}")
             self.is_running = False
             return False
 
+    def apply_settings(self, values):
+        """运行时设置变化回调：VideoCapture 不是线程安全的，只登记新帧率，由读帧线程设置。"""
+        fps = values.get("camera_fps")
+        if fps and fps != self.applied_fps:
+            self.pending_fps = fps
+
     def read_frame(self):
         """从摄像头读取一帧。"""
+        return self.read_frame_stamped().image
+
+    def read_frame_stamped(self):
+        """读取一帧并返回 Frame(image, seq, capture_ts)；失败时 image 为 None。"""
         if not self.is_running or self.cap is None:
-            return None
+            return NO_FRAME
+
+        if self.pending_fps is not None:
+            fps, self.pending_fps = self.pending_fps, None
+            self.cap.set(cv2.CAP_PROP_FPS, fps)
+            self.applied_fps = fps
+            print(f"摄像头采集帧率已设为 {fps}（实际为 {self.cap.get(cv2.CAP_PROP_FPS):.0f}）")
 
         ret, frame = self.cap.read()
+        capture_ts = monotonic_ms()
         if not ret:
-            print("错误：无法读取帧。")
-            return None
+            # 连续失败的退避、重开与日志由 camera_supervisor 负责
+            return NO_FRAME
+
+        with self.seq_lock:
+            self.frame_seq += 1
+            seq = self.frame_seq
+
+        # 协商得到的分辨率可能低于配置值，统一到配置分辨率
+        if frame.shape[1] != self.width or frame.shape[0] != self.height:
+            frame = cv2.resize(frame, (self.width, self.height))
 
         # 水平翻转以获得镜像效果（对游戏更直观）
         frame = cv2.flip(frame, 1)
-        return frame
+        return Frame(frame, seq, capture_ts)
 
     def release(self):
         """释放摄像头资源。"""
         self.is_running = False
+        settings.unsubscribe(self.apply_settings)
         
         if self.cap:
             # 先停止读取
@@ -81,3 +158,86 @@ class CameraManager:
         time.sleep(0.1)
         
         print("摄像头已释放。")
+
+
+class ReplayCamera(CameraManager):
+    """回放视频文件或图片目录，接口与 CameraManager 相同，用于无摄像头测试。"""
+
+    IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".bmp")
+
+    def __init__(self, source, fps=30, loop=True):
+        super().__init__()
+        self.source = source
+        self.fps = fps
+        self.loop = loop
+        self.images = None
+        self.image_idx = 0
+        self.next_frame_time = 0.0
+
+    def start(self):
+        """打开回放源。"""
+        try:
+            if os.path.isdir(self.source):
+                names = sorted(n for n in os.listdir(self.source)
+                               if n.lower().endswith(self.IMAGE_EXTS))
+                self.images = [os.path.join(self.source, n) for n in names]
+                if not self.images:
+                    raise RuntimeError(f"回放目录中没有图片：{self.source}")
+            else:
+                self.cap = cv2.VideoCapture(self.source)
+                if not self.cap.isOpened():
+                    raise RuntimeError(f"无法打开回放文件：{self.source}")
+            print(f"回放源已就绪：{self.source} @ {self.fps} FPS")
+            self.next_frame_time = time.monotonic()
+            self.is_running = True
+            return True
+        except Exception as e:
+            print(f"启动回放源时出错：{e}")
+            self.is_running = False
+            return False
+
+    def _read_raw(self):
+        if self.images is not None:
+            if self.image_idx >= len(self.images):
+                if not self.loop:
+                    return None
+                self.image_idx = 0
+            frame = cv2.imread(self.images[self.image_idx])
+            self.image_idx += 1
+            return frame
+        ret, frame = self.cap.read()
+        if not ret and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read()
+        return frame if ret else None
+
+    def read_frame_stamped(self):
+        """按设定帧率节拍读取下一帧。"""
+        if not self.is_running:
+            return NO_FRAME
+
+        # 按帧率节拍，模拟真实摄像头的交付节奏
+        now = time.monotonic()
+        if now < self.next_frame_time:
+            time.sleep(self.next_frame_time - now)
+        self.next_frame_time = max(now, self.next_frame_time) + 1.0 / self.fps
+
+        frame = self._read_raw()
+        capture_ts = monotonic_ms()
+        if frame is None:
+            return NO_FRAME
+        if frame.shape[1] != self.width or frame.shape[0] != self.height:
+            frame = cv2.resize(frame, (self.width, self.height))
+
+        with self.seq_lock:
+            self.frame_seq += 1
+            seq = self.frame_seq
+        return Frame(frame, seq, capture_ts)
+
+    def release(self):
+        """释放回放源。"""
+        self.is_running = False
+        if self.cap:
+            self.cap.release()
+            self.cap = None
+        print("回放源已释放。")
@@ -0,0 +1,177 @@
+"""
+摄像头故障监护 / Camera failure supervisor
+
+USB 摄像头松动、被拔出或驱动卡死时，read() 会持续立即失败；读帧循环若直接重试，
+会变成占满一个核的空转并刷屏日志。监护器包装摄像头（接口与 CameraManager 相同），
+记录连续读帧失败次数：
+
+  - 每次失败后按指数退避等待（CAMERA_BACKOFF_BASE_S 起翻倍，最长 CAMERA_BACKOFF_MAX_S）；
+  - 连续失败 CAMERA_REOPEN_AFTER 次后释放并重新打开当前源，重开失败则轮换到下一个源；
+  - 健康状态（ok / stalled / reconnecting / offline）变化时通知订阅者（推送给前端），
+    并写入指标 camera_health 与计数器 camera_read_failures / camera_reopens。
+
+日志只在状态变化与重开时输出，不再逐帧打印。
+"""
+import threading
+import time
+
+import config
+from camera_manager import NO_FRAME
+from metrics import metrics
+
+OK = "ok"                      # 正常出帧
+STALLED = "stalled"            # 连续读帧失败，退避等待中
+RECONNECTING = "reconnecting"  # 正在重新打开摄像头
+OFFLINE = "offline"            # 所有源都无法打开，按最长退避间隔继续重试
+HEALTH_CODES = {OK: 0, STALLED: 1, RECONNECTING: 2, OFFLINE: 3}
+
+
+class CameraSupervisor:
+    def __init__(self, sources, base=None, max_backoff=None, reopen_after=None):
+        """
+        sources: [(名称, 工厂函数)]，工厂函数返回尚未 start() 的摄像头对象；
+        按顺序尝试，当前源重开失败时轮换到下一个。
+        """
+        self.sources = list(sources)
+        self.base = base if base is not None else getattr(config, "CAMERA_BACKOFF_BASE_S", 0.02)
+        self.max_backoff = max_backoff if max_backoff is not None else getattr(config, "CAMERA_BACKOFF_MAX_S", 2.0)
+        self.reopen_after = reopen_after or getattr(config, "CAMERA_REOPEN_AFTER", 6)
+        self.camera = None
+        self.source_idx = 0
+        self.failures = 0     # 连续读帧失败次数
+        self.reopens = 0
+        self.health = OK
+        self.since = time.monotonic()
+        self.is_running = False
+        self.listeners = []
+        # VideoCapture 不是线程安全的：读帧与重开互斥（多个视频流观看者会并发读帧）
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+
+    def __getattr__(self, name):
+        # 其余属性（width / height / device / profile ...）转发给当前摄像头
+        camera = self.__dict__.get("camera")
+        if camera is None:
+            raise AttributeError(name)
+        return getattr(camera, name)
+
+    def subscribe(self, callback):
+        """注册健康状态变化回调 callback(status)；在读帧线程中调用。"""
+        self.listeners.append(callback)
+
+    def status(self):
+        name = self.sources[self.source_idx][0] if self.sources else None
+        return {"state": self.health, "source": name, "failures": self.failures,
+                "reopens": self.reopens, "since_s": round(time.monotonic() - self.since, 1)}
+
+    def _set_health(self, health):
+        if health == self.health:
+            return
+        print(f"摄像头状态：{self.health} -> {health}（连续失败 {self.failures} 次）")
+        self.health = health
+        self.since = time.monotonic()
+        metrics.set_gauge("camera_health", HEALTH_CODES[health])
+        status = self.status()
+        for callback in list(self.listeners):
+            try:
+                callback(status)
+            except Exception as e:
+                print(f"推送摄像头状态失败：{e}")
+
+    def _open(self, idx):
+        name, factory = self.sources[idx]
+        camera = factory()
+        if camera.start():
+            self.camera = camera
+            self.source_idx = idx
+            return True
+        camera.release()
+        print(f"摄像头源 {name} 无法打开")
+        return False
+
+    def start(self):
+        """按顺序打开第一个可用的源；全部失败返回 False。"""
+        self.stopped.clear()
+        for idx in range(len(self.sources)):
+            if self._open(idx):
+                self.is_running = True
+                metrics.set_gauge("camera_health", HEALTH_CODES[OK])
+                return True
+        return False
+
+    def _reopen(self):
+        """释放当前摄像头，先重开当前源，失败时依次尝试其余源。调用方需持有 lock。"""
+        self._set_health(RECONNECTING)
+        if self.camera is not None:
+            self.camera.release()
+            self.camera = None
+        self.reopens += 1
+        metrics.inc("camera_reopens")
+        count = len(self.sources)
+        for step in range(count):
+            if self.stopped.is_set():
+                return False
+            idx = (self.source_idx + step) % count
+            print(f"正在重新打开摄像头源 {self.sources[idx][0]}...")
+            if self._open(idx):
+                return True
+        self._set_health(OFFLINE)
+        return False
+
+    def backoff(self):
+        """第 n 次连续失败后的等待时间（秒）。"""
+        return min(self.max_backoff, self.base * 2 ** max(0, self.failures - 1))
+
+    def read_frame_stamped(self):
+        """读取一帧；失败时退避等待后返回 NO_FRAME，连续失败达到阈值时重开摄像头。"""
+        if not self.is_running:
+            return NO_FRAME
+        with self.lock:
+            captured = self.camera.read_frame_stamped() if self.camera is not None else NO_FRAME
+            if captured.image is not None:
+                if self.failures:
+                    self.failures = 0
+                    self._set_health(OK)
+                return captured
+            if self.stopped.is_set():
+                return NO_FRAME
+            self.failures += 1
+            metrics.inc("camera_read_failures")
+            if self.failures % self.reopen_after == 0:
+                if self._reopen():
+                    self._set_health(STALLED)  # 重开成功，等到真正读出帧才算恢复
+            elif self.health == OK:
+                self._set_health(STALLED)
+            delay = self.backoff()
+        # 退避在锁外等待，release() 可随时打断
+        self.stopped.wait(delay)
+        return NO_FRAME
+
+    def read_frame(self):
+        return self.read_frame_stamped().image
+
+    def release(self):
+        self.is_running = False
+        self.stopped.set()
+        with self.lock:
+            if self.camera is not None:
+                self.camera.release()
+                self.camera = None
+
+
+def camera_sources():
+    """
+    按配置生成摄像头源列表：回放源时只有回放；否则每个 CAMERA_DEVICES 设备一个源，
+    各源优先打开对应设备，打不开时仍按顺序回落到其余设备。
+    """
+    from camera_manager import CameraManager, ReplayCamera
+    replay_source = getattr(config, "REPLAY_SOURCE", "")
+    if replay_source:
+        fps = getattr(config, "REPLAY_FPS", 30)
+        return [(replay_source, lambda: ReplayCamera(replay_source, fps=fps))]
+    devices = list(getattr(config, "CAMERA_DEVICES", (0, 1)))
+    sources = []
+    for i, device in enumerate(devices):
+        order = devices[i:] + devices[:i]
+        sources.append((f"camera {device}", lambda order=order: CameraManager(devices=order)))
+    return sources
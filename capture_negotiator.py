@@ -0,0 +1,216 @@
+"""
+采集格式协商 / Capture-format negotiation
+
+按平台给出一组有序的 (后端, FOURCC, 分辨率, 帧率, 缓冲区大小) 组合，逐一打开摄像头、
+实测实际交付帧率与读帧延迟，选出最优组合并按设备缓存到 JSON 文件，下次启动直接复用。
+
+  - Windows 首选 DirectShow，Linux 首选 V4L2 + MJPG（YUYV 在高分辨率下帧率很低），
+    macOS 使用 AVFoundation；最后总有一个"后端默认值"兜底；
+  - 驱动缓冲区越大，读到的帧越旧：估计延迟 = 平均读帧耗时 + (缓冲帧数 - 1) / 帧率；
+  - 多数驱动（V4L2 / DirectShow / MSMF）不允许同一设备同时打开两次：每个组合实测后立即释放，
+    全部测完再重新打开胜出的组合；
+  - 缓存按设备与请求的分辨率、帧率区分，修改 config.py 中的采集设置后会重新协商；
+  - VideoCapture 的构造函数与时钟均可注入，便于用假的 VideoCapture 离线测试。
+"""
+import json
+import os
+import sys
+import time
+from collections import namedtuple
+
+import cv2
+
+import config
+
+# backend 为 cv2 常量名（便于写入缓存），fourcc / fps / buffer_size 为 None 时不设置
+CaptureProfile = namedtuple("CaptureProfile", ["backend", "fourcc", "width", "height", "fps", "buffer_size"])
+
+# 一次实测结果
+Measurement = namedtuple("Measurement", ["profile", "fps", "latency_ms", "width", "height"])
+
+
+def default_profiles(width=None, height=None, fps=None, platform=None):
+    """按平台返回候选组合（按优先级排序）。"""
+    width = width or config.CAMERA_WIDTH
+    height = height or config.CAMERA_HEIGHT
+    fps = fps or getattr(config, "CAMERA_FPS", 30)
+    platform = platform or sys.platform
+
+    if platform.startswith("win"):
+        backends = ["CAP_DSHOW", "CAP_MSMF"]
+    elif platform.startswith("linux"):
+        backends = ["CAP_V4L2"]
+    elif platform == "darwin":
+        backends = ["CAP_AVFOUNDATION"]
+    else:
+        backends = ["CAP_ANY"]
+
+    profiles = []
+    for backend in backends:
+        profiles.append(CaptureProfile(backend, "MJPG", width, height, fps, 1))
+        profiles.append(CaptureProfile(backend, "YUYV", width, height, fps, 1))
+        # 高分辨率达不到帧率时退到 640x480
+        if (width, height) != (640, 480):
+            profiles.append(CaptureProfile(backend, "MJPG", 640, 480, fps, 1))
+    profiles.append(CaptureProfile("CAP_ANY", None, width, height, None, None))
+    return profiles
+
+
+class CaptureNegotiator:
+    def __init__(self, profiles=None, capture_factory=None, cache_path=None,
+                 sample_frames=20, warmup_frames=3, clock=time.perf_counter):
+        self.profiles = list(profiles) if profiles is not None else default_profiles()
+        self.capture_factory = capture_factory or cv2.VideoCapture
+        self.cache_path = cache_path if cache_path is not None else getattr(
+            config, "CAMERA_PROFILE_CACHE", "camera_profiles.json")
+        self.sample_frames = sample_frames
+        self.warmup_frames = warmup_frames
+        self.clock = clock
+        self.target_fps = getattr(config, "CAMERA_FPS", 30)
+        self.width = config.CAMERA_WIDTH
+        self.height = config.CAMERA_HEIGHT
+
+    # ---------- 打开与设置 ----------
+
+    def open(self, device, profile):
+        """按组合打开设备，失败返回 None。"""
+        backend = getattr(cv2, profile.backend, cv2.CAP_ANY)
+        try:
+            cap = self.capture_factory(device, backend)
+        except Exception:
+            return None
+        if cap is None or not cap.isOpened():
+            if cap is not None:
+                cap.release()
+            return None
+        # FOURCC 需在分辨率之前设置，部分驱动才会按新格式重新协商
+        if profile.fourcc:
+            cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*profile.fourcc))
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, profile.width)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, profile.height)
+        if profile.fps:
+            cap.set(cv2.CAP_PROP_FPS, profile.fps)
+        if profile.buffer_size:
+            cap.set(cv2.CAP_PROP_BUFFERSIZE, profile.buffer_size)
+        return cap
+
+    def measure(self, cap, profile):
+        """实测交付帧率与估计延迟；读不到帧返回 None。"""
+        frame = None
+        for _ in range(self.warmup_frames):
+            ok, frame = cap.read()
+            if not ok:
+                return None
+
+        read_time = 0.0
+        t_start = self.clock()
+        for _ in range(self.sample_frames):
+            t0 = self.clock()
+            ok, frame = cap.read()
+            read_time += self.clock() - t0
+            if not ok:
+                return None
+        elapsed = self.clock() - t_start
+        fps = self.sample_frames / elapsed if elapsed > 0 else float(self.target_fps)
+
+        # 驱动不支持设置缓冲区时 get 返回 0，按 1 处理
+        buffer_size = max(1, int(cap.get(cv2.CAP_PROP_BUFFERSIZE) or 1))
+        latency_ms = (read_time / self.sample_frames + (buffer_size - 1) / max(fps, 1.0)) * 1000
+        h, w = frame.shape[:2] if frame is not None else (0, 0)
+        return Measurement(profile, fps, latency_ms, w, h)
+
+    def score(self, m):
+        """排序键：先看帧率是否达标（5 FPS 一档），再看分辨率是否达标，最后延迟越低越好。"""
+        fps = min(m.fps, self.target_fps)
+        full_res = m.width >= m.profile.width and m.height >= m.profile.height
+        return (round(fps / 5), full_res, m.width * m.height, -m.latency_ms)
+
+    # ---------- 协商 ----------
+
+    def negotiate(self, device):
+        """逐一实测所有组合后打开最优者，返回 (cap, Measurement)；全部失败返回 (None, None)。"""
+        results = []
+        for profile in self.profiles:
+            cap = self.open(device, profile)
+            if cap is None:
+                continue
+            try:
+                m = self.measure(cap, profile)
+            finally:
+                # 立即释放，下一个组合才能打开同一设备
+                cap.release()
+            if m is None:
+                continue
+            print(f"  {profile.backend} {profile.fourcc or '-'} {m.width}x{m.height}: "
+                  f"{m.fps:.1f} FPS, 约 {m.latency_ms:.1f} ms")
+            results.append(m)
+
+        # 按得分从高到低重新打开，重开失败（设备被占用、驱动状态变化）时退到下一名
+        for m in sorted(results, key=self.score, reverse=True):
+            cap = self.open(device, m.profile)
+            if cap is None:
+                continue
+            ok, _ = cap.read()
+            if ok:
+                return cap, m
+            cap.release()
+        return None, None
+
+    def open_best(self, devices=(0,)):
+        """
+        依次尝试各设备：有缓存则直接按缓存组合打开，否则实测协商并写入缓存。
+
+        返回 (cap, device, profile)；全部失败返回 (None, None, None)。
+        """
+        cache = self.load_cache()
+        for device in devices:
+            key = self.cache_key(device)
+            cached = cache.get(key)
+            if cached:
+                profile = CaptureProfile(**cached["profile"])
+                cap = self.open(device, profile)
+                if cap is not None:
+                    ok, _ = cap.read()
+                    if ok:
+                        print(f"摄像头 {device} 使用缓存的采集格式：{profile.backend} {profile.fourcc or '-'} "
+                              f"{profile.width}x{profile.height}")
+                        return cap, device, profile
+                    cap.release()
+                print(f"摄像头 {device} 的缓存采集格式不可用，重新协商...")
+
+            print(f"正在协商摄像头 {device} 的采集格式...")
+            cap, m = self.negotiate(device)
+            if cap is None:
+                print(f"警告：摄像头 {device} 无法打开。")
+                continue
+            cache[key] = {"profile": m.profile._asdict(), "fps": round(m.fps, 1),
+                          "latency_ms": round(m.latency_ms, 1)}
+            self.save_cache(cache)
+            print(f"摄像头 {device} 选用：{m.profile.backend} {m.profile.fourcc or '-'} "
+                  f"{m.width}x{m.height} @ {m.fps:.1f} FPS")
+            return cap, device, m.profile
+        return None, None, None
+
+    # ---------- 缓存 ----------
+
+    def cache_key(self, device):
+        """同一设备在不同的请求分辨率 / 帧率下分别缓存。"""
+        return f"{sys.platform}:{device}:{self.width}x{self.height}@{self.target_fps}"
+
+    def load_cache(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_cache(self, cache):
+        if not self.cache_path:
+            return
+        try:
+            with open(self.cache_path, "w", encoding="utf-8") as f:
+                json.dump(cache, f, indent=2, ensure_ascii=False)
+        except OSError as e:
+            print(f"警告：无法写入采集格式缓存：{e}")
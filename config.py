@@ -1,5 +1,3 @@
-import cv2
-
 # ======================
 # 显示设置 / Display Settings
 # ======================
@@ -15,8 +13,86 @@ GAME_OFFSET_Y = (CAMERA_HEIGHT - GAME_HEIGHT) // 2
 DETECTION_WIDTH = 320
 DETECTION_HEIGHT = 180
 DETECTION_PAD = 24
+
+# 自适应光照增强：按检测帧平均亮度在 不处理 / gamma 查找表 / CLAHE 之间切换
+LIGHTING_ENHANCE = True
+LIGHTING_APPLY_TO_INPUT = True  # 同时作用于主推理输入，而不仅是 ROI 回退
+LIGHTING_DARK_LEVEL = 60        # 平均亮度低于此值使用 CLAHE
+LIGHTING_DIM_LEVEL = 100        # 平均亮度低于此值使用 gamma 校正
 HAND_BACKEND = "SOLUTIONS"
+MAX_NUM_HANDS = 1  # 同时跟踪的最大手数（双人/双手控制时设为 2）
 TASKS_MODEL_PATH = "models/hand_landmarker.task"
+# Tasks 运行模式："VIDEO"（同步 detect_for_video）或 "LIVE_STREAM"（异步 detect_async，
+# 推理与前后处理重叠；在途帧数超过上限时跳过新帧，运行时丢弃的帧计入 frames_dropped_runtime）
+TASKS_RUNNING_MODE = "VIDEO"
+TASKS_MAX_IN_FLIGHT = 2
+
+# 模型缓存与镜像（见 model_manager.py）
+MODEL_CACHE_DIR = "models"
+MODEL_MIRROR_DIRS = []   # 本地镜像目录，例如共享盘
+MODEL_MIRROR_URLS = []   # HTTP 镜像前缀，例如 "http://192.168.1.10:8000/models"
+TASKS_MODEL_SHA256 = ""  # 可信模型文件的 sha256；为空时只能信任首次下载并记录 .sha256（启动时警告）
+MODEL_REQUIRE_SHA256 = False  # 为 True 时拒绝没有固定校验值的模型（不下载、不加载）
+
+# 采集格式协商（见 capture_negotiator.py）：按平台尝试后端/FOURCC/分辨率/帧率/缓冲区组合，
+# 实测交付帧率与延迟后选最优，并按设备缓存；关闭时使用固定的 DirectShow 打开方式
+CAMERA_NEGOTIATE = True
+CAMERA_DEVICES = [0, 1]
+CAMERA_FPS = 30
+CAMERA_PROFILE_CACHE = "camera_profiles.json"
+
+# 摄像头故障监护（见 camera_supervisor.py）：读帧连续失败时按指数退避等待，
+# 连续失败 CAMERA_REOPEN_AFTER 次后重开摄像头，仍失败则轮换到下一个设备
+CAMERA_BACKOFF_BASE_S = 0.02
+CAMERA_BACKOFF_MAX_S = 2.0
+CAMERA_REOPEN_AFTER = 6
+
+# 回放源（视频文件或图片目录），非空时用它代替摄像头，便于无摄像头测试
+REPLAY_SOURCE = ""
+REPLAY_FPS = 30
+
+# 多进程流水线（见 shm_pipeline.py）：采集+预处理、检测、Web/游戏分别运行在独立进程，
+# 帧与关键点经共享内存传递，互不争抢 GIL
+MULTIPROCESS_PIPELINE = False
+
+# 游戏循环与状态推送频率（Hz）；前端按服务器 tick 时间戳插值渲染，20-30 Hz 即可流畅
+GAME_TICK_RATE = 30
+INTERP_DELAY_MS = None  # 前端渲染落后服务器的时间，None 表示两个 tick 周期
+
+# 蛇身 LOD（见 snake_lod.py）：推送与绘制前按该像素容差简化蛇身折线，0 表示不简化
+SNAKE_LOD_TOLERANCE = 2.0
+
+# 会话输入日志（见 session_log.py）：逐 tick 记录输入与随机种子，可离线确定性重放
+SESSION_LOG = False
+SESSION_LOG_DIR = "sessions"
+
+# 运行时性能预设（见 runtime_config.py）：low-power / balanced / low-latency / high-accuracy，
+# balanced 即本文件中的取值；运行中可通过管理接口 admin_preset 切换，无需重启。
+# 本机覆盖（预设名、download_model.py 选择的推理后端等）保存在 LOCAL_SETTINGS_PATH
+PERFORMANCE_PRESET = "balanced"
+JPEG_QUALITY = 85
+LOCAL_SETTINGS_PATH = "local_settings.json"
+
+# 启动自动标定（见 auto_tuner.py）：本机首次启动时实测各后端与检测分辨率的耗时，
+# 选出满足目标检测帧率的组合写入本机设置；也可手动运行 python auto_tuner.py calibrate
+AUTO_TUNE = False
+CALIBRATION_SOURCE = ""          # 样本视频/图片目录，为空时使用回放源或摄像头
+CALIBRATION_TARGET_FPS = None    # 目标检测帧率，None 表示与采集帧率相同
+
+# 空闲调速（见 idle_governor.py）：游戏未进行且 IDLE_GRACE_S 秒内无人操作时，
+# 按下表降低检测、视频编码与游戏 tick 的频率（Hz）；看到手或手势立即恢复全速
+IDLE_GOVERNOR = True
+IDLE_GRACE_S = 3.0
+IDLE_RATES = {
+    "idle": {"detection": 8, "stream": 10, "tick": 5},        # 有客户端连接
+    "unattended": {"detection": 4, "stream": 2, "tick": 2},   # 没有客户端连接
+}
+
+# 端到端延迟测量模式：前端回传渲染时间戳，服务器统计采集→渲染延迟
+LATENCY_MODE = False
+
+# 管理接口口令（/admin/*、admin_profiler、admin_preset）；为空时只允许本机（回环地址）访问
+ADMIN_TOKEN = ""
 
 # ======================
 # 颜色定义 (BGR格式) / Colors (BGR)
@@ -72,5 +148,16 @@ GESTURE_RIGHT = "RIGHT"
 GESTURE_PAUSE = "PAUSE"     # 握拳
 GESTURE_RESTART = "RESTART" # OK
 
+# 手势去抖：进入阈值（窗口内出现帧数）与退出阈值（连续缺席帧数）
+# 方向手势要快；暂停、重开要稳，避免误触发
+GESTURE_ENTER_FRAMES = {
+    GESTURE_UP: 2, GESTURE_DOWN: 2, GESTURE_LEFT: 2, GESTURE_RIGHT: 2,
+    GESTURE_PAUSE: 6, GESTURE_RESTART: 5,
+}
+GESTURE_EXIT_FRAMES = {
+    GESTURE_UP: 2, GESTURE_DOWN: 2, GESTURE_LEFT: 2, GESTURE_RIGHT: 2,
+    GESTURE_PAUSE: 3, GESTURE_RESTART: 3,
+}
+
 # 手势置信度阈值
 GESTURE_CONFIDENCE_THRESHOLD = 0
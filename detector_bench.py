@@ -0,0 +1,244 @@
+"""
+手势检测流水线基准 / Hand-detection pipeline benchmark
+
+在录制的视频片段或图片目录上，不启动线程、不打开摄像头，逐帧同步执行
+update_frame -> _detection_step（即检测线程的一次迭代）-> get_results / get_finger_position，
+对每个后端（TASKS / SOLUTIONS）分别在 ROI 回退开 / 关两种配置下运行，报告：
+
+  - 各阶段耗时（preprocess / enhance / inference / roi_fallback / filter / gesture ...，均值与 p99）；
+  - 每帧总耗时与可达到的帧率；
+  - ROI 回退触发率与命中率、检出手的帧比例；
+  - 指尖抖动：连续可见帧上滤波后指尖位置二阶差分的均方根（采集像素），越小越稳。
+
+帧时间戳从预热之后开始按 --fps 合成，与实际耗时无关，因此同一片段上的跟踪、滤波与手势结果在不同提交之间可比。
+结果可保存为 JSON，并与基准 JSON 比较，超出容差时以非零状态退出：
+
+    python detector_bench.py clips/wave.mp4 clips/frames/ --out bench.json
+    python detector_bench.py clips/wave.mp4 --baseline bench.json --tolerance 0.15
+    python detector_bench.py clips/wave.mp4 --backend SOLUTIONS --min-fps 60
+"""
+import argparse
+import json
+import math
+import platform
+import subprocess
+import sys
+import time
+
+import config
+from latency import monotonic_ms
+from metrics import metrics
+
+BACKENDS = ("TASKS", "SOLUTIONS")
+STAGES = ("preprocess", "enhance", "inference", "roi_fallback", "filter", "gesture", "gesture_vote")
+
+
+def iter_clip(source, limit=None):
+    """逐帧读取片段（视频文件或图片目录），不按帧率节拍等待。"""
+    from camera_manager import ReplayCamera
+    clip = ReplayCamera(source, fps=1e6, loop=False)
+    if not clip.start():
+        return
+    try:
+        count = 0
+        while limit is None or count < limit:
+            captured = clip.read_frame_stamped()
+            if captured.image is None:
+                break
+            count += 1
+            yield captured.image
+    finally:
+        clip.release()
+
+
+def finger_jitter(tracks):
+    """各段连续可见的指尖轨迹上，二阶差分（加速度）的均方根（像素）。"""
+    total = 0.0
+    n = 0
+    for track in tracks:
+        for i in range(2, len(track)):
+            ax = track[i][0] - 2 * track[i - 1][0] + track[i - 2][0]
+            ay = track[i][1] - 2 * track[i - 1][1] + track[i - 2][1]
+            total += ax * ax + ay * ay
+            n += 1
+    return math.sqrt(total / n) if n else None
+
+
+def run_config(backend, roi, clips, fps=30.0, limit=None):
+    """在全部片段上运行一种配置，返回结果字典；后端不可用时返回 None。"""
+    from hand_detector import HandDetector
+    detector = HandDetector(backend=backend, running_mode="VIDEO")
+    if (backend == "TASKS") != detector.is_tasks:
+        return None
+    detector.roi_enable = roi
+    detector.warmup()
+    metrics.reset()
+
+    frames = 0
+    visible = 0
+    busy = 0.0
+    tracks = []
+    track = []
+    # warmup() 以 monotonic_ms() 为时间戳，VIDEO 模式要求时间戳严格递增：
+    # 合成时间戳必须从它之后开始，否则每帧都会被顺延成只相隔 1ms
+    ts = float(monotonic_ms())
+    for source in clips:
+        for image in iter_clip(source, limit):
+            frames += 1
+            ts += 1000.0 / fps
+            t0 = time.perf_counter()
+            detector.update_frame(image, frames, ts)
+            detector._detection_step()
+            detector.get_results()
+            detector.get_finger_position()
+            busy += time.perf_counter() - t0
+
+            hands = detector.get_hands()
+            if hands and hands[0]["visible"]:
+                visible += 1
+                x, y = hands[0]["finger"]
+                track.append((x * config.CAMERA_WIDTH, y * config.CAMERA_HEIGHT))
+            elif track:
+                tracks.append(track)
+                track = []
+        # 片段之间不连续，轨迹在此断开
+        if track:
+            tracks.append(track)
+            track = []
+
+    if not frames:
+        return None
+    snap = metrics.snapshot()
+    counters = snap["counters"]
+    stages = {}
+    for name in STAGES:
+        stage = snap["stages"].get(name)
+        if stage and stage["count"]:
+            stages[name] = {"mean_ms": round(stage["mean_ms"], 3), "p99_ms": round(stage["p99_ms"], 3),
+                            "count": stage["count"]}
+    attempts = counters.get("roi_fallback_attempts", 0)
+    jitter = finger_jitter(tracks)
+    return {
+        "backend": backend,
+        "roi": roi,
+        "frames": frames,
+        "frame_ms": round(busy / frames * 1000, 3),
+        "fps": round(frames / busy, 1) if busy > 0 else None,
+        "hit_rate": round(visible / frames, 4),
+        "roi_fallback_rate": round(attempts / frames, 4),
+        "roi_fallback_hit_rate": round(counters.get("roi_fallback_hits", 0) / attempts, 4) if attempts else None,
+        "jitter_px": round(jitter, 3) if jitter is not None else None,
+        "stages": stages,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(clips, backends=BACKENDS, fps=30.0, limit=None):
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": sys.version.split()[0],
+            "machine": platform.platform(),
+            "clips": list(clips),
+            "fps": fps,
+            "limit": limit,
+        },
+        "runs": {},
+    }
+    for backend in backends:
+        for roi in (True, False):
+            key = f"{backend}/roi-{'on' if roi else 'off'}"
+            print(f"运行 {key} ...")
+            result = run_config(backend, roi, clips, fps, limit)
+            if result is None:
+                print(f"  {backend} 不可用或片段为空，跳过")
+                break
+            report["runs"][key] = result
+    return report
+
+
+def print_report(report):
+    print(f"\n{'配置':<22}{'帧数':>6}{'ms/帧':>9}{'FPS':>8}{'命中率':>8}{'ROI率':>8}{'抖动px':>8}")
+    for key, r in report["runs"].items():
+        jitter = f"{r['jitter_px']:.2f}" if r["jitter_px"] is not None else "-"
+        print(f"{key:<22}{r['frames']:>6}{r['frame_ms']:>9.2f}{r['fps'] or 0:>8.1f}"
+              f"{r['hit_rate']:>8.0%}{r['roi_fallback_rate']:>8.0%}{jitter:>8}")
+        for name, stage in r["stages"].items():
+            print(f"    {name:<16} 均值 {stage['mean_ms']:7.2f} ms   p99 {stage['p99_ms']:7.2f} ms")
+
+
+def compare(report, baseline, tolerance=0.1, min_abs_ms=0.2):
+    """与基准结果比较，返回回归描述列表（为空表示通过）。"""
+    regressions = []
+    for key, r in report["runs"].items():
+        base = baseline.get("runs", {}).get(key)
+        if not base:
+            continue
+        if base.get("fps") and r.get("fps") and r["fps"] < base["fps"] * (1 - tolerance):
+            regressions.append(f"{key}: 帧率 {base['fps']} -> {r['fps']}")
+        for name, stage in r["stages"].items():
+            old = base.get("stages", {}).get(name)
+            if old and stage["mean_ms"] > old["mean_ms"] * (1 + tolerance) \
+                    and stage["mean_ms"] - old["mean_ms"] > min_abs_ms:
+                regressions.append(f"{key}: {name} 均值 {old['mean_ms']} -> {stage['mean_ms']} ms")
+        if base.get("jitter_px") and r.get("jitter_px") and r["jitter_px"] > base["jitter_px"] * (1 + tolerance):
+            regressions.append(f"{key}: 指尖抖动 {base['jitter_px']} -> {r['jitter_px']} px")
+        if r["hit_rate"] < base.get("hit_rate", 0) - tolerance:
+            regressions.append(f"{key}: 命中率 {base['hit_rate']} -> {r['hit_rate']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="手势检测流水线基准")
+    parser.add_argument("clips", nargs="*", help="视频文件或图片目录（默认使用 config.REPLAY_SOURCE）")
+    parser.add_argument("--backend", choices=BACKENDS, action="append", help="只运行指定后端（可重复）")
+    parser.add_argument("--fps", type=float, default=30.0, help="合成时间戳使用的帧率")
+    parser.add_argument("--limit", type=int, default=None, help="每个片段最多处理的帧数")
+    parser.add_argument("--out", help="把结果写入 JSON 文件")
+    parser.add_argument("--baseline", help="与之比较的基准 JSON")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="允许的相对退化（默认 10%%）")
+    parser.add_argument("--min-fps", type=float, default=None, help="任一配置低于该帧率即失败")
+    args = parser.parse_args()
+
+    clips = args.clips or [c for c in [getattr(config, "REPLAY_SOURCE", "")] if c]
+    if not clips:
+        parser.error("请指定片段，或在 config.py 中设置 REPLAY_SOURCE")
+
+    report = run_suite(clips, args.backend or BACKENDS, args.fps, args.limit)
+    if not report["runs"]:
+        print("没有可运行的配置")
+        raise SystemExit(1)
+    print_report(report)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False, sort_keys=True)
+        print(f"\n结果已写入 {args.out}")
+
+    failures = []
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"\n与基准比较（{baseline.get('meta', {}).get('revision')}，容差 {args.tolerance:.0%}）")
+        failures += compare(report, baseline, args.tolerance)
+    if args.min_fps:
+        failures += [f"{key}: 帧率 {r['fps']} 低于 {args.min_fps}"
+                     for key, r in report["runs"].items() if (r["fps"] or 0) < args.min_fps]
+    if failures:
+        print("发现退化：")
+        for line in failures:
+            print(f"  {line}")
+        raise SystemExit(1)
+    if args.baseline or args.min_fps:
+        print("未发现退化")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+手势去抖 / Gesture debouncer
+
+增量式投票状态机，取代每帧重建 Counter 的多数表决：
+  - 每条轨迹维护最近 window 帧的环形窗口与各手势计数，每帧 O(1) 更新；
+  - 每种手势有独立的进入/退出阈值：方向手势阈值短以降低控制延迟，
+    暂停、重开阈值长以避免误触发；
+  - 确认的手势切换以显式的 start / end 事件输出。
+"""
+import numpy as np
+
+import config
+
+# 手势 <-> 整数编码，便于用数组保存状态
+GESTURES = (
+    config.GESTURE_NONE,
+    config.GESTURE_UP,
+    config.GESTURE_DOWN,
+    config.GESTURE_LEFT,
+    config.GESTURE_RIGHT,
+    config.GESTURE_PAUSE,
+    config.GESTURE_RESTART,
+)
+GESTURE_CODES = {g: i for i, g in enumerate(GESTURES)}
+NONE_CODE = GESTURE_CODES[config.GESTURE_NONE]
+
+
+class GestureDebouncer:
+    def __init__(self, slots, enter_frames=None, exit_frames=None, window=None):
+        enter_frames = enter_frames or getattr(config, "GESTURE_ENTER_FRAMES", {})
+        exit_frames = exit_frames or getattr(config, "GESTURE_EXIT_FRAMES", {})
+        # 进入阈值：窗口内出现次数达到该值即确认；退出阈值：当前手势连续缺席该帧数即结束
+        self.enter = np.array([enter_frames.get(g, 3) for g in GESTURES], dtype=np.int64)
+        self.exit = np.array([exit_frames.get(g, 2) for g in GESTURES], dtype=np.int64)
+        self.window = int(window or max(int(self.enter.max()), int(self.exit.max())) + 2)
+
+        self.ring = np.zeros((slots, self.window), dtype=np.int8)
+        self.pos = np.zeros(slots, dtype=np.int64)
+        self.filled = np.zeros(slots, dtype=np.int64)
+        self.counts = np.zeros((slots, len(GESTURES)), dtype=np.int64)
+        self.current = np.zeros(slots, dtype=np.int8)
+        self.absent = np.zeros(slots, dtype=np.int64)  # 当前手势连续缺席的帧数
+
+    def reset(self, slot):
+        self.ring[slot] = 0
+        self.pos[slot] = 0
+        self.filled[slot] = 0
+        self.counts[slot] = 0
+        self.current[slot] = NONE_CODE
+        self.absent[slot] = 0
+
+    def update(self, slot, code):
+        """
+        输入某条轨迹本帧的原始手势编码，返回事件列表 [(kind, gesture), ...]。
+
+        kind 为 "start" 或 "end"。
+        """
+        counts = self.counts[slot]
+        # 环形窗口：移出最旧一帧，加入新一帧
+        pos = self.pos[slot]
+        if self.filled[slot] == self.window:
+            counts[self.ring[slot, pos]] -= 1
+        else:
+            self.filled[slot] += 1
+        self.ring[slot, pos] = code
+        counts[code] += 1
+        self.pos[slot] = (pos + 1) % self.window
+
+        current = int(self.current[slot])
+        self.absent[slot] = 0 if code == current else self.absent[slot] + 1
+
+        events = []
+        # 进入：窗口内某个非当前手势达到其进入阈值
+        if code != current and code != NONE_CODE and counts[code] >= self.enter[code]:
+            if current != NONE_CODE:
+                events.append(("end", GESTURES[current]))
+            events.append(("start", GESTURES[code]))
+            self._switch(slot, code)
+        # 退出：当前手势连续缺席达到其退出阈值
+        elif current != NONE_CODE and self.absent[slot] >= self.exit[current]:
+            events.append(("end", GESTURES[current]))
+            self._switch(slot, NONE_CODE)
+        return events
+
+    def _switch(self, slot, code):
+        self.current[slot] = code
+        self.absent[slot] = 0
+        # 清空窗口，避免旧票在新状态下立刻再次触发
+        self.ring[slot] = 0
+        self.counts[slot] = 0
+        self.filled[slot] = 0
+        self.pos[slot] = 0
+
+    def end(self, slot):
+        """轨迹消失时结束其当前手势。"""
+        current = int(self.current[slot])
+        self.reset(slot)
+        return [("end", GESTURES[current])] if current != NONE_CODE else []
@@ -5,7 +5,16 @@ import copy
 import time
 import config
 import os
-from collections import deque, Counter
+from collections import deque
+from metrics import metrics
+from latency import monotonic_ms
+from tracing import tracer
+from camera_manager import preprocess_for_detection, detection_geometry
+from runtime_config import settings
+from idle_governor import governor
+from lighting import LightingEnhancer, MODE_CLAHE
+from hand_tracker import HandTracker, GESTURE_CODES
+from one_euro import OneEuroFilter  # noqa: F401  保持 hand_detector.OneEuroFilter 可用
 
 # Use wrapper for MediaPipe 0.10+ compatibility
 try:
@@ -18,99 +27,62 @@ except (AttributeError, ImportError):
     mp_hands = mp.hands
     mp_drawing = mp.drawing_utils
 
-class OneEuroFilter:
-    def __init__(self, t0, x0, min_cutoff=1.0, beta=0.0, d_cutoff=1.0):
-        """初始化 One Euro Filter。"""
-        self.t_prev = t0
-        self.x_prev = x0
-        self.dx_prev = 0.0
-        self.min_cutoff = min_cutoff
-        self.beta = beta
-        self.d_cutoff = d_cutoff
-
-    def __call__(self, t, x):
-        """计算过滤后的值。"""
-        # 计算采样周期 Te
-        te = t - self.t_prev
-        
-        # 计算 alpha (指数平滑系数)
-        # alpha(cutoff) = 1 / (1 + tau/Te), where tau = 1 / (2 * pi * cutoff)
-        def smoothing_factor(te, cutoff):
-            r = 2 * np.pi * cutoff * te
-            return r / (r + 1)
-
-        # 计算速度 dx (使用低通滤波)
-        dx = (x - self.x_prev) / te if te > 0 else 0.0
-        alpha_d = smoothing_factor(te, self.d_cutoff)
-        dx_hat = alpha_d * dx + (1 - alpha_d) * self.dx_prev
-
-        # 计算自适应截止频率 cutoff
-        cutoff = self.min_cutoff + self.beta * abs(dx_hat)
-        
-        # 计算主滤波器的 alpha
-        alpha = smoothing_factor(te, cutoff)
-        
-        # 计算最终滤波值
-        x_hat = alpha * x + (1 - alpha) * self.x_prev
-
-        # 更新状态
-        self.t_prev = t
-        self.x_prev = x_hat
-        self.dx_prev = dx_hat
-
-        return x_hat
+# 兼容层的 Hands.process 接受帧时间戳；官方 Solutions 接口不接受
+HANDS_ACCEPT_TIMESTAMP = mp.__name__ == "mp_hands_wrapper"
 
 class HandDetector:
-    def __init__(self):
-        self.backend = getattr(config, "HAND_BACKEND", "SOLUTIONS")
+    def __init__(self, backend=None, geometry=None, running_mode=None):
+        """backend / geometry / running_mode 默认取运行时设置与 config.py；auto_tuner.py 标定时显式指定。"""
+        self.backend = backend or settings.hand_backend
         self.is_tasks = False
+        self.is_live = False  # Tasks LIVE_STREAM 异步模式
         self.hands = None
         self.mp_draw = None
-        self.prev_bbox = None  # (x, y, w, h) in detection (no-pad) coordinates
         self.latest_finger_norm = None  # normalized (0-1) in detection (no-pad)
+        self.latest_hands = []  # 每只手的跟踪摘要，见 HandTracker.snapshot()
+        self.gesture_events = deque(maxlen=64)  # 手势 start/end 事件，见 get_gesture_events()
         
-        # One Euro Filter 初始化
+        self.max_hands = max(1, int(getattr(config, "MAX_NUM_HANDS", 1)))
+        
+        # One Euro Filter 参数（每条轨迹一套滤波状态，保存在 HandTracker 中）
         # 参数调整建议：
         # min_cutoff: 越小，低速时越平滑（抖动越少），但延迟越高。推荐 0.5 - 1.0
         # beta: 越大，高速时响应越快（延迟越低），但可能引入高频抖动。推荐 0.001 - 0.01
-        self.filter_x = None
-        self.filter_y = None
-        self.min_cutoff = 0.5 
-        self.beta = 0.005
+        # 初始值来自运行时设置（性能预设），运行中可由 apply_settings 修改
+        self.min_cutoff = settings.min_cutoff
+        self.beta = settings.beta
         self.d_cutoff = 1.0 
+        # 检测帧几何 (宽, 高, 填充)，只在检测线程的帧边界上切换
+        self.geometry = geometry or detection_geometry()
         
         if self.backend == "TASKS":
             try:
                 from mediapipe.tasks.python.vision import HandLandmarker, HandLandmarkerOptions, RunningMode
                 from mediapipe.tasks.python.core import BaseOptions
                 import mediapipe as mp_core
-                # Resolve model path from multiple locations
-                cfg_path = getattr(config, "TASKS_MODEL_PATH", "")
-                candidates = []
-                if cfg_path:
-                    candidates.append(cfg_path)
-                candidates += ["models/hand_landmarker.task", "hand_landmarker.task"]
-                model_path = None
-                for p in candidates:
-                    p_abs = p if os.path.isabs(p) else os.path.join(os.getcwd(), p)
-                    if os.path.exists(p_abs):
-                        model_path = p_abs
-                        break
-                if model_path:
-                    base_options = BaseOptions(model_asset_path=model_path)
-                    options = HandLandmarkerOptions(base_options=base_options, num_hands=1, running_mode=RunningMode.VIDEO)
-                    self.tasks_landmarker = HandLandmarker.create_from_options(options)
-                    self.is_tasks = True
-                    self.mp_core = mp_core
+                from model_manager import manager as model_manager
+                # 模型由 ModelManager 解析、校验并以共享缓冲区加载
+                model_buffer = model_manager.load_buffer("hand_landmarker")
+                base_options = BaseOptions(model_asset_buffer=model_buffer)
+                if (running_mode or getattr(config, "TASKS_RUNNING_MODE", "VIDEO")) == "LIVE_STREAM":
+                    # 异步推理：detect_async 立即返回，结果在回调中处理，推理与 Python 前后处理重叠
+                    options = HandLandmarkerOptions(base_options=base_options, num_hands=self.max_hands,
+                                                    running_mode=RunningMode.LIVE_STREAM,
+                                                    result_callback=self._on_live_result)
+                    self.is_live = True
                 else:
-                    self.is_tasks = False
+                    options = HandLandmarkerOptions(base_options=base_options, num_hands=self.max_hands, running_mode=RunningMode.VIDEO)
+                self.tasks_landmarker = HandLandmarker.create_from_options(options)
+                self.is_tasks = True
+                self.mp_core = mp_core
             except Exception:
                 self.is_tasks = False
+                self.is_live = False
         if not self.is_tasks:
             self.mp_hands = mp_hands
             self.hands = mp_hands.Hands(
                 static_image_mode=False,
-                max_num_hands=1,
+                max_num_hands=self.max_hands,
                 min_detection_confidence=config.GESTURE_CONFIDENCE_THRESHOLD,
                 min_tracking_confidence=0.5
             )
@@ -118,69 +90,179 @@ class HandDetector:
         
         # Threading support
         self.frame_to_process = None
+        self.frame_meta_to_process = (None, None)  # (帧序号, 采集时间戳 ms)
+        self.frame_geometry_to_process = None  # 待处理帧预处理时使用的几何
+        self.pending_settings = None  # 运行时设置变化，等待检测线程在帧边界生效
+        self.last_admitted_ts = None  # 空闲降频：上一次送入检测的帧的采集时间戳
+        self.latest_frame_meta = (None, None)
+        self.last_video_ts = -1  # 上一次传给 VIDEO 模式推理的时间戳（ms，严格递增）
+        # LIVE_STREAM 模式：已提交、尚未回调的帧 {时间戳: (检测帧, (帧序号, 采集时间戳), 提交时刻)}
+        self.max_in_flight = max(1, int(getattr(config, "TASKS_MAX_IN_FLIGHT", 2)))
+        self.in_flight = {}
+        self.completing = 0  # 已从 in_flight 取出、仍在 _complete_frame 中处理的回调数
+        self.draining = False  # 检测几何待切换：停止提交新帧，等在途帧全部处理完
+        self.live_lock = threading.Lock()
         self.latest_result = None
+        self.publish_buffers = None  # 包装器结果的发布双缓冲（见 _publish_copy）
+        self.publish_idx = 0
+        self.empty_result = None
         self.latest_gesture = config.GESTURE_NONE
         self.is_running = False
         self.thread = None
         self.lock = threading.Lock()
         
-        # Smoothing
-        self.gesture_history = deque(maxlen=5) # Keep last 5 frames for smoothing
+        # 多手跟踪：稳定 ID、逐手滤波、手势历史与 ROI 状态
+        self.tracker = self._create_tracker()
+        self.roi_enable = settings.roi_enable
+        self.roi_expand = settings.roi_expand
+        self.roi_min = 100
+
+        # 自适应光照增强
+        self.lighting = LightingEnhancer()
+        self.lighting_enabled = settings.lighting_enhance
+        self.lighting_on_input = getattr(config, "LIGHTING_APPLY_TO_INPUT", True)
+
+    def _create_tracker(self):
+        width, height, _ = self.geometry
+        return HandTracker(
+            self.max_hands, width, height, max_age=1.0,
+            min_cutoff=self.min_cutoff, beta=self.beta, d_cutoff=self.d_cutoff
+        )
+
+    def warmup(self):
+        """用一帧空白图像执行一次推理，提前完成计算图初始化。"""
+        width, height, pad = self.geometry
+        dummy = np.zeros((height + 2 * pad, width + 2 * pad, 3), dtype=np.uint8)
+        if self.is_live:
+            # 预热帧不登记在 in_flight 中，其回调结果会被忽略
+            mp_image = self.mp_core.Image(image_format=self.mp_core.ImageFormat.SRGB, data=dummy)
+            self.tasks_landmarker.detect_async(mp_image, self._video_timestamp(monotonic_ms()))
+        elif self.is_tasks:
+            mp_image = self.mp_core.Image(image_format=self.mp_core.ImageFormat.SRGB, data=dummy)
+            self.tasks_landmarker.detect_for_video(mp_image, self._video_timestamp(monotonic_ms()))
+        elif HANDS_ACCEPT_TIMESTAMP:
+            self.hands.process(dummy, self._video_timestamp(monotonic_ms()))
+        else:
+            self.hands.process(dummy)
 
     def start(self):
         """启动检测线程。"""
+        settings.subscribe(self.apply_settings)
         self.is_running = True
-        self.thread = threading.Thread(target=self._detection_loop, daemon=True)
+        self.thread = threading.Thread(target=self._detection_loop, name="HandDetection", daemon=True)
         self.thread.start()
 
     def stop(self):
         """停止检测线程。"""
+        settings.unsubscribe(self.apply_settings)
         self.is_running = False
         if self.thread:
             self.thread.join()
 
-    def update_frame(self, frame):
-        """更新检测线程处理的帧。"""
+    def update_frame(self, frame, frame_seq=None, capture_ts=None):
+        """
+        更新检测线程处理的帧。
+
+        frame 可以是 camera_manager.Frame（自带帧序号与采集时间戳），也可以是
+        BGR 图像加上可选的 frame_seq / capture_ts；缺少采集时间戳时以当前单调时钟代替。
+        """
+        if hasattr(frame, "capture_ts"):
+            frame, frame_seq, capture_ts = frame.image, frame.seq, frame.capture_ts
         if frame is None:
             return
+        if capture_ts is None:
+            capture_ts = monotonic_ms()
+        
+        # 空闲时降低检测频率：未到期的帧连预处理一起跳过
+        interval = governor.interval("detection")
+        if interval and self.last_admitted_ts is not None and capture_ts - self.last_admitted_ts < interval * 1000:
+            metrics.inc("frames_idle_skipped")
+            return
+        self.last_admitted_ts = capture_ts
         
         # 按需调整大小以进行性能优化
-        small_frame = cv2.resize(frame, (config.DETECTION_WIDTH, config.DETECTION_HEIGHT))
-        pad = getattr(config, "DETECTION_PAD", 0)
-        if pad and pad > 0:
-            small_frame = cv2.copyMakeBorder(
-                small_frame, pad, pad, pad, pad, cv2.BORDER_REPLICATE
-            )
+        geometry = self.geometry
+        with metrics.timer("preprocess", frame_seq):
+            small_frame = preprocess_for_detection(frame, geometry)
         
         with self.lock:
+            # 上一帧尚未被检测线程取走即被覆盖，记为丢帧
+            if self.frame_to_process is not None:
+                metrics.inc("frames_dropped")
+                tracer.instant("frame_dropped", self.frame_meta_to_process[0])
             self.frame_to_process = small_frame
+            self.frame_meta_to_process = (frame_seq, capture_ts)
+            self.frame_geometry_to_process = geometry
+
+    def apply_settings(self, values):
+        """运行时设置变化回调（任意线程）：只登记新值，由检测线程在帧边界生效。"""
+        with self.lock:
+            self.pending_settings = values
+
+    def _apply_pending_settings(self):
+        """
+        在检测线程的帧边界应用登记的运行时设置。
+
+        检测几何变化时重建跟踪器（轨迹坐标以检测像素为单位）；LIVE_STREAM 模式下
+        先进入排空状态停止提交新帧，等在途帧全部回调并处理完后再切换，避免按新几何
+        解释旧帧的结果。回调丢失的帧由 can_submit 在 1 秒后过期，排空时间有上限。
+        """
+        with self.lock:
+            values, self.pending_settings = self.pending_settings, None
+        geometry = detection_geometry(values)
+        if geometry != self.geometry and self.is_live and not self._drained():
+            self.draining = True
+            with self.lock:
+                if self.pending_settings is None:
+                    self.pending_settings = values
+            return
+        self.draining = False
+        if geometry != self.geometry:
+            self.geometry = geometry
+            self.min_cutoff = values["min_cutoff"]
+            self.beta = values["beta"]
+            self.tracker = self._create_tracker()
+            with self.lock:
+                self.latest_hands = []
+        else:
+            self.min_cutoff = values["min_cutoff"]
+            self.beta = values["beta"]
+            self.tracker.skeleton_filter.min_cutoff = self.min_cutoff
+            self.tracker.skeleton_filter.beta = self.beta
+        self.roi_enable = values["roi_enable"]
+        self.roi_expand = values["roi_expand"]
+        self.lighting_enabled = values["lighting_enhance"]
+
+    def _drained(self):
+        """LIVE_STREAM 模式下没有在途帧，也没有回调正在处理结果。"""
+        with self.live_lock:
+            return not self.in_flight and not self.completing
+
+    def refresh(self):
+        """与 SharedDetector 接口一致；同进程内的查询直接读取最新结果，无需预先读取快照。"""
 
     def get_results(self):
         """获取最新的检测结果。"""
         with self.lock:
             return self.latest_result, self.latest_gesture
-    
-    def _update_finger_pos(self, raw_x, raw_y):
-        """应用 One Euro Filter 更新手指位置。"""
-        curr_time = time.time()
-        
-        # 初始化滤波器
-        if self.filter_x is None or self.filter_y is None:
-            self.filter_x = OneEuroFilter(curr_time, raw_x, min_cutoff=self.min_cutoff, beta=self.beta, d_cutoff=self.d_cutoff)
-            self.filter_y = OneEuroFilter(curr_time, raw_y, min_cutoff=self.min_cutoff, beta=self.beta, d_cutoff=self.d_cutoff)
-            return (raw_x, raw_y)
-        
-        # 如果时间间隔太大（例如检测丢失后恢复），重置滤波器
-        if curr_time - self.filter_x.t_prev > 1.0:
-             self.filter_x = OneEuroFilter(curr_time, raw_x, min_cutoff=self.min_cutoff, beta=self.beta, d_cutoff=self.d_cutoff)
-             self.filter_y = OneEuroFilter(curr_time, raw_y, min_cutoff=self.min_cutoff, beta=self.beta, d_cutoff=self.d_cutoff)
-             return (raw_x, raw_y)
 
-        # 过滤
-        smooth_x = self.filter_x(curr_time, raw_x)
-        smooth_y = self.filter_y(curr_time, raw_y)
-        return (smooth_x, smooth_y)
+    def get_hands(self):
+        """获取所有跟踪中的手：[{id, handedness, finger, gesture, bbox, visible}, ...]"""
+        with self.lock:
+            return self.latest_hands
+
+    def get_gesture_events(self):
+        """取出并清空累积的手势事件：[(track_id, "start"|"end", gesture, t), ...]，t 为帧采集时刻（秒）"""
+        with self.lock:
+            events = list(self.gesture_events)
+            self.gesture_events.clear()
+            return events
 
+    def get_frame_meta(self):
+        """获取最新检测结果对应帧的 (帧序号, 采集时间戳 ms)。"""
+        with self.lock:
+            return self.latest_frame_meta
+    
     def get_finger_position(self):
         """获取用于直接控制的食指指尖位置（归一化 0-1）。"""
         with self.lock:
@@ -194,269 +276,355 @@ class HandDetector:
                 # 简单起见，我们信任 detection loop 的更新。
                 hand_landmarks = self.latest_result.multi_hand_landmarks[0]
                 index_tip = hand_landmarks.landmark[8]
-                pad = getattr(config, "DETECTION_PAD", 0)
-                w_pad = config.DETECTION_WIDTH + 2 * pad
-                h_pad = config.DETECTION_HEIGHT + 2 * pad
-                x_px = index_tip.x * w_pad - pad
-                y_px = index_tip.y * h_pad - pad
-                x_norm = max(0.0, min(1.0, x_px / config.DETECTION_WIDTH))
-                y_norm = max(0.0, min(1.0, y_px / config.DETECTION_HEIGHT))
+                width, height, pad = self.geometry
+                x_px = index_tip.x * (width + 2 * pad) - pad
+                y_px = index_tip.y * (height + 2 * pad) - pad
+                x_norm = max(0.0, min(1.0, x_px / width))
+                y_norm = max(0.0, min(1.0, y_px / height))
                 return (x_norm, y_norm)
             return None
 
     def _detection_loop(self):
         while self.is_running:
-            frame = None
-            with self.lock:
-                if self.frame_to_process is not None:
-                    frame = self.frame_to_process.copy()
-                    self.frame_to_process = None # Consume the frame
-            
-            if frame is None:
-                time.sleep(0.01) # Avoid busy waiting
+            # 排空期间 can_submit 为 False，设置仍需在这里推进
+            if self.pending_settings is not None:
+                self._apply_pending_settings()
+            # LIVE_STREAM：在途帧已达上限或正在排空时先不取帧，update_frame 会用更新的帧覆盖
+            if not self.can_submit():
+                time.sleep(0.002)
                 continue
+            if not self._detection_step():
+                time.sleep(0.01) # Avoid busy waiting
+    
+    def _detection_step(self):
+        """
+        检测线程的一次迭代：应用登记的运行时设置，取走待处理帧并处理。
 
-            pad = getattr(config, "DETECTION_PAD", 0)
-            w_pad = config.DETECTION_WIDTH + 2 * pad
-            h_pad = config.DETECTION_HEIGHT + 2 * pad
-            roi_enable = True
-            roi_expand = 1.8
-            roi_min = 100
-
-            if self.is_tasks:
-                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                mp_image = self.mp_core.Image(image_format=self.mp_core.ImageFormat.SRGB, data=frame_rgb)
-                ts = int(time.time() * 1000)
-                result = self.tasks_landmarker.detect_for_video(mp_image, ts)
-                gesture = config.GESTURE_NONE
-                if result and result.hand_landmarks:
-                    for lm in result.hand_landmarks:
-                        gesture = self._recognize_gesture_tasks(lm)
-                        # update finger norm from index tip
-                        idx = lm[8]
-                        x_px = idx.x * w_pad - pad
-                        y_px = idx.y * h_pad - pad
-                        raw_norm_x = max(0.0, min(1.0, x_px / config.DETECTION_WIDTH))
-                        raw_norm_y = max(0.0, min(1.0, y_px / config.DETECTION_HEIGHT))
-                        self.latest_finger_norm = self._update_finger_pos(raw_norm_x, raw_norm_y)
-                        # update bbox
-                        xs = [(p.x * w_pad - pad) for p in lm]
-                        ys = [(p.y * h_pad - pad) for p in lm]
-                        x0 = max(0, int(min(xs)))
-                        y0 = max(0, int(min(ys)))
-                        x1 = min(config.DETECTION_WIDTH, int(max(xs)))
-                        y1 = min(config.DETECTION_HEIGHT, int(max(ys)))
-                        self.prev_bbox = (x0, y0, max(roi_min, x1 - x0), max(roi_min, y1 - y0))
-                self.gesture_history.append(gesture)
-                smoothed = Counter(self.gesture_history).most_common(1)[0][0]
-                with self.lock:
-                    self.latest_result = result
-                    self.latest_gesture = smoothed
-                # ROI fallback when no hand found
-                if (not result or not result.hand_landmarks) and roi_enable and self.prev_bbox:
-                    x, y, w, h = self.prev_bbox
-                    cx = x + w // 2
-                    cy = y + h // 2
-                    w2 = int(max(roi_min, w * roi_expand))
-                    h2 = int(max(roi_min, h * roi_expand))
-                    x0 = max(0, cx - w2 // 2)
-                    y0 = max(0, cy - h2 // 2)
-                    x1 = min(config.DETECTION_WIDTH, x0 + w2)
-                    y1 = min(config.DETECTION_HEIGHT, y0 + h2)
-                    # crop from padded frame
-                    roi = frame[y0 + pad:y1 + pad, x0 + pad:x1 + pad]
-                    roi_rgb = cv2.cvtColor(self._enhance_roi(roi), cv2.COLOR_BGR2RGB)
-                    mp_roi = self.mp_core.Image(image_format=self.mp_core.ImageFormat.SRGB, data=roi_rgb)
-                    ts = int(time.time() * 1000)
-                    r2 = self.tasks_landmarker.detect_for_video(mp_roi, ts)
-                    if r2 and r2.hand_landmarks:
-                        lm = r2.hand_landmarks[0]
-                        idx = lm[8]
-                        x_global = x0 + int(idx.x * (x1 - x0))
-                        y_global = y0 + int(idx.y * (y1 - y0))
-                        raw_norm_x = max(0.0, min(1.0, x_global / config.DETECTION_WIDTH))
-                        raw_norm_y = max(0.0, min(1.0, y_global / config.DETECTION_HEIGHT))
-                        self.latest_finger_norm = self._update_finger_pos(raw_norm_x, raw_norm_y)
-                        xs = [x0 + int(p.x * (x1 - x0)) for p in lm]
-                        ys = [y0 + int(p.y * (y1 - y0)) for p in lm]
-                        x0b = max(0, min(xs))
-                        y0b = max(0, min(ys))
-                        x1b = min(config.DETECTION_WIDTH, max(xs))
-                        y1b = min(config.DETECTION_HEIGHT, max(ys))
-                        self.prev_bbox = (x0b, y0b, max(roi_min, x1b - x0b), max(roi_min, y1b - y0b))
-            else:
-                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                results = self.hands.process(frame_rgb)
-                gesture = config.GESTURE_NONE
-                if results.multi_hand_landmarks:
-                    for hand_landmarks in results.multi_hand_landmarks:
-                        gesture = self._recognize_gesture(hand_landmarks)
-                        # update finger norm and bbox
-                        index_tip = hand_landmarks.landmark[8]
-                        x_px = index_tip.x * w_pad - pad
-                        y_px = index_tip.y * h_pad - pad
-                        raw_norm_x = max(0.0, min(1.0, x_px / config.DETECTION_WIDTH))
-                        raw_norm_y = max(0.0, min(1.0, y_px / config.DETECTION_HEIGHT))
-                        self.latest_finger_norm = self._update_finger_pos(raw_norm_x, raw_norm_y)
-                        xs = []
-                        ys = []
-                        for p in hand_landmarks.landmark:
-                            xs.append(p.x * w_pad - pad)
-                            ys.append(p.y * h_pad - pad)
-                        x0 = max(0, int(min(xs)))
-                        y0 = max(0, int(min(ys)))
-                        x1 = min(config.DETECTION_WIDTH, int(max(xs)))
-                        y1 = min(config.DETECTION_HEIGHT, int(max(ys)))
-                        self.prev_bbox = (x0, y0, max(roi_min, x1 - x0), max(roi_min, y1 - y0))
-                self.gesture_history.append(gesture)
-                smoothed_gesture = Counter(self.gesture_history).most_common(1)[0][0]
-                with self.lock:
-                    self.latest_result = results
-                    self.latest_gesture = smoothed_gesture
-                # ROI fallback
-                if (not results or not results.multi_hand_landmarks) and roi_enable and self.prev_bbox:
-                    x, y, w, h = self.prev_bbox
-                    cx = x + w // 2
-                    cy = y + h // 2
-                    w2 = int(max(roi_min, w * roi_expand))
-                    h2 = int(max(roi_min, h * roi_expand))
-                    x0 = max(0, cx - w2 // 2)
-                    y0 = max(0, cy - h2 // 2)
-                    x1 = min(config.DETECTION_WIDTH, x0 + w2)
-                    y1 = min(config.DETECTION_HEIGHT, y0 + h2)
-                    roi = frame[y0 + pad:y1 + pad, x0 + pad:x1 + pad]
-                    roi_rgb = cv2.cvtColor(self._enhance_roi(roi), cv2.COLOR_BGR2RGB)
-                    r2 = self.hands.process(roi_rgb)
-                    if r2 and r2.multi_hand_landmarks:
-                        hl = r2.multi_hand_landmarks[0]
-                        idx = hl.landmark[8]
-                        x_global = x0 + int(idx.x * (x1 - x0))
-                        y_global = y0 + int(idx.y * (y1 - y0))
-                        raw_norm_x = max(0.0, min(1.0, x_global / config.DETECTION_WIDTH))
-                        raw_norm_y = max(0.0, min(1.0, y_global / config.DETECTION_HEIGHT))
-                        self.latest_finger_norm = self._update_finger_pos(raw_norm_x, raw_norm_y)
-                        xs = [x0 + int(p.x * (x1 - x0)) for p in hl.landmark]
-                        ys = [y0 + int(p.y * (y1 - y0)) for p in hl.landmark]
-                        x0b = max(0, min(xs))
-                        y0b = max(0, min(ys))
-                        x1b = min(config.DETECTION_WIDTH, max(xs))
-                        y1b = min(config.DETECTION_HEIGHT, max(ys))
-                        self.prev_bbox = (x0b, y0b, max(roi_min, x1b - x0b), max(roi_min, y1b - y0b))
-
-    def _recognize_gesture(self, landmarks):
-        """基于关键点识别手势。"""
-        # 获取坐标
-        h, w = config.DETECTION_HEIGHT, config.DETECTION_WIDTH
-        lm_list = []
-        for id, lm in enumerate(landmarks.landmark):
-            cx, cy = int(lm.x * w), int(lm.y * h)
-            lm_list.append([cx, cy])
+        返回是否处理了一帧。detector_bench.py 在同一线程内直接调用，不启动检测线程。
+        """
+        if self.pending_settings is not None:
+            self._apply_pending_settings()
+        if self.draining:
+            return False
+        frame = None
+        with self.lock:
+            if self.frame_to_process is not None:
+                # 按切换前的几何预处理的帧直接丢弃
+                if self.frame_geometry_to_process == self.geometry:
+                    frame = self.frame_to_process.copy()
+                    frame_meta = self.frame_meta_to_process
+                self.frame_to_process = None # Consume the frame
+        
+        if frame is None:
+            return False
+        self.process_frame(frame, frame_meta)
+        return True
+
+    def can_submit(self):
+        """LIVE_STREAM 模式下在途帧数未达上限且不在排空中；同步模式总是 True。"""
+        if not self.is_live:
+            return True
+        if not self.draining and len(self.in_flight) < self.max_in_flight:
+            return True
+        # 长时间没有回调的帧视为被运行时丢弃，避免在途计数卡死
+        now = time.perf_counter()
+        with self.live_lock:
+            expired = [ts for ts, (_, _, submitted) in self.in_flight.items() if now - submitted > 1.0]
+            for ts in expired:
+                del self.in_flight[ts]
+        if expired:
+            metrics.inc("frames_dropped_runtime", len(expired))
+        return not self.draining and len(self.in_flight) < self.max_in_flight
+
+    def process_frame(self, frame, frame_meta):
+        """
+        对一帧已预处理（缩放 + 填充）的检测帧完成推理、跟踪、滤波与手势识别并发布结果。
+
+        frame_meta 为 (帧序号, 采集时间戳 ms)。检测线程与多进程模式的检测进程共用。
+        LIVE_STREAM 模式下只提交推理，结果稍后在回调中发布。
+        """
+        if self.is_live:
+            self._submit_async(frame, frame_meta)
+            return
+        seq, capture_ts = frame_meta
+        infer_frame = self._prepare_input(frame, seq)
+        with metrics.timer("inference", seq):
+            result = self._infer(infer_frame, capture_ts)
+        self._complete_frame(result, frame, frame_meta)
+
+    def _prepare_input(self, frame, seq):
+        """光照增强：更新亮度统计，按需处理主推理输入（ROI 从原始帧裁剪，避免重复增强）。"""
+        infer_frame = frame
+        if self.lighting_enabled:
+            with metrics.timer("enhance", seq):
+                self.lighting.observe(frame)
+                if self.lighting_on_input:
+                    infer_frame = self.lighting.enhance(frame)
+        return infer_frame
+
+    def _submit_async(self, frame, frame_meta):
+        """LIVE_STREAM：提交一帧后立即返回，结果由 _on_live_result 回调处理。"""
+        seq, capture_ts = frame_meta
+        infer_frame = self._prepare_input(frame, seq)
+        image_rgb = cv2.cvtColor(infer_frame, cv2.COLOR_BGR2RGB)
+        mp_image = self.mp_core.Image(image_format=self.mp_core.ImageFormat.SRGB, data=image_rgb)
+        ts = self._video_timestamp(capture_ts)
+        with self.live_lock:
+            self.in_flight[ts] = (frame, frame_meta, time.perf_counter())
+            metrics.set_gauge("inference_in_flight", len(self.in_flight))
+        self.tasks_landmarker.detect_async(mp_image, ts)
+
+    def _on_live_result(self, result, output_image, timestamp_ms):
+        """LIVE_STREAM 结果回调（MediaPipe 线程）。"""
+        with self.live_lock:
+            entry = self.in_flight.pop(timestamp_ms, None)
+            # 比本次结果更早、却没有回调的帧已被运行时丢弃
+            stale = [self.in_flight.pop(ts) for ts in sorted(self.in_flight) if ts < timestamp_ms]
+            metrics.set_gauge("inference_in_flight", len(self.in_flight))
+            if entry is not None:
+                self.completing += 1
+        if stale:
+            metrics.inc("frames_dropped_runtime", len(stale))
+            for _, (dropped_seq, _), _ in stale:
+                tracer.instant("frame_dropped_runtime", dropped_seq)
+        if entry is None:
+            return  # 预热帧
+        try:
+            frame, frame_meta, submitted = entry
+            metrics.observe("inference", time.perf_counter() - submitted)
+            self._complete_frame(result, frame, frame_meta)
+        except Exception as e:
+            print(f"处理异步推理结果失败：{e}")
+        finally:
+            with self.live_lock:
+                self.completing -= 1
+
+    def _complete_frame(self, result, frame, frame_meta):
+        """推理之后的跟踪、ROI 回退、滤波、手势识别与结果发布。"""
+        seq, capture_ts = frame_meta
+        # 以采集时刻（秒）驱动滤波、手势去抖与轨迹过期，排队延迟不影响速度估计
+        t = capture_ts / 1000.0
+
+        width, height, pad = self.geometry
+        w_pad = width + 2 * pad
+        h_pad = height + 2 * pad
+
+        # 结果统一转换为检测坐标系（去除填充）下的像素关键点 (M,21,3)
+        points, handedness = self._result_to_points(result, w_pad, h_pad, -pad, -pad)
+
+        tracker = self.tracker
+        tracker.begin_frame()
+        tracker.associate(points, handedness)
 
+        # ROI 回退：对本帧丢失、但仍在存活期内的轨迹，在其上一帧包围盒附近裁剪重检
+        # （LIVE_STREAM 模式的检测器不支持同步调用，不做 ROI 回退）
+        if self.roi_enable and not self.is_live:
+            for slot in tracker.missed_slots():
+                self._roi_fallback(frame, slot, pad, seq, capture_ts)
+
+        # 整副骨架滤波后再识别手势，得到稳定的手势判断
+        with metrics.timer("filter", seq):
+            seen = tracker.filter_frame(t)
+        with metrics.timer("gesture", seq):
+            for slot in seen:
+                gesture_name = self._recognize_gesture_points(tracker.smoothed_points(slot))
+                tracker.set_gesture(slot, GESTURE_CODES[gesture_name])
+
+        with metrics.timer("gesture_vote", seq):
+            tracker.end_frame(t)
+            hands = tracker.snapshot()
+            primary = tracker.primary_slot()
+            gesture = config.GESTURE_NONE
+            finger = None
+            if primary >= 0:
+                gesture = hands[0]["gesture"]
+                finger = hands[0]["finger"]
+
+        # 看到手或手势即恢复全速检测
+        if gesture != config.GESTURE_NONE or any(hand["visible"] for hand in hands):
+            governor.activity()
+
+        if HANDS_ACCEPT_TIMESTAMP and isinstance(result, mp.HandResults):
+            result = self._publish_copy(result)
+        with self.lock:
+            self.latest_result = result
+            self.latest_gesture = gesture
+            self.latest_hands = hands
+            self.latest_frame_meta = frame_meta
+            self.gesture_events.extend(tracker.events)
+            # 手完全丢失后保留最后位置，蛇头停在原处
+            if finger is not None:
+                self.latest_finger_norm = finger
+
+    def _publish_copy(self, result):
+        """
+        包装器的结果对象循环复用，下一帧的推理（含 ROI 重检）会覆盖它；发布给其他线程的
+        改为拷贝到检测器自有的双缓冲中（预分配，不逐帧创建对象）。没有手时发布固定的空结果。
+        读取方在下一次发布之后、再下一次发布之前必须用完上一份结果（draw_landmarks 远快于一帧检测）。
+        """
+        if not result.num_hands:
+            if self.empty_result is None:
+                self.empty_result = mp.HandResults(self.max_hands)
+            return self.empty_result
+        if self.publish_buffers is None:
+            self.publish_buffers = [mp.HandResults(self.max_hands) for _ in range(2)]
+        self.publish_idx ^= 1
+        return self.publish_buffers[self.publish_idx].copy_from(result)
+
+    def _video_timestamp(self, capture_ts):
+        """VIDEO 模式要求时间戳严格递增：同一帧的 ROI 重检等重复时间戳顺延 1ms。"""
+        ts = int(capture_ts)
+        if ts <= self.last_video_ts:
+            ts = self.last_video_ts + 1
+        self.last_video_ts = ts
+        return ts
+
+    def _infer(self, image_bgr, capture_ts):
+        """对一帧 BGR 图像运行当前后端的推理，返回原始结果；capture_ts 为采集时间戳（ms）。"""
+        image_rgb = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2RGB)
+        if self.is_tasks:
+            mp_image = self.mp_core.Image(image_format=self.mp_core.ImageFormat.SRGB, data=image_rgb)
+            return self.tasks_landmarker.detect_for_video(mp_image, self._video_timestamp(capture_ts))
+        if HANDS_ACCEPT_TIMESTAMP:
+            return self.hands.process(image_rgb, self._video_timestamp(capture_ts))
+        return self.hands.process(image_rgb)
+
+    def _result_to_points(self, result, sx, sy, ox, oy):
+        """
+        把推理结果转换为像素关键点数组 (M,21,3) 与左右手标签列表。
+
+        x_px = x_norm * sx + ox，y 同理；z 保持原值。
+        """
+        if self.is_tasks:
+            hands = result.hand_landmarks if result else None
+            labels = [h[0].category_name if h else "" for h in (result.handedness or [])] if hands else []
+        else:
+            hands = result.multi_hand_landmarks if result else None
+            labels = [h.classification[0].label for h in (result.multi_handedness or [])] if hands else []
+        if not hands:
+            return np.zeros((0, 21, 3), dtype=np.float32), []
+
+        if hasattr(result, "as_array"):
+            # mp_hands_wrapper 的数组结果：直接整体变换
+            points = result.as_array().copy()
+        else:
+            points = np.empty((len(hands), 21, 3), dtype=np.float32)
+            for h, hand in enumerate(hands):
+                lms = hand if self.is_tasks else hand.landmark
+                for j, lm in enumerate(lms):
+                    points[h, j, 0] = lm.x
+                    points[h, j, 1] = lm.y
+                    points[h, j, 2] = lm.z
+        points[..., 0] = points[..., 0] * sx + ox
+        points[..., 1] = points[..., 1] * sy + oy
+        labels += [""] * (len(points) - len(labels))
+        return points, labels
+
+    def _roi_fallback(self, frame, slot, pad, seq, capture_ts):
+        """在某条轨迹上一帧包围盒附近裁剪放大后重检，命中则写回该轨迹。"""
+        bx0, by0, bx1, by1 = self.tracker.bbox[slot]
+        w = max(self.roi_min, bx1 - bx0)
+        h = max(self.roi_min, by1 - by0)
+        cx = int(bx0 + w // 2)
+        cy = int(by0 + h // 2)
+        w2 = int(max(self.roi_min, w * self.roi_expand))
+        h2 = int(max(self.roi_min, h * self.roi_expand))
+        x0 = max(0, cx - w2 // 2)
+        y0 = max(0, cy - h2 // 2)
+        x1 = min(self.geometry.width, x0 + w2)
+        y1 = min(self.geometry.height, y0 + h2)
+        if x1 <= x0 or y1 <= y0:
+            return False
+        # crop from padded frame
+        roi = frame[y0 + pad:y1 + pad, x0 + pad:x1 + pad]
+        metrics.inc("roi_fallback_attempts")
+        with metrics.timer("roi_fallback", seq):
+            r2 = self._infer(self._enhance_roi(roi), capture_ts)
+        points, handedness = self._result_to_points(r2, x1 - x0, y1 - y0, x0, y0)
+        if not len(points):
+            return False
+        metrics.inc("roi_fallback_hits")
+        self.tracker.assign(slot, points[0], handedness[0])
+        return True
+
+    def _recognize_gesture_points(self, points):
+        """基于关键点识别手势；points 为检测坐标系下的像素关键点 (21,>=2)。"""
+        lm_list = []
+        width, height, _ = self.geometry
+        for x_px, y_px in points[:, :2]:
+            x_px = max(0, min(width - 1, int(x_px)))
+            y_px = max(0, min(height - 1, int(y_px)))
+            lm_list.append([x_px, y_px])
         if not lm_list:
             return config.GESTURE_NONE
 
-        # 手指状态 (0: 拇指, 1: 食指, 2: 中指, 3: 无名指, 4: 小指)
-        fingers = []
-
-        # 拇指 (检查 x 坐标相对于 IP 关节的位置，这取决于惯用手，比较复杂)
-        # 简化版：检查指尖是否远离食指基部 (MCP)
-        # 更好：检查指尖 x 是在 IP x 的左边还是右边。
-        # 假设右手 (镜像) 或一般 "伸出"
-        # 让我们使用一个更简单的启发式方法：距离手腕 vs IP 距离？
-        # 标准方式：指尖 x < IP x (右手，手掌面向摄像头)
-        # 因为我们翻转了图像，所以它表现得像镜子。
-        # 让我们坚持简单的几何学。
-        
-        # 拇指：比较指尖 (4) 和 IP (3)
-        # 但对于方向控制，我们假设 "指向"
-        
-        # 让我们检查垂直手指 (食指、中指、无名指、小指)
-        # 指尖 y < PIP y 意味着手指是向上的
+        # 手指状态：食指、中指、无名指、小指，指尖 y < PIP y 表示手指向上
         tips = [8, 12, 16, 20]
         pips = [6, 10, 14, 18]
-        
+        fingers = []
         for i in range(4):
-            if lm_list[tips[i]][1] < lm_list[pips[i]][1]:
-                fingers.append(1)
-            else:
-                fingers.append(0)
-        
-        # 拇指 (id 4) 逻辑：
-        # 检查拇指指尖是否在 MCP (2) 的侧面。
-        # 我们需要知道惯用手或者仅使用与食指 MCP (5) 的距离。
-        # 如果 distance(4, 5) > threshold?
-        # 如果指尖远离手掌中心 (0 或 9)，我们就算拇指是张开的。
+            fingers.append(1 if lm_list[tips[i]][1] < lm_list[pips[i]][1] else 0)
+
+        # 拇指：指尖远离食指 MCP 即视为张开（用 手腕-食指MCP 长度归一化）
         thumb_tip = lm_list[4]
         index_mcp = lm_list[5]
-        # 简单的欧几里得距离
         dist_thumb_index = ((thumb_tip[0]-index_mcp[0])**2 + (thumb_tip[1]-index_mcp[1])**2)**0.5
-        # 通过 手腕-食指MCP 长度进行归一化
         ref_len = ((lm_list[0][0]-lm_list[5][0])**2 + (lm_list[0][1]-lm_list[5][1])**2)**0.5
-        
-        thumb_up = 0
-        if dist_thumb_index > ref_len * 0.5: # 启发式
-            thumb_up = 1
-        
-        total_fingers = fingers.count(1) + thumb_up
-        
-        # 1. 暂停：握拳 (0个手指)
-        if total_fingers == 0:
+        thumb_up = 1 if dist_thumb_index > ref_len * 0.5 else 0
+        total = fingers.count(1) + thumb_up
+
+        # 暂停：握拳 (0个手指)
+        if total == 0:
             return config.GESTURE_PAUSE
-        
-        # 3. 重启：OK (拇指和食指接触，其他手指向上)
-        # 检查拇指指尖 (4) 和食指指尖 (8) 之间的距离
-        dist_ok = ((lm_list[4][0]-lm_list[8][0])**2 + (lm_list[4][1]-lm_list[8][1])**2)**0.5
-        if dist_ok < ref_len * 0.3 and fingers[1] == 1 and fingers[2] == 1 and fingers[3] == 1: 
-            # 注意：fingers 列表对应食指、中指、无名指、小指。
-            # fingers[0] 是食指。fingers[1] 是中指。
-            # OK 手势：拇指+食指圆圈，中指/无名指/小指向上。
-            # 所以 fingers 应该是 [0, 1, 1, 1] 大致 (如果食指卷曲可能被算作向下)
-            # 实际上，在 OK 手势中，食指指尖是向下/接触拇指的。
-            return config.GESTURE_RESTART
 
-        # 改进的 OK 检查：
-        # 食指指尖 (8) 靠近拇指指尖 (4)
-        # 中指 (12)、无名指 (16)、小指 (20) 向上。
+        # 重启：OK（拇指和食指指尖接触，中指/无名指/小指向上）
+        dist_ok = ((lm_list[4][0]-lm_list[8][0])**2 + (lm_list[4][1]-lm_list[8][1])**2)**0.5
         if dist_ok < ref_len * 0.3 and fingers[1] == 1 and fingers[2] == 1 and fingers[3] == 1:
-             return config.GESTURE_RESTART
+            return config.GESTURE_RESTART
 
-        # 4. 方向控制：两个手指 (食指 + 中指)
-        # 条件：食指 (8) 和中指 (12) 向上。无名指和小指向下。
+        # 方向控制：食指 + 中指向上，方向取 MCP -> 指尖 的平均向量
         if fingers[0] == 1 and fingers[1] == 1 and fingers[2] == 0 and fingers[3] == 0:
-            # 检查方向
-            # 从 MCP (5, 9) 到指尖 (8, 12) 的向量
-            # 平均指尖和 MCP
             avg_tip_x = (lm_list[8][0] + lm_list[12][0]) / 2
             avg_tip_y = (lm_list[8][1] + lm_list[12][1]) / 2
             avg_mcp_x = (lm_list[5][0] + lm_list[9][0]) / 2
             avg_mcp_y = (lm_list[5][1] + lm_list[9][1]) / 2
-            
             dx = avg_tip_x - avg_mcp_x
             dy = avg_tip_y - avg_mcp_y
-            
             if abs(dx) > abs(dy):
                 return config.GESTURE_RIGHT if dx > 0 else config.GESTURE_LEFT
             else:
                 return config.GESTURE_DOWN if dy > 0 else config.GESTURE_UP
-        
+
         # 回退单指指向 (以防用户仅使用一个手指)
         if fingers[0] == 1 and fingers[1] == 0 and fingers[2] == 0 and fingers[3] == 0:
-             # 类似逻辑
-             dx = lm_list[8][0] - lm_list[5][0]
-             dy = lm_list[8][1] - lm_list[5][1]
-             if abs(dx) > abs(dy):
+            dx = lm_list[8][0] - lm_list[5][0]
+            dy = lm_list[8][1] - lm_list[5][1]
+            if abs(dx) > abs(dy):
                 return config.GESTURE_RIGHT if dx > 0 else config.GESTURE_LEFT
-             else:
+            else:
                 return config.GESTURE_DOWN if dy > 0 else config.GESTURE_UP
-        
         return config.GESTURE_NONE
 
     def draw_landmarks(self, frame, results):
-        pad = getattr(config, "DETECTION_PAD", 0)
-        w_pad = config.DETECTION_WIDTH + 2 * pad
-        h_pad = config.DETECTION_HEIGHT + 2 * pad
-        sx = config.CAMERA_WIDTH / float(config.DETECTION_WIDTH)
-        sy = config.CAMERA_HEIGHT / float(config.DETECTION_HEIGHT)
+        """绘制手部关键点；有跟踪结果时使用滤波后的骨架，否则退回原始结果。"""
+        with self.lock:
+            hands = self.latest_hands
+        if hands:
+            limit = (config.CAMERA_WIDTH - 1, config.CAMERA_HEIGHT - 1)
+            for hand in hands:
+                if not hand["visible"]:
+                    continue
+                pts = hand["landmarks"] * (config.CAMERA_WIDTH, config.CAMERA_HEIGHT)
+                pts = np.clip(pts, 0, limit).astype(np.int32)
+                for x_cam, y_cam in pts:
+                    cv2.circle(frame, (int(x_cam), int(y_cam)), 3, (0, 255, 255), -1)
+            return
+
+        width, height, pad = self.geometry
+        w_pad = width + 2 * pad
+        h_pad = height + 2 * pad
+        sx = config.CAMERA_WIDTH / float(width)
+        sy = config.CAMERA_HEIGHT / float(height)
         if self.is_tasks:
             if results and getattr(results, "hand_landmarks", None):
                 for lm in results.hand_landmarks:
@@ -480,62 +648,8 @@ class HandDetector:
                         pts.append((x_cam, y_cam))
                         cv2.circle(frame, (x_cam, y_cam), 3, (0, 255, 255), -1)
 
-    def _recognize_gesture_tasks(self, lm_list_norm):
-        pad = getattr(config, "DETECTION_PAD", 0)
-        w_pad = config.DETECTION_WIDTH + 2 * pad
-        h_pad = config.DETECTION_HEIGHT + 2 * pad
-        lm_list = []
-        for lm in lm_list_norm:
-            x_px = lm.x * w_pad - pad
-            y_px = lm.y * h_pad - pad
-            x_px = max(0, min(config.DETECTION_WIDTH - 1, int(x_px)))
-            y_px = max(0, min(config.DETECTION_HEIGHT - 1, int(y_px)))
-            lm_list.append([x_px, y_px])
-        if not lm_list:
-            return config.GESTURE_NONE
-        tips = [8, 12, 16, 20]
-        pips = [6, 10, 14, 18]
-        fingers = []
-        for i in range(4):
-            fingers.append(1 if lm_list[tips[i]][1] < lm_list[pips[i]][1] else 0)
-        thumb_tip = lm_list[4]
-        index_mcp = lm_list[5]
-        dist_thumb_index = ((thumb_tip[0]-index_mcp[0])**2 + (thumb_tip[1]-index_mcp[1])**2)**0.5
-        ref_len = ((lm_list[0][0]-lm_list[5][0])**2 + (lm_list[0][1]-lm_list[5][1])**2)**0.5
-        thumb_up = 1 if dist_thumb_index > ref_len * 0.5 else 0
-        total = fingers.count(1) + thumb_up
-        if total == 0:
-            return config.GESTURE_PAUSE
-        dist_ok = ((lm_list[4][0]-lm_list[8][0])**2 + (lm_list[4][1]-lm_list[8][1])**2)**0.5
-        if dist_ok < ref_len * 0.3 and fingers[1] == 1 and fingers[2] == 1 and fingers[3] == 1:
-            return config.GESTURE_RESTART
-        if fingers[0] == 1 and fingers[1] == 1 and fingers[2] == 0 and fingers[3] == 0:
-            avg_tip_x = (lm_list[8][0] + lm_list[12][0]) / 2
-            avg_tip_y = (lm_list[8][1] + lm_list[12][1]) / 2
-            avg_mcp_x = (lm_list[5][0] + lm_list[9][0]) / 2
-            avg_mcp_y = (lm_list[5][1] + lm_list[9][1]) / 2
-            dx = avg_tip_x - avg_mcp_x
-            dy = avg_tip_y - avg_mcp_y
-            if abs(dx) > abs(dy):
-                return config.GESTURE_RIGHT if dx > 0 else config.GESTURE_LEFT
-            else:
-                return config.GESTURE_DOWN if dy > 0 else config.GESTURE_UP
-        if fingers[0] == 1 and fingers[1] == 0 and fingers[2] == 0 and fingers[3] == 0:
-            dx = lm_list[8][0] - lm_list[5][0]
-            dy = lm_list[8][1] - lm_list[5][1]
-            if abs(dx) > abs(dy):
-                return config.GESTURE_RIGHT if dx > 0 else config.GESTURE_LEFT
-            else:
-                return config.GESTURE_DOWN if dy > 0 else config.GESTURE_UP
-        return config.GESTURE_NONE
-
     def _enhance_roi(self, roi_bgr):
-        try:
-            ycrcb = cv2.cvtColor(roi_bgr, cv2.COLOR_BGR2YCrCb)
-            y, cr, cb = cv2.split(ycrcb)
-            clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-            y = clahe.apply(y)
-            ycrcb = cv2.merge((y, cr, cb))
-            return cv2.cvtColor(ycrcb, cv2.COLOR_YCrCb2BGR)
-        except Exception:
-            return roi_bgr
+        """ROI 回退前的亮度增强；关闭自适应模式时保持原先固定使用 CLAHE 的行为。"""
+        if self.lighting_enabled:
+            return self.lighting.enhance(roi_bgr)
+        return self.lighting.enhance(roi_bgr, MODE_CLAHE)
@@ -0,0 +1,204 @@
+"""
+多手跟踪 / Multi-hand tracking
+
+把每帧检测到的手与上一帧的轨迹关联（左右手 + 包围盒 IoU / 质心距离），
+为每只手分配稳定的轨迹 ID，并以数组形式保存每条轨迹的滤波状态、手势历史与 ROI 包围盒，
+使每帧开销随手数只做少量增长。整副 21 点骨架经向量化 One Euro 滤波后再用于手势识别与绘制。
+"""
+import numpy as np
+
+import config
+from one_euro import OneEuroFilterArray
+from gesture_debouncer import GestureDebouncer, GESTURES, GESTURE_CODES  # noqa: F401
+
+NUM_LANDMARKS = 21
+
+def bbox_of(points):
+    """(M,21,>=2) 关键点 -> (M,4) 包围盒 [x0, y0, x1, y1]。"""
+    mins = points[..., :2].min(axis=-2)
+    maxs = points[..., :2].max(axis=-2)
+    return np.concatenate([mins, maxs], axis=-1)
+
+
+def iou_matrix(a, b):
+    """(M,4) 与 (N,4) 包围盒两两 IoU -> (M,N)。"""
+    x0 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y0 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x1 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y1 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x1 - x0, 0, None) * np.clip(y1 - y0, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-6), 0.0)
+
+
+class HandTracker:
+    def __init__(self, max_hands=1, width=None, height=None, max_age=1.0,
+                 match_threshold=0.1,
+                 min_cutoff=0.5, beta=0.005, d_cutoff=1.0):
+        n = max_hands
+        self.max_hands = n
+        self.width = width or config.DETECTION_WIDTH
+        self.height = height or config.DETECTION_HEIGHT
+        self.max_age = max_age  # 轨迹丢失超过该秒数后释放
+        self.match_threshold = match_threshold
+
+        # 轨迹槽位（数组存储，槽位数 = 最大手数）
+        self.ids = np.full(n, -1, dtype=np.int64)
+        self.active = np.zeros(n, dtype=bool)
+        self.seen = np.zeros(n, dtype=bool)         # 本帧是否匹配到
+        self.last_seen = np.zeros(n, dtype=np.float64)
+        self.bbox = np.zeros((n, 4), dtype=np.float32)
+        self.landmarks = np.zeros((n, NUM_LANDMARKS, 3), dtype=np.float32)
+        self.handedness = [""] * n
+        self.raw_gesture = np.zeros(n, dtype=np.int8)
+        self.gesture = np.zeros(n, dtype=np.int8)
+        self.next_id = 0
+
+        # 整副骨架的 One Euro 滤波（归一化坐标），指尖位置取自滤波结果
+        self.skeleton_filter = OneEuroFilterArray(
+            (n, NUM_LANDMARKS, 3), min_cutoff=min_cutoff, beta=beta, d_cutoff=d_cutoff
+        )
+        self.smoothed = np.zeros((n, NUM_LANDMARKS, 3), dtype=np.float64)
+        self.finger = np.zeros((n, 2), dtype=np.float64)
+        self.scale = np.array([self.width, self.height, 1.0])
+
+        # 手势去抖状态与本帧产生的手势事件 [(track_id, kind, gesture, t), ...]
+        self.debouncer = GestureDebouncer(n)
+        self.events = []
+
+    # ---------- 每帧流程：begin_frame -> associate -> (assign ROI 结果) -> filter_frame
+    #            -> (set_gesture 识别结果) -> end_frame ----------
+
+    def begin_frame(self):
+        self.seen[:] = False
+        self.events = []
+
+    def associate(self, points, handedness):
+        """把本帧检测结果关联到轨迹，返回每个检测对应的槽位（无空闲槽位时为 -1）。"""
+        m = len(points)
+        slots = np.full(m, -1, dtype=np.int64)
+        if m == 0:
+            return slots
+        det_bbox = bbox_of(points)
+        tracks = np.flatnonzero(self.active)
+
+        if len(tracks):
+            trk_bbox = self.bbox[tracks]
+            score = iou_matrix(det_bbox, trk_bbox)
+            # 质心距离（相对于轨迹包围盒对角线）作为 IoU 为 0 时的补充
+            det_c = (det_bbox[:, :2] + det_bbox[:, 2:]) / 2
+            trk_c = (trk_bbox[:, :2] + trk_bbox[:, 2:]) / 2
+            diag = np.hypot(trk_bbox[:, 2] - trk_bbox[:, 0], trk_bbox[:, 3] - trk_bbox[:, 1])
+            dist = np.hypot(det_c[:, None, 0] - trk_c[None, :, 0], det_c[:, None, 1] - trk_c[None, :, 1])
+            score = score + 0.5 * np.clip(1.0 - dist / np.maximum(diag[None, :], 1.0), 0.0, None)
+            # 左右手不一致时强烈惩罚
+            for i in range(m):
+                for k, slot in enumerate(tracks):
+                    if handedness[i] and self.handedness[slot] and handedness[i] != self.handedness[slot]:
+                        score[i, k] -= 1.0
+
+            # 贪心匹配：按得分从高到低
+            order = np.argsort(-score, axis=None)
+            used_det = np.zeros(m, dtype=bool)
+            used_trk = np.zeros(len(tracks), dtype=bool)
+            for flat in order:
+                i, k = divmod(int(flat), len(tracks))
+                if score[i, k] < self.match_threshold:
+                    break
+                if used_det[i] or used_trk[k]:
+                    continue
+                used_det[i] = used_trk[k] = True
+                slots[i] = tracks[k]
+
+        # 未匹配的检测开启新轨迹
+        for i in np.flatnonzero(slots < 0):
+            free = np.flatnonzero(~self.active)
+            if not len(free):
+                break
+            slot = int(free[0])
+            self.active[slot] = True
+            self.ids[slot] = self.next_id
+            self.next_id += 1
+            self.skeleton_filter.reset(slot)
+            self.debouncer.reset(slot)
+            slots[i] = slot
+
+        for i in np.flatnonzero(slots >= 0):
+            self.assign(int(slots[i]), points[i], handedness[i], det_bbox[i])
+        return slots
+
+    def missed_slots(self):
+        """本帧未匹配、但仍在存活期内的轨迹（ROI 回退的候选）。"""
+        return np.flatnonzero(self.active & ~self.seen)
+
+    def assign(self, slot, points, handedness, bbox=None):
+        """写入某条轨迹本帧的观测。"""
+        self.landmarks[slot] = points
+        self.bbox[slot] = bbox if bbox is not None else bbox_of(points[None])[0]
+        if handedness:
+            self.handedness[slot] = handedness
+        self.seen[slot] = True
+
+    def filter_frame(self, t):
+        """对本帧见到的所有轨迹一次性滤波整副骨架，返回这些槽位。"""
+        seen = np.flatnonzero(self.seen)
+        if len(seen):
+            self.last_seen[seen] = t
+            self.smoothed[seen] = self.skeleton_filter(t, self.landmarks[seen] / self.scale, seen)
+            self.finger[seen] = np.clip(self.smoothed[seen, 8, :2], 0.0, 1.0)
+        return seen
+
+    def smoothed_points(self, slot):
+        """某条轨迹滤波后的骨架（检测坐标系像素）(21,3)。"""
+        return self.smoothed[slot] * self.scale
+
+    def set_gesture(self, slot, gesture_code):
+        self.raw_gesture[slot] = gesture_code
+
+    def end_frame(self, t):
+        """完成本帧的手势去抖与过期轨迹回收。"""
+        # 本帧未见到的轨迹按 NONE 输入，与单手时"没检测到手记为 NONE"一致
+        missed = self.active & ~self.seen
+        self.raw_gesture[missed] = 0
+        for slot in np.flatnonzero(self.active):
+            for kind, gesture in self.debouncer.update(slot, int(self.raw_gesture[slot])):
+                self.events.append((int(self.ids[slot]), kind, gesture, t))
+            self.gesture[slot] = self.debouncer.current[slot]
+
+        # 超时未出现的轨迹：结束其手势并释放槽位
+        expired = self.active & ~self.seen & (t - self.last_seen > self.max_age)
+        for slot in np.flatnonzero(expired):
+            for kind, gesture in self.debouncer.end(slot):
+                self.events.append((int(self.ids[slot]), kind, gesture, t))
+            self.active[slot] = False
+            self.ids[slot] = -1
+            self.gesture[slot] = 0
+            self.handedness[slot] = ""
+
+    # ---------- 查询 ----------
+
+    def primary_slot(self):
+        """最早出现（ID 最小）的存活轨迹，作为单人控制的主手；没有时返回 -1。"""
+        active = np.flatnonzero(self.active)
+        if not len(active):
+            return -1
+        return int(active[np.argmin(self.ids[active])])
+
+    def snapshot(self):
+        """返回存活轨迹的摘要列表（按 ID 排序）。"""
+        hands = []
+        for slot in np.flatnonzero(self.active):
+            x0, y0, x1, y1 = (float(v) for v in self.bbox[slot])
+            hands.append({
+                "id": int(self.ids[slot]),
+                "handedness": self.handedness[slot],
+                "finger": (float(self.finger[slot, 0]), float(self.finger[slot, 1])),
+                "gesture": GESTURES[self.gesture[slot]],
+                "bbox": (x0, y0, x1 - x0, y1 - y0),
+                "landmarks": self.smoothed[slot, :, :2].copy(),  # 归一化 (21,2)
+                "visible": bool(self.seen[slot]),
+            })
+        hands.sort(key=lambda h: h["id"])
+        return hands
@@ -0,0 +1,109 @@
+"""
+空闲调速 / Game-state-aware idle governor
+
+游戏不在 RUNNING 状态（STOPPED / PAUSED / GAME_OVER）时，系统只需要发现 OK 手势，
+检测、视频编码与游戏 tick 都不必全速运行。调速器根据游戏状态、连接的客户端数与最近的活动
+（检测到手或手势、前端操作、新客户端连接）给出三档：
+
+  - active：全速（游戏进行中，或最近 IDLE_GRACE_S 秒内有活动）；
+  - idle：有客户端但无人操作，按 IDLE_RATES["idle"] 降低各环节频率；
+  - unattended：没有任何客户端连接，降到最低频率。
+
+检测器在较低频率下一旦看到手或手势就调用 activity()，立即回到 active，
+正在等待下一个 tick 的游戏循环也会被唤醒，因此恢复全速不需要等待一个空闲周期。
+
+各环节自行记录上次处理的时间，只向调速器查询最小间隔：检测器在 update_frame 中跳过未到期的帧
+（省去预处理与推理），视频流跳过未到期帧的编码，游戏循环按降低后的 tick 频率等待。
+"""
+import threading
+import time
+
+import config
+from metrics import metrics
+
+ACTIVE = "active"
+IDLE = "idle"
+UNATTENDED = "unattended"
+LEVEL_CODES = {ACTIVE: 0, IDLE: 1, UNATTENDED: 2}
+
+DEFAULT_RATES = {
+    IDLE: {"detection": 8, "stream": 10, "tick": 5},
+    UNATTENDED: {"detection": 4, "stream": 2, "tick": 2},
+}
+
+
+class IdleGovernor:
+    def __init__(self, enabled=None, grace=None, rates=None, clock=time.monotonic):
+        self.enabled = enabled if enabled is not None else getattr(config, "IDLE_GOVERNOR", True)
+        self.grace = grace if grace is not None else getattr(config, "IDLE_GRACE_S", 3.0)
+        self.rates = rates or getattr(config, "IDLE_RATES", DEFAULT_RATES)
+        self.clock = clock
+        self.level = ACTIVE
+        self.clients = 0
+        self.game_state = None
+        self.last_activity = clock()
+        self.cond = threading.Condition()
+
+    def _set_level(self, level):
+        """切换档位；回到 active 时唤醒正在等待的线程。调用方需持有 cond。"""
+        if level == self.level:
+            return
+        print(f"空闲调速：{self.level} -> {level}")
+        self.level = level
+        metrics.set_gauge("governor_level", LEVEL_CODES[level])
+        if level == ACTIVE:
+            self.cond.notify_all()
+
+    def activity(self):
+        """有人在操作（检测到手或手势、前端操作、新连接）：立即恢复全速。"""
+        with self.cond:
+            self.last_activity = self.clock()
+            self._set_level(ACTIVE)
+
+    def set_clients(self, count):
+        with self.cond:
+            grew = count > self.clients
+            self.clients = max(0, count)
+        if grew:
+            self.activity()
+
+    def update(self, game_state):
+        """游戏循环每个 tick 调用，按游戏状态与空闲时长重新评估档位。"""
+        with self.cond:
+            self.game_state = game_state
+            if not self.enabled or game_state == "RUNNING":
+                self.last_activity = self.clock()
+                level = ACTIVE
+            elif self.clock() - self.last_activity < self.grace:
+                level = ACTIVE
+            else:
+                level = UNATTENDED if self.clients == 0 else IDLE
+            self._set_level(level)
+            return level
+
+    def interval(self, kind):
+        """某环节（detection / stream / tick）当前的最小处理间隔（秒），全速时为 0。"""
+        level = self.level
+        if level == ACTIVE:
+            return 0.0
+        rate = self.rates.get(level, {}).get(kind)
+        return 1.0 / rate if rate else 0.0
+
+    def tick_period(self, nominal_rate):
+        """游戏循环本次应等待的周期：全速时为 1 / nominal_rate，空闲时取两者中较长的。"""
+        return max(1.0 / nominal_rate, self.interval("tick"))
+
+    def sleep(self, seconds):
+        """等待 seconds 秒；期间恢复全速时提前返回 True。"""
+        if seconds <= 0:
+            return False
+        with self.cond:
+            return self.cond.wait(seconds)
+
+    def status(self):
+        return {"level": self.level, "clients": self.clients, "game_state": self.game_state,
+                "idle_for": round(self.clock() - self.last_activity, 1)}
+
+
+# 全局调速器
+governor = IdleGovernor()
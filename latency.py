@@ -0,0 +1,76 @@
+"""
+端到端（glass-to-glass）延迟测量 / End-to-end latency measurement
+
+服务器以单调时钟（毫秒）为帧打上采集时间戳，前端在完成时钟偏移握手后，
+把渲染时刻（换算到服务器时钟）连同帧序号回传，这里汇总采集→渲染的延迟分位数。
+"""
+import math
+import threading
+import time
+from collections import deque
+
+
+def monotonic_ms():
+    """服务器端统一使用的单调时钟（毫秒），不受系统时间跳变影响。"""
+    return time.monotonic() * 1000.0
+
+
+class LatencyTracker:
+    """汇总采集→渲染延迟样本（毫秒）。"""
+
+    def __init__(self, window=1024):
+        self.lock = threading.Lock()
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.last_seq = {}  # 客户端 -> 已统计的最大帧序号
+
+    def record(self, frame_seq, capture_ts, render_ts, client=None):
+        """
+        记录一次回传；每个客户端的同一帧只统计首次渲染，返回延迟（毫秒）或 None。
+
+        参数直接来自客户端消息：类型不对或不是有限数值时丢弃并返回 None。
+        """
+        try:
+            frame_seq = int(frame_seq)
+            latency = float(render_ts) - float(capture_ts)
+        except (TypeError, ValueError):
+            return None
+        if not math.isfinite(latency) or latency < 0:
+            # 时钟偏移估计误差导致的负值直接丢弃
+            return None
+        with self.lock:
+            if frame_seq <= self.last_seq.get(client, -1):
+                return None
+            self.last_seq[client] = frame_seq
+            self.samples.append(latency)
+            self.count += 1
+        return latency
+
+    def forget(self, client):
+        """客户端断开时丢弃其帧序号记录。"""
+        with self.lock:
+            self.last_seq.pop(client, None)
+
+    def reset(self):
+        with self.lock:
+            self.samples.clear()
+            self.count = 0
+            self.last_seq.clear()
+
+    def percentiles(self, qs=(0.5, 0.9, 0.99)):
+        with self.lock:
+            ordered = sorted(self.samples)
+            count = self.count
+        report = {"count": count, "window": len(ordered)}
+        for q in qs:
+            key = f"p{int(q * 100)}_ms"
+            if ordered:
+                report[key] = round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 2)
+            else:
+                report[key] = None
+        report["max_ms"] = round(ordered[-1], 2) if ordered else None
+        return report
+
+
+# 模块级全局实例
+tracker = LatencyTracker()
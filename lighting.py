@@ -0,0 +1,134 @@
+"""
+自适应光照增强 / Adaptive lighting enhancement
+
+跟踪检测帧的滑动亮度直方图，根据环境亮度在三种处理之间切换：
+  - NONE : 光线充足，不做任何处理（零开销）
+  - GAMMA: 偏暗，使用预计算的 gamma 查找表（cv2.LUT，开销极低）
+  - CLAHE: 很暗，仅对亮度通道做 CLAHE（对象缓存复用）
+"""
+import threading
+
+import cv2
+import numpy as np
+
+import config
+
+MODE_NONE = "NONE"
+MODE_GAMMA = "GAMMA"
+MODE_CLAHE = "CLAHE"
+
+
+class LightingEnhancer:
+    def __init__(self, dark_level=None, dim_level=None, target_level=120,
+                 hysteresis=8, ema=0.1, update_every=5, bins=32):
+        self.dark_level = dark_level if dark_level is not None else getattr(config, "LIGHTING_DARK_LEVEL", 60)
+        self.dim_level = dim_level if dim_level is not None else getattr(config, "LIGHTING_DIM_LEVEL", 100)
+        self.target_level = target_level
+        self.hysteresis = hysteresis
+        self.ema = ema
+        self.update_every = update_every
+        self.bins = bins
+        self.bin_centers = (np.arange(bins, dtype=np.float32) + 0.5) * (256.0 / bins)
+
+        self.histogram = None  # 归一化滑动直方图
+        self.mean_level = None
+        self.mode = MODE_NONE
+        self.frame_count = 0
+        self.lock = threading.Lock()
+
+        # 缓存的算子
+        self.clahe = None
+        self.gamma = 1.0
+        self.gamma_luts = {}
+        self.active_lut = None
+
+    def observe(self, frame_bgr):
+        """用检测帧更新亮度直方图，每 update_every 帧重新选择增强模式。"""
+        self.frame_count += 1
+        if self.histogram is not None and self.frame_count % self.update_every:
+            return self.mode
+        # 隔行隔列降采样后统计，开销可忽略
+        gray = cv2.cvtColor(frame_bgr[::4, ::4], cv2.COLOR_BGR2GRAY)
+        hist = cv2.calcHist([gray], [0], None, [self.bins], [0, 256]).ravel()
+        total = hist.sum()
+        if total <= 0:
+            return self.mode
+        hist /= total
+        if self.histogram is None:
+            self.histogram = hist
+        else:
+            self.histogram = (1 - self.ema) * self.histogram + self.ema * hist
+        self.mean_level = float(np.dot(self.histogram, self.bin_centers))
+        self._select_mode()
+        return self.mode
+
+    def _select_mode(self):
+        level = self.mean_level
+        h = self.hysteresis
+        mode = self.mode
+        # 带滞回的阈值，避免在边界来回切换
+        if mode == MODE_NONE:
+            if level < self.dark_level:
+                mode = MODE_CLAHE
+            elif level < self.dim_level - h:
+                mode = MODE_GAMMA
+        elif mode == MODE_GAMMA:
+            if level < self.dark_level - h:
+                mode = MODE_CLAHE
+            elif level > self.dim_level + h:
+                mode = MODE_NONE
+        else:
+            if level > self.dim_level + h:
+                mode = MODE_NONE
+            elif level > self.dark_level + h:
+                mode = MODE_GAMMA
+
+        with self.lock:
+            self.mode = mode
+            if mode == MODE_GAMMA:
+                self.active_lut = self._gamma_lut(self._gamma_for(level))
+            elif mode == MODE_CLAHE and self.clahe is None:
+                self.clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+
+    def _gamma_for(self, level):
+        """求使平均亮度映射到 target_level 的指数，量化到 0.05 以便复用查找表。"""
+        level = max(1.0, min(254.0, level))
+        gamma = np.log(self.target_level / 255.0) / np.log(level / 255.0)
+        gamma = max(0.4, min(1.0, float(gamma)))
+        return round(gamma * 20) / 20.0
+
+    def _gamma_lut(self, gamma):
+        lut = self.gamma_luts.get(gamma)
+        if lut is None:
+            lut = np.clip(((np.arange(256) / 255.0) ** gamma) * 255.0, 0, 255).astype(np.uint8)
+            self.gamma_luts[gamma] = lut
+        self.gamma = gamma
+        return lut
+
+    def enhance(self, img_bgr, mode=None):
+        """按当前（或指定）模式增强图像，NONE 模式原样返回。"""
+        with self.lock:
+            mode = mode or self.mode
+            lut = self.active_lut
+            clahe = self.clahe
+        try:
+            if mode == MODE_GAMMA and lut is not None:
+                return cv2.LUT(img_bgr, lut)
+            if mode == MODE_CLAHE:
+                if clahe is None:
+                    clahe = self.clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+                # 只提取/写回亮度通道，避免完整的 split/merge
+                ycrcb = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2YCrCb)
+                y = clahe.apply(cv2.extractChannel(ycrcb, 0))
+                ycrcb = cv2.insertChannel(y, ycrcb, 0)
+                return cv2.cvtColor(ycrcb, cv2.COLOR_YCrCb2BGR)
+        except Exception:
+            pass
+        return img_bgr
+
+    def status(self):
+        return {
+            "mode": self.mode,
+            "mean_level": round(self.mean_level, 1) if self.mean_level is not None else None,
+            "gamma": self.gamma if self.mode == MODE_GAMMA else None,
+        }
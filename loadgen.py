@@ -0,0 +1,372 @@
+"""
+本地负载测试 / Local load generator
+
+模拟 N 个 Socket.IO 客户端（接收 game_state、按间隔发送 game_action）与 M 个 /video_feed 观看者，
+按阶段逐步增加连接数，每个阶段统计：
+
+  - 推送延迟：客户端收到 game_state 的时刻 - 服务器 tick 时刻（经 clock_sync 换算到服务器时钟）；
+  - 每个客户端实际收到的 game_state 频率、每个观看者实际收到的视频帧率与带宽；
+  - 服务器进程 CPU 占用与常驻内存。
+
+全部在本机运行，不依赖外部服务。可以连接已在运行的服务器（--pid 指定其进程号以采集 CPU/内存），
+也可以由本工具以回放源启动服务器：
+
+    python loadgen.py --launch app.py --replay clips/wave.mp4 --clients 1,10,50,100 --viewers 1,2,4
+    python loadgen.py --url http://localhost:5000 --pid 12345 --clients 20 --viewers 0 --json load.json
+
+需要 python-socketio 的客户端依赖（pip install "python-socketio[client]"）；psutil 可选，
+未安装时在 Linux 上读取 /proc 统计服务器资源。
+"""
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlparse
+
+try:
+    import socketio
+except ImportError:  # pragma: no cover - 可选依赖，在 main() 中提示安装
+    socketio = None
+
+try:
+    import psutil
+except ImportError:  # pragma: no cover - 可选依赖
+    psutil = None
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class SimClient:
+    """模拟一个前端：完成时钟同步后接收 game_state，按间隔发送游戏操作。"""
+
+    def __init__(self, url, actions=(), action_interval=0.0):
+        self.url = url
+        self.actions = list(actions)
+        self.action_interval = action_interval
+        self.sio = socketio.Client(reconnection=False)
+        self.offset = None  # 服务器时钟 - 本地时钟（ms）
+        self.lock = threading.Lock()
+        self.latencies = []
+        self.received = 0
+        self.stop_event = threading.Event()
+        self.sio.on('clock_sync', self.on_clock_sync)
+        self.sio.on('game_state', self.on_game_state)
+
+    @staticmethod
+    def now_ms():
+        return time.monotonic() * 1000.0
+
+    def connect(self):
+        self.sio.connect(self.url, transports=['websocket'], wait_timeout=10)
+        self.sio.emit('clock_sync', {'client_ts': self.now_ms()})
+        if self.actions and self.action_interval > 0:
+            threading.Thread(target=self.action_loop, daemon=True).start()
+
+    def on_clock_sync(self, data):
+        t1 = self.now_ms()
+        t0 = data.get('client_ts')
+        if t0 is not None and data.get('server_ts') is not None:
+            self.offset = data['server_ts'] - (t0 + t1) / 2.0
+
+    def on_game_state(self, data):
+        t = self.now_ms()
+        with self.lock:
+            self.received += 1
+            if self.offset is not None and data.get('tick_ts') is not None:
+                self.latencies.append(t + self.offset - data['tick_ts'])
+
+    def action_loop(self):
+        i = 0
+        while not self.stop_event.wait(self.action_interval):
+            try:
+                self.sio.emit('game_action', {'action': self.actions[i % len(self.actions)]})
+            except Exception:
+                return
+            i += 1
+
+    def take(self):
+        """取出并清空本阶段的统计：(收到条数, 延迟列表)。"""
+        with self.lock:
+            received, latencies = self.received, self.latencies
+            self.received, self.latencies = 0, []
+        return received, latencies
+
+    def close(self):
+        self.stop_event.set()
+        try:
+            self.sio.disconnect()
+        except Exception:
+            pass
+
+
+class VideoReader:
+    """读取 /video_feed 的 MJPEG 流，只统计帧数与字节数，不解码。"""
+
+    BOUNDARY = b'--frame'
+
+    def __init__(self, url):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or 'localhost'
+        self.port = parsed.port or 80
+        self.lock = threading.Lock()
+        self.frames = 0
+        self.bytes = 0
+        self.error = None
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def run(self):
+        try:
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=10)
+            conn.request('GET', '/video_feed')
+            resp = conn.getresponse()
+            tail = b''
+            while not self.stop_event.is_set():
+                chunk = resp.read1(65536)
+                if not chunk:
+                    break
+                # 带上上一块末尾不足一个边界长度的字节，边界被分块截断时也只计一次
+                data = tail + chunk
+                tail = data[-(len(self.BOUNDARY) - 1):]
+                with self.lock:
+                    self.frames += data.count(self.BOUNDARY)
+                    self.bytes += len(chunk)
+            conn.close()
+        except Exception as e:
+            self.error = str(e)
+
+    def take(self):
+        with self.lock:
+            frames, nbytes = self.frames, self.bytes
+            self.frames, self.bytes = 0, 0
+        return frames, nbytes
+
+    def close(self):
+        self.stop_event.set()
+
+
+class ProcessSampler:
+    """服务器进程 CPU 占用（% 单核）与常驻内存（MB）。"""
+
+    def __init__(self, pid):
+        self.pid = pid
+        self.proc = psutil.Process(pid) if (psutil and pid) else None
+        self.last = None
+
+    def _cpu_seconds(self):
+        if self.proc is not None:
+            times = self.proc.cpu_times()
+            return times.user + times.system
+        with open(f"/proc/{self.pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        ticks = os.sysconf("SC_CLK_TCK")
+        return (int(fields[11]) + int(fields[12])) / ticks
+
+    def _rss_mb(self):
+        if self.proc is not None:
+            return self.proc.memory_info().rss / 1e6
+        with open(f"/proc/{self.pid}/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 1e6
+
+    def available(self):
+        return self.pid is not None and (self.proc is not None or os.path.exists(f"/proc/{self.pid}/stat"))
+
+    def sample(self):
+        """返回 (自上次调用以来的 CPU%，当前 RSS MB)；无法采集时为 (None, None)。"""
+        if not self.available():
+            return None, None
+        try:
+            now = time.monotonic()
+            cpu = self._cpu_seconds()
+            result = None
+            if self.last is not None:
+                result = (cpu - self.last[1]) / max(now - self.last[0], 1e-6) * 100
+            self.last = (now, cpu)
+            return result, self._rss_mb()
+        except Exception:  # 进程已退出、psutil.NoSuchProcess 等
+            return None, None
+
+
+def launch_server(script, replay, port_url, governor=False, timeout=60.0):
+    """
+    以回放源启动 app.py / async_server.py，等待 /ready 可访问后返回进程。
+
+    默认关闭空闲调速（回放片段里通常没人开始游戏，调速会把推送与编码降到空闲频率）。
+    """
+    code = (
+        "import config, runpy, sys\n"
+        f"config.REPLAY_SOURCE = {replay!r}\n"
+        f"config.IDLE_GOVERNOR = {governor!r}\n"
+        f"sys.argv = [{script!r}]\n"
+        f"runpy.run_path({script!r}, run_name='__main__')\n"
+    )
+    proc = subprocess.Popen([sys.executable, "-c", code], stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT)
+    parsed = urlparse(port_url)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit(f"服务器进程已退出（{proc.returncode}）")
+        try:
+            conn = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=1)
+            conn.request('GET', '/ready')
+            ready = json.loads(conn.getresponse().read()).get('ready')
+            conn.close()
+            if ready:
+                return proc
+        except (OSError, ValueError):
+            pass
+        time.sleep(0.5)
+    proc.terminate()
+    raise SystemExit("等待服务器就绪超时")
+
+
+def parse_counts(text):
+    return [int(x) for x in text.split(",") if x.strip()]
+
+
+def run_stages(args, sampler):
+    clients, viewers = [], []
+    stages = []
+    client_steps = parse_counts(args.clients)
+    viewer_steps = parse_counts(args.viewers)
+    n_stages = max(len(client_steps), len(viewer_steps))
+    actions = [a for a in args.actions.split(",") if a]
+    try:
+        for i in range(n_stages):
+            want_clients = client_steps[min(i, len(client_steps) - 1)]
+            want_viewers = viewer_steps[min(i, len(viewer_steps) - 1)]
+            while len(clients) < want_clients:
+                # 只有前 --controllers 个客户端发送游戏操作，其余只接收
+                controller = len(clients) < args.controllers
+                c = SimClient(args.url, actions if controller else (), args.action_interval)
+                c.connect()
+                clients.append(c)
+            while len(viewers) < want_viewers:
+                v = VideoReader(args.url)
+                v.start()
+                viewers.append(v)
+
+            # 预热后清空统计，再测量整个阶段
+            time.sleep(args.warmup)
+            for c in clients:
+                c.take()
+            for v in viewers:
+                v.take()
+            sampler.sample()
+            time.sleep(args.stage_seconds)
+            cpu, rss = sampler.sample()
+
+            latencies, rates = [], []
+            for c in clients:
+                received, lat = c.take()
+                rates.append(received / args.stage_seconds)
+                latencies += lat
+            video = [v.take() for v in viewers]
+            stage = {
+                "clients": len(clients),
+                "viewers": len(viewers),
+                "emit_p50_ms": percentile(latencies, 0.5),
+                "emit_p95_ms": percentile(latencies, 0.95),
+                "emit_p99_ms": percentile(latencies, 0.99),
+                "state_hz_min": min(rates) if rates else None,
+                "state_hz_mean": sum(rates) / len(rates) if rates else None,
+                "video_fps_min": min(f for f, _ in video) / args.stage_seconds if video else None,
+                "video_fps_mean": sum(f for f, _ in video) / len(video) / args.stage_seconds if video else None,
+                "video_mbps": sum(b for _, b in video) * 8 / 1e6 / args.stage_seconds if video else None,
+                "server_cpu_pct": cpu,
+                "server_rss_mb": rss,
+                "video_errors": sum(1 for v in viewers if v.error),
+            }
+            stages.append(stage)
+            print_stage(stage)
+    finally:
+        for c in clients:
+            c.close()
+        for v in viewers:
+            v.close()
+    return stages
+
+
+def _fmt(value, spec=".1f"):
+    return format(value, spec) if value is not None else "-"
+
+
+def print_stage(s):
+    print(f"{s['clients']:>7} {s['viewers']:>5} "
+          f"{_fmt(s['emit_p50_ms']):>8} {_fmt(s['emit_p95_ms']):>8} {_fmt(s['emit_p99_ms']):>8} "
+          f"{_fmt(s['state_hz_min']):>7} {_fmt(s['state_hz_mean']):>7} "
+          f"{_fmt(s['video_fps_min']):>7} {_fmt(s['video_fps_mean']):>7} {_fmt(s['video_mbps']):>7} "
+          f"{_fmt(s['server_cpu_pct'], '.0f'):>6} {_fmt(s['server_rss_mb'], '.0f'):>6}")
+
+
+def main():
+    if socketio is None:
+        raise SystemExit('负载测试需要 Socket.IO 客户端：pip install "python-socketio[client]"')
+    parser = argparse.ArgumentParser(description="手势贪吃蛇本地负载测试")
+    parser.add_argument("--url", default="http://localhost:5000")
+    parser.add_argument("--launch", choices=["app.py", "async_server.py"], help="以回放源启动服务器")
+    parser.add_argument("--replay", default="", help="--launch 时使用的回放视频或图片目录（默认 config.REPLAY_SOURCE）")
+    parser.add_argument("--keep-governor", action="store_true", help="--launch 时保留空闲调速（默认关闭以测量全速容量）")
+    parser.add_argument("--pid", type=int, default=None, help="已运行的服务器进程号（用于采集 CPU/内存）")
+    parser.add_argument("--clients", default="1,10,50", help="各阶段的 Socket.IO 客户端总数，逗号分隔")
+    parser.add_argument("--viewers", default="1", help="各阶段的 /video_feed 观看者总数，逗号分隔")
+    parser.add_argument("--controllers", type=int, default=1, help="发送游戏操作的客户端数")
+    parser.add_argument("--actions", default="resume", help="控制端循环发送的操作，逗号分隔")
+    parser.add_argument("--action-interval", type=float, default=2.0, help="发送操作的间隔（秒）")
+    parser.add_argument("--stage-seconds", type=float, default=10.0)
+    parser.add_argument("--warmup", type=float, default=2.0, help="每阶段增加连接后、开始统计前的等待（秒）")
+    parser.add_argument("--json", help="把各阶段结果写入 JSON 文件")
+    args = parser.parse_args()
+
+    server = None
+    pid = args.pid
+    if args.launch:
+        if not args.replay:
+            import config
+            args.replay = getattr(config, "REPLAY_SOURCE", "")
+        if not args.replay:
+            parser.error("--launch 需要回放源：--replay 或 config.REPLAY_SOURCE")
+        print(f"正在以回放源 {args.replay} 启动 {args.launch} ...")
+        server = launch_server(args.launch, args.replay, args.url, args.keep_governor)
+        pid = server.pid
+    else:
+        print("提示：服务器开启空闲调速（IDLE_GOVERNOR）时，无人游戏的阶段测到的是空闲频率")
+    sampler = ProcessSampler(pid)
+    if not sampler.available():
+        print("提示：未指定服务器进程（--pid / --launch），不采集 CPU 与内存")
+
+    print(f"{'clients':>7} {'video':>5} {'emit50':>8} {'emit95':>8} {'emit99':>8} "
+          f"{'Hz_min':>7} {'Hz_avg':>7} {'fps_min':>7} {'fps_avg':>7} {'Mbps':>7} {'CPU%':>6} {'RSS':>6}")
+    try:
+        stages = run_stages(args, sampler)
+    finally:
+        if server is not None:
+            server.terminate()
+            try:
+                server.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                server.kill()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"url": args.url, "launch": args.launch, "replay": args.replay,
+                       "time": time.strftime("%Y-%m-%d %H:%M:%S"), "stages": stages},
+                      f, indent=2, ensure_ascii=False)
+        print(f"结果已写入 {args.json}")
+
+
+if __name__ == "__main__":
+    main()
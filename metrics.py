@@ -0,0 +1,214 @@
+"""
+流水线性能指标 / Pipeline metrics
+
+为采集、预处理、推理、ROI 回退、手势识别、游戏 tick、推送和 JPEG 编码等阶段
+提供低开销计时器，汇总为滚动直方图与计数器，并以 Prometheus 文本格式导出。
+"""
+import threading
+import time
+from collections import deque
+
+from tracing import tracer
+
+# 直方图桶上界（秒），覆盖 0.5ms ~ 1s
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.02, 0.033, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+# 需要统计的阶段
+STAGES = (
+    "capture",
+    "preprocess",
+    "enhance",
+    "inference",
+    "roi_fallback",
+    "filter",
+    "gesture",
+    "gesture_vote",
+    "game_tick",
+    "emit",
+    "encode",
+)
+
+
+class RollingHistogram:
+    """累计桶计数 + 最近 N 个样本的滚动窗口（用于分位数）。"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, window=512):
+        self.buckets = tuple(buckets)
+        self.bucket_counts = [0] * len(self.buckets)
+        self.count = 0
+        self.total = 0.0
+        self.samples = deque(maxlen=window)
+
+    def observe(self, value):
+        self.count += 1
+        self.total += value
+        self.samples.append(value)
+        for i, upper in enumerate(self.buckets):
+            if value <= upper:
+                self.bucket_counts[i] += 1
+                break
+
+    def quantile(self, q):
+        """返回滚动窗口内的 q 分位数，无样本时返回 None。"""
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        idx = min(len(ordered) - 1, int(q * len(ordered)))
+        return ordered[idx]
+
+
+class RateMeter:
+    """最近 window 秒内的事件速率。"""
+
+    def __init__(self, window=5.0):
+        self.window = window
+        self.events = deque()
+
+    def mark(self, now):
+        self.events.append(now)
+        self._trim(now)
+
+    def rate(self, now):
+        self._trim(now)
+        return len(self.events) / self.window
+
+    def _trim(self, now):
+        cutoff = now - self.window
+        while self.events and self.events[0] < cutoff:
+            self.events.popleft()
+
+
+class _StageTimer:
+    """with 语句计时器，退出时把耗时写入对应阶段；追踪开启时同时记录 span。"""
+
+    __slots__ = ("metrics", "stage", "t0", "seq")
+
+    def __init__(self, metrics, stage, seq=None):
+        self.metrics = metrics
+        self.stage = stage
+        self.t0 = 0.0
+        self.seq = seq  # 帧序号，可在 with 块内补填
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.t0
+        self.metrics.observe(self.stage, duration)
+        if tracer.enabled:
+            tracer.add_span(self.stage, self.t0, duration, self.seq)
+        return False
+
+
+class PipelineMetrics:
+    """线程安全的指标注册表。"""
+
+    def __init__(self, stages=STAGES, buckets=DEFAULT_BUCKETS, window=512):
+        self.lock = threading.Lock()
+        self.buckets = tuple(buckets)
+        self.window = window
+        self.histograms = {s: RollingHistogram(self.buckets, window) for s in stages}
+        self.counters = {
+            "frames_captured": 0,
+            "frames_dropped": 0,
+            "frames_dropped_runtime": 0,
+            "frames_idle_skipped": 0,
+            "roi_fallback_attempts": 0,
+            "roi_fallback_hits": 0,
+            "emits": 0,
+            "frames_encoded": 0,
+        }
+        self.gauges = {}
+        self.emit_rate = RateMeter()
+        self.start_time = time.time()
+
+    def reset(self):
+        """清空全部直方图与计数器（离线基准在每组配置之间调用）。"""
+        with self.lock:
+            for name in self.histograms:
+                self.histograms[name] = RollingHistogram(self.buckets, self.window)
+            for name in self.counters:
+                self.counters[name] = 0
+            self.gauges = {}
+
+    def timer(self, stage, seq=None):
+        """返回计时上下文：with metrics.timer("inference", seq): ..."""
+        return _StageTimer(self, stage, seq)
+
+    def observe(self, stage, seconds):
+        with self.lock:
+            hist = self.histograms.get(stage)
+            if hist is None:
+                hist = self.histograms[stage] = RollingHistogram(self.buckets, self.window)
+            hist.observe(seconds)
+
+    def inc(self, name, value=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+            if name == "emits":
+                self.emit_rate.mark(time.monotonic())
+
+    def set_gauge(self, name, value):
+        with self.lock:
+            self.gauges[name] = value
+
+    def snapshot(self):
+        """返回便于 JSON 序列化的摘要。"""
+        with self.lock:
+            stages = {}
+            for name, hist in self.histograms.items():
+                p50 = hist.quantile(0.5)
+                p99 = hist.quantile(0.99)
+                stages[name] = {
+                    "count": hist.count,
+                    "mean_ms": (hist.total / hist.count * 1000) if hist.count else None,
+                    "p50_ms": p50 * 1000 if p50 is not None else None,
+                    "p99_ms": p99 * 1000 if p99 is not None else None,
+                }
+            return {
+                "stages": stages,
+                "counters": dict(self.counters),
+                "gauges": dict(self.gauges),
+                "emits_per_second": self.emit_rate.rate(time.monotonic()),
+            }
+
+    def render_prometheus(self):
+        """以 Prometheus 文本格式导出全部指标。"""
+        lines = []
+        with self.lock:
+            lines.append("# HELP snake_stage_seconds Per-stage pipeline latency.")
+            lines.append("# TYPE snake_stage_seconds histogram")
+            for name, hist in self.histograms.items():
+                cumulative = 0
+                for upper, n in zip(hist.buckets, hist.bucket_counts):
+                    cumulative += n
+                    lines.append(f'snake_stage_seconds_bucket{{stage="{name}",le="{upper}"}} {cumulative}')
+                lines.append(f'snake_stage_seconds_bucket{{stage="{name}",le="+Inf"}} {hist.count}')
+                lines.append(f'snake_stage_seconds_sum{{stage="{name}"}} {hist.total:.6f}')
+                lines.append(f'snake_stage_seconds_count{{stage="{name}"}} {hist.count}')
+
+            lines.append("# HELP snake_stage_seconds_window Rolling-window latency quantiles.")
+            lines.append("# TYPE snake_stage_seconds_window summary")
+            for name, hist in self.histograms.items():
+                for q in (0.5, 0.9, 0.99):
+                    v = hist.quantile(q)
+                    if v is not None:
+                        lines.append(f'snake_stage_seconds_window{{stage="{name}",quantile="{q}"}} {v:.6f}')
+
+            for name, value in self.counters.items():
+                lines.append(f"# TYPE snake_{name}_total counter")
+                lines.append(f"snake_{name}_total {value}")
+
+            lines.append("# TYPE snake_emits_per_second gauge")
+            lines.append(f"snake_emits_per_second {self.emit_rate.rate(time.monotonic()):.3f}")
+            for name, value in self.gauges.items():
+                lines.append(f"# TYPE snake_{name} gauge")
+                lines.append(f"snake_{name} {value}")
+            lines.append("# TYPE snake_uptime_seconds gauge")
+            lines.append(f"snake_uptime_seconds {time.time() - self.start_time:.1f}")
+        return "\n".join(lines) + "\n"
+
+
+# 模块级全局实例，各模块共享
+metrics = PipelineMetrics()
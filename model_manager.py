@@ -0,0 +1,239 @@
+"""
+模型资源管理 / Model asset manager
+
+统一负责模型文件的查找、下载与加载：
+  1. 依次在本地缓存目录、镜像目录中查找模型并校验 SHA-256；
+  2. 本地没有时从 HTTP 镜像列表下载；每个地址各自一个 .part 文件，
+     只有配置了固定校验值时才断点续传（Range 请求），续传结果不匹配时从头重下；
+  3. 模型只从磁盘读取一次，以 bytes 缓冲区共享给所有检测器实例
+     （作为 BaseOptions 的 model_asset_buffer 传入）。
+"""
+import glob
+import hashlib
+import os
+import shutil
+import threading
+import urllib.error
+import urllib.request
+
+import config
+from runtime_config import settings
+
+CHUNK_SIZE = 1 << 16
+
+# 已知模型。sha256 为固定校验值（config.TASKS_MODEL_SHA256）；未固定时只能信任首次下载的内容
+# 并记录为 .sha256 旁路文件，启动时大声警告，MODEL_REQUIRE_SHA256 开启时直接拒绝
+MODELS = {
+    "hand_landmarker": {
+        "filename": "hand_landmarker.task",
+        "sha256": getattr(config, "TASKS_MODEL_SHA256", ""),
+        "urls": [
+            "https://storage.googleapis.com/mediapipe-models/hand_landmarker/hand_landmarker/float16/1/hand_landmarker.task",
+            "https://storage.googleapis.com/mediapipe-models/hand_landmarker/hand_landmarker/float16/latest/hand_landmarker.task",
+        ],
+    },
+}
+
+
+class ModelIntegrityError(RuntimeError):
+    """模型文件校验失败。"""
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class ModelManager:
+    def __init__(self, cache_dir=None, mirror_dirs=None, mirror_urls=None, timeout=30):
+        self.cache_dir = cache_dir or getattr(config, "MODEL_CACHE_DIR", "models")
+        self.mirror_dirs = list(mirror_dirs if mirror_dirs is not None else getattr(config, "MODEL_MIRROR_DIRS", []))
+        # 额外的 HTTP 镜像前缀，拼接文件名即为下载地址，优先于官方地址
+        self.mirror_urls = list(mirror_urls if mirror_urls is not None else getattr(config, "MODEL_MIRROR_URLS", []))
+        self.timeout = timeout
+        self.require_pinned = getattr(config, "MODEL_REQUIRE_SHA256", False)
+        self.warned = set()
+        self.lock = threading.Lock()
+        self.buffers = {}
+
+    # ---------- 校验 ----------
+
+    def pinned_sha256(self, name):
+        value = MODELS[name].get("sha256")
+        return value.lower() if value else None
+
+    def _warn_unpinned(self, name):
+        if name in self.warned:
+            return
+        self.warned.add(name)
+        print("=" * 60)
+        print(f"警告：模型 {name} 没有固定的 SHA-256 校验值，无法确认下载内容可信！")
+        print("请在 config.py 中设置 TASKS_MODEL_SHA256（可信来源文件的 sha256），")
+        print("或设置 MODEL_REQUIRE_SHA256 = True 拒绝未固定校验值的模型。")
+        print("=" * 60)
+
+    def expected_sha256(self, name, path=None):
+        pinned = self.pinned_sha256(name)
+        if pinned:
+            return pinned
+        # 没有固定校验值时读取首次下载记录的旁路文件（只能发现之后的损坏）
+        sidecar = (path or self.cache_path(name)) + ".sha256"
+        if os.path.exists(sidecar):
+            with open(sidecar, "r", encoding="utf-8") as f:
+                return f.read().split()[0].strip().lower()
+        return None
+
+    def verify(self, name, path):
+        """校验文件；没有固定校验值时警告，MODEL_REQUIRE_SHA256 开启时视为失败。"""
+        if not self.pinned_sha256(name):
+            self._warn_unpinned(name)
+            if self.require_pinned:
+                return False
+        expected = self.expected_sha256(name, path)
+        if not expected:
+            return True
+        return file_sha256(path) == expected
+
+    # ---------- 查找 ----------
+
+    def cache_path(self, name):
+        return os.path.join(self.cache_dir, MODELS[name]["filename"])
+
+    def candidates(self, name):
+        """本地候选路径：缓存目录、配置路径、镜像目录、当前目录。"""
+        filename = MODELS[name]["filename"]
+        paths = [self.cache_path(name)]
+        cfg_path = settings.tasks_model_path
+        if name == "hand_landmarker" and cfg_path:
+            paths.append(cfg_path)
+        paths += [os.path.join(d, filename) for d in self.mirror_dirs]
+        paths.append(filename)
+        seen = []
+        for p in paths:
+            p_abs = p if os.path.isabs(p) else os.path.join(os.getcwd(), p)
+            if p_abs not in seen:
+                seen.append(p_abs)
+        return seen
+
+    def resolve(self, name, download=True):
+        """返回校验通过的本地模型路径，必要时下载到缓存目录。"""
+        cache_abs = os.path.abspath(self.cache_path(name))
+        for path in self.candidates(name):
+            if not os.path.exists(path):
+                continue
+            if self.verify(name, path):
+                return path
+            print(f"警告：模型校验失败，已忽略：{path}")
+        if not download:
+            return None
+        return self.fetch(name, cache_abs)
+
+    # ---------- 下载 ----------
+
+    def urls(self, name):
+        filename = MODELS[name]["filename"]
+        return [u.rstrip("/") + "/" + filename for u in self.mirror_urls] + list(MODELS[name]["urls"])
+
+    def part_path(self, dest, url):
+        """每个下载地址各用一个 .part：不同镜像（如 float16/1 与 latest）的文件可能不同，不能互相续传。"""
+        tag = hashlib.sha1(url.encode("utf-8")).hexdigest()[:12]
+        return f"{dest}.{tag}.part"
+
+    def fetch(self, name, dest):
+        """依次尝试各镜像下载；成功返回路径。"""
+        pinned = self.pinned_sha256(name)
+        if not pinned:
+            self._warn_unpinned(name)
+            if self.require_pinned:
+                raise ModelIntegrityError(f"模型 {name} 没有固定的 SHA-256 校验值，拒绝下载")
+        os.makedirs(os.path.dirname(dest) or ".", exist_ok=True)
+        errors = []
+        for url in self.urls(name):
+            part = self.part_path(dest, url)
+            try:
+                print(f"正在下载模型：{url}")
+                digest = self._download(url, part, pinned)
+                os.replace(part, dest)
+                for leftover in glob.glob(glob.escape(dest) + ".*part"):
+                    os.remove(leftover)
+                # 记录校验值，后续启动据此检查文件完整性
+                with open(dest + ".sha256", "w", encoding="utf-8") as f:
+                    f.write(f"{digest}  {os.path.basename(dest)}\n")
+                print(f"模型已保存：{dest}")
+                return dest
+            except Exception as e:
+                errors.append(f"{url}: {e}")
+                print(f"下载失败：{e}")
+        raise RuntimeError("所有镜像均下载失败：\n" + "\n".join(errors))
+
+    def _download(self, url, part, pinned):
+        """下载到 part 并返回其 SHA-256；续传得到的文件只有与固定校验值一致才保留。"""
+        if not pinned and os.path.exists(part):
+            # 没有固定校验值就无法判断续传拼接的结果是否正确，总是从头下载
+            os.remove(part)
+        resumed = self._ranged_download(url, part)
+        digest = file_sha256(part)
+        if pinned and digest != pinned:
+            os.remove(part)
+            if not resumed:
+                raise ModelIntegrityError(f"SHA-256 不匹配：{digest}")
+            print("续传结果校验失败，从头重新下载...")
+            self._ranged_download(url, part)
+            digest = file_sha256(part)
+            if digest != pinned:
+                os.remove(part)
+                raise ModelIntegrityError(f"SHA-256 不匹配：{digest}")
+        return digest
+
+    def _ranged_download(self, url, part):
+        """
+        断点续传：part 已存在时发送 Range 请求，服务器不支持或返回的范围不对时从头下载。
+
+        返回是否沿用了已有的 part 内容（续传或服务器回复 416）；是否完整由调用方按校验值判断。
+        """
+        offset = os.path.getsize(part) if os.path.exists(part) else 0
+        req = urllib.request.Request(url)
+        if offset:
+            req.add_header("Range", f"bytes={offset}-")
+        try:
+            response = urllib.request.urlopen(req, timeout=self.timeout)
+        except urllib.error.HTTPError as e:
+            # 416：服务器认为已下载完整
+            if e.code == 416 and offset:
+                return True
+            raise
+        with response:
+            status = getattr(response, "status", 200)
+            content_range = response.headers.get("Content-Range", "")
+            resumed = bool(offset) and status == 206 and content_range.startswith(f"bytes {offset}-")
+            if resumed:
+                print(f"从 {offset} 字节处继续下载...")
+            length = response.headers.get("Content-Length")
+            with open(part, "ab" if resumed else "wb") as out:
+                start = out.tell()
+                shutil.copyfileobj(response, out, CHUNK_SIZE)
+                received = out.tell() - start
+        # 连接中途断开时 read() 只会返回不足的数据而不报错：保留 part 供下次续传
+        if length is not None and received < int(length):
+            raise IOError(f"下载中断：收到 {received} / {length} 字节")
+        return resumed
+
+    # ---------- 加载 ----------
+
+    def load_buffer(self, name="hand_landmarker"):
+        """返回模型文件内容（bytes），进程内只读取一次。"""
+        with self.lock:
+            buf = self.buffers.get(name)
+            if buf is None:
+                path = self.resolve(name)
+                with open(path, "rb") as f:
+                    buf = f.read()
+                self.buffers[name] = buf
+            return buf
+
+
+# 模块级全局实例，多个检测器共享同一份模型缓冲区
+manager = ModelManager()
@@ -2,12 +2,131 @@
 MediaPipe Hands wrapper for compatibility with MediaPipe 0.10+
 Uses the tasks vision API
 """
+import time
 import cv2
 import numpy as np
+import mediapipe as mp
 from mediapipe.tasks import python
 from mediapipe.tasks.python import vision
 
 
+NUM_LANDMARKS = 21
+
+
+class Landmark:
+    """View of one landmark row in a preallocated float32 array."""
+    __slots__ = ('_arr', '_row')
+
+    def __init__(self, arr, row):
+        self._arr = arr
+        self._row = row
+
+    @property
+    def x(self):
+        return float(self._arr[self._row, 0])
+
+    @property
+    def y(self):
+        return float(self._arr[self._row, 1])
+
+    @property
+    def z(self):
+        return float(self._arr[self._row, 2])
+
+
+class LandmarkList:
+    """Solutions-style landmark list; `landmark` holds reusable Landmark views."""
+    __slots__ = ('landmark', 'array')
+
+    def __init__(self, arr):
+        self.array = arr  # (21, 3) float32 view
+        self.landmark = tuple(Landmark(arr, j) for j in range(arr.shape[0]))
+
+
+class Category:
+    """Mimics solutions' ClassificationList entry (label/score/index)."""
+    __slots__ = ('index', 'score', 'label')
+
+    def __init__(self):
+        self.index = 0
+        self.score = 0.0
+        self.label = ''
+
+
+class Classification:
+    __slots__ = ('classification',)
+
+    def __init__(self):
+        self.classification = (Category(),)
+
+
+class HandResults:
+    """
+    Compact result container backed by preallocated arrays.
+
+    Keeps the `.multi_hand_landmarks[i].landmark[j].x` access pattern while
+    avoiding per-frame object creation. `landmarks` has shape (max_hands, 21, 3).
+    """
+    __slots__ = ('landmarks', 'num_hands', 'timestamp_ms', 'multi_hand_landmarks',
+                 'multi_hand_world_landmarks', 'multi_handedness',
+                 '_lists', '_handedness', '_list_views', '_handedness_views')
+
+    def __init__(self, max_hands):
+        self.landmarks = np.zeros((max_hands, NUM_LANDMARKS, 3), dtype=np.float32)
+        self.num_hands = 0
+        self.timestamp_ms = 0
+        self._lists = [LandmarkList(self.landmarks[h]) for h in range(max_hands)]
+        self._handedness = [Classification() for _ in range(max_hands)]
+        # Prebuilt prefix lists so publishing n hands allocates nothing
+        self._list_views = [None] + [self._lists[:n] for n in range(1, max_hands + 1)]
+        self._handedness_views = [None] + [self._handedness[:n] for n in range(1, max_hands + 1)]
+        self.multi_hand_landmarks = None
+        self.multi_hand_world_landmarks = None
+        self.multi_handedness = None
+
+    def fill(self, result, timestamp_ms):
+        """Copy a tasks HandLandmarkerResult into the preallocated arrays."""
+        hands = result.hand_landmarks if result is not None else None
+        n = min(len(hands), len(self._lists)) if hands else 0
+        arr = self.landmarks
+        for h in range(n):
+            hand_arr = arr[h]
+            for j, lm in enumerate(hands[h]):
+                hand_arr[j, 0] = lm.x
+                hand_arr[j, 1] = lm.y
+                hand_arr[j, 2] = lm.z
+            category = self._handedness[h].classification[0]
+            handedness = result.handedness[h] if result.handedness and h < len(result.handedness) else None
+            if handedness:
+                category.index = handedness[0].index
+                category.score = handedness[0].score
+                category.label = handedness[0].category_name
+            else:
+                category.index, category.score, category.label = 0, 0.0, ''
+        self.num_hands = n
+        self.timestamp_ms = timestamp_ms
+        self.multi_hand_landmarks = self._list_views[n]
+        self.multi_handedness = self._handedness_views[n]
+        return self
+
+    def as_array(self):
+        """(num_hands, 21, 3) float32 view of the detected hands."""
+        return self.landmarks[:self.num_hands]
+
+    def copy_from(self, other):
+        """Copy another result into this preallocated one (no allocation)."""
+        n = other.num_hands
+        np.copyto(self.landmarks[:n], other.landmarks[:n])
+        for src, dst in zip(other._handedness[:n], self._handedness):
+            s, d = src.classification[0], dst.classification[0]
+            d.index, d.score, d.label = s.index, s.score, s.label
+        self.num_hands = n
+        self.timestamp_ms = other.timestamp_ms
+        self.multi_hand_landmarks = self._list_views[n]
+        self.multi_handedness = self._handedness_views[n]
+        return self
+
+
 class HandsWrapper:
     """Wrapper to provide solutions-like API for MediaPipe 0.10+"""
     
@@ -20,27 +139,24 @@ class HandsWrapper:
         (13, 17), (17, 18), (18, 19), (19, 20),  # Pinky
         (0, 17)  # Palm
     ])
+
+    # Results are recycled round-robin: a returned result is overwritten after
+    # RESULT_BUFFERS further process() calls. One detection frame may call
+    # process() several times (ROI fallback), so results are only safe for the
+    # caller's own frame; anything handed to other threads must be copied out
+    # (HandDetector publishes into its own double buffer via copy_from()).
+    RESULT_BUFFERS = 3
     
     def __init__(self, static_image_mode=False, max_num_hands=2,
                  min_detection_confidence=0.5, min_tracking_confidence=0.5):
         """Initialize hands detector with same params as old API"""
-        import os
-        import urllib.request
+        from model_manager import manager as model_manager
         
-        # Download model if not exists
-        model_path = 'hand_landmarker.task'
-        if not os.path.exists(model_path):
-            print("Downloading hand landmark model...")
-            model_url = 'https://storage.googleapis.com/mediapipe-models/hand_landmarker/hand_landmarker/float16/latest/hand_landmarker.task'
-            try:
-                urllib.request.urlretrieve(model_url, model_path)
-                print("Model downloaded successfully")
-            except Exception as e:
-                print(f"Failed to download model: {e}")
-                raise
+        # Model is resolved, verified and shared in memory by ModelManager
+        model_buffer = model_manager.load_buffer("hand_landmarker")
         
         # Use MediaPipe tasks vision API with VIDEO mode
-        base_options = python.BaseOptions(model_asset_path=model_path)
+        base_options = python.BaseOptions(model_asset_buffer=model_buffer)
         options = vision.HandLandmarkerOptions(
             base_options=base_options,
             running_mode=vision.RunningMode.VIDEO,  # Use VIDEO mode for better performance
@@ -51,49 +167,33 @@ class HandsWrapper:
         )
         
         self.detector = vision.HandLandmarker.create_from_options(options)
-        self.frame_counter = 0
+        self.last_timestamp_ms = -1
+        self.results = [HandResults(max_num_hands) for _ in range(self.RESULT_BUFFERS)]
+        self.result_idx = 0
     
-    def process(self, image):
-        """Process an RGB image and return hand landmarks"""
+    def process(self, image, timestamp_ms=None):
+        """
+        Process an RGB image and return hand landmarks.
+
+        timestamp_ms should be the frame's capture time in milliseconds; when
+        omitted a monotonic clock is used. VIDEO mode requires strictly
+        increasing timestamps, so non-increasing values are nudged forward.
+        """
         # Convert numpy array to MediaPipe Image
-        import mediapipe as mp
         mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=image)
         
-        # Detect hands (use frame timestamp for video mode)
-        self.frame_counter += 1
-        timestamp_ms = self.frame_counter * 33  # Assume ~30fps
+        if timestamp_ms is None:
+            timestamp_ms = time.monotonic() * 1000.0
+        timestamp_ms = int(timestamp_ms)
+        if timestamp_ms <= self.last_timestamp_ms:
+            timestamp_ms = self.last_timestamp_ms + 1
+        self.last_timestamp_ms = timestamp_ms
         result = self.detector.detect_for_video(mp_image, timestamp_ms)
         
-        # Convert result to solutions-like format
-        class Results:
-            def __init__(self):
-                self.multi_hand_landmarks = None
-                self.multi_hand_world_landmarks = None
-                self.multi_handedness = None
-        
-        results = Results()
-        
-        if result.hand_landmarks:
-            # Convert to landmark list format
-            results.multi_hand_landmarks = []
-            for hand_landmarks in result.hand_landmarks:
-                # Create a simple object to hold landmarks
-                class LandmarkList:
-                    def __init__(self):
-                        self.landmark = []
-                
-                landmark_list = LandmarkList()
-                for landmark in hand_landmarks:
-                    class Landmark:
-                        def __init__(self, x, y, z):
-                            self.x = x
-                            self.y = y
-                            self.z = z
-                    
-                    landmark_list.landmark.append(Landmark(landmark.x, landmark.y, landmark.z))
-                results.multi_hand_landmarks.append(landmark_list)
-        
-        return results
+        # Convert result into the next recycled buffer
+        results = self.results[self.result_idx]
+        self.result_idx = (self.result_idx + 1) % len(self.results)
+        return results.fill(result, timestamp_ms)
     
     def close(self):
         """Cleanup resources"""
@@ -161,8 +261,8 @@ class Hands:
     def __init__(self, **kwargs):
         self._hands = HandsWrapper(**kwargs)
     
-    def process(self, image):
-        return self._hands.process(image)
+    def process(self, image, timestamp_ms=None):
+        return self._hands.process(image, timestamp_ms)
     
     def close(self):
         self._hands.close()
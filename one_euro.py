@@ -0,0 +1,92 @@
+"""
+One Euro 滤波器 / One Euro filter
+
+OneEuroFilter 为标量版本；OneEuroFilterArray 以 NumPy 一次性平滑 (hands, 21, 3)
+整副骨架，alpha 逐元素向量化计算，开销与两个标量滤波器相当。
+"""
+import numpy as np
+
+
+def smoothing_factor(te, cutoff):
+    """alpha(cutoff) = 1 / (1 + tau/Te)，其中 tau = 1 / (2 * pi * cutoff)。"""
+    r = 2 * np.pi * cutoff * te
+    return r / (r + 1)
+
+
+class OneEuroFilter:
+    def __init__(self, t0, x0, min_cutoff=1.0, beta=0.0, d_cutoff=1.0):
+        """初始化 One Euro Filter。"""
+        self.t_prev = t0
+        self.x_prev = x0
+        self.dx_prev = 0.0
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+
+    def __call__(self, t, x):
+        """计算过滤后的值。"""
+        # 计算采样周期 Te
+        te = t - self.t_prev
+
+        # 计算速度 dx (使用低通滤波)
+        dx = (x - self.x_prev) / te if te > 0 else 0.0
+        alpha_d = smoothing_factor(te, self.d_cutoff)
+        dx_hat = alpha_d * dx + (1 - alpha_d) * self.dx_prev
+
+        # 计算自适应截止频率 cutoff 与主滤波器的 alpha
+        cutoff = self.min_cutoff + self.beta * abs(dx_hat)
+        alpha = smoothing_factor(te, cutoff)
+
+        # 计算最终滤波值
+        x_hat = alpha * x + (1 - alpha) * self.x_prev
+
+        # 更新状态
+        self.t_prev = t
+        self.x_prev = x_hat
+        self.dx_prev = dx_hat
+
+        return x_hat
+
+
+class OneEuroFilterArray:
+    """
+    对形如 (n, ...) 的数组逐元素做 One Euro 滤波，第一维为独立的通道（如每只手）。
+
+    每个通道有自己的时间戳；调用时可只更新部分通道。
+    """
+
+    def __init__(self, shape, min_cutoff=1.0, beta=0.0, d_cutoff=1.0, reset_gap=1.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.reset_gap = reset_gap  # 间隔超过该秒数（如检测丢失后恢复）时重置
+        self.x_prev = np.zeros(shape, dtype=np.float64)
+        self.dx_prev = np.zeros(shape, dtype=np.float64)
+        self.t_prev = np.zeros(shape[0], dtype=np.float64)
+        self.initialized = np.zeros(shape[0], dtype=bool)
+        self._bcast = (slice(None),) + (None,) * (len(shape) - 1)
+
+    def reset(self, idx):
+        self.initialized[idx] = False
+
+    def __call__(self, t, x, idx):
+        """用时间 t（标量或逐通道数组）和观测 x 更新通道 idx，返回滤波结果。"""
+        t = np.broadcast_to(np.asarray(t, dtype=np.float64), (len(idx),))
+        te = t - self.t_prev[idx]
+        reset = ~self.initialized[idx] | (te <= 0) | (te > self.reset_gap)
+        te_b = np.where(reset, 1.0, te)[self._bcast]
+
+        x_prev = self.x_prev[idx]
+        dx = (x - x_prev) / te_b
+        alpha_d = smoothing_factor(te_b, self.d_cutoff)
+        dx_hat = alpha_d * dx + (1 - alpha_d) * self.dx_prev[idx]
+        alpha = smoothing_factor(te_b, self.min_cutoff + self.beta * np.abs(dx_hat))
+        x_hat = alpha * x + (1 - alpha) * x_prev
+
+        reset_b = reset[self._bcast]
+        x_hat = np.where(reset_b, x, x_hat)
+        self.x_prev[idx] = x_hat
+        self.dx_prev[idx] = np.where(reset_b, 0.0, dx_hat)
+        self.t_prev[idx] = t
+        self.initialized[idx] = True
+        return x_hat
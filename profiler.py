@@ -0,0 +1,132 @@
+"""
+按需采样分析器 / On-demand sampling profiler
+
+后台线程定期通过 sys._current_frames() 抓取检测线程、游戏线程和视频流线程的调用栈，
+按线程汇总为折叠栈（collapsed stack）格式，可直接喂给 flamegraph.pl / speedscope。
+默认关闭，运行时可随时开关，关闭时没有任何开销。
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+# 采样间隔范围（秒）：过小的间隔会让采样线程空转占满 CPU
+MIN_INTERVAL = 0.001
+MAX_INTERVAL = 1.0
+
+# 被分析的线程入口函数 -> 线程标签
+DEFAULT_TARGETS = {
+    "_detection_loop": "detection",
+    "game_loop": "game",
+    "generate_frames": "stream",
+    "capture_worker": "stream",
+}
+
+
+class SamplingProfiler:
+    def __init__(self, interval=0.005, targets=None, max_depth=64):
+        self.interval = interval
+        self.targets = dict(targets or DEFAULT_TARGETS)
+        self.max_depth = max_depth
+        self.lock = threading.Lock()
+        self.stacks = {}  # 线程标签 -> Counter(折叠栈 -> 样本数)
+        self.samples = 0
+        self.started_at = None
+        self.is_running = False
+        self.thread = None
+
+    def start(self, interval=None):
+        """开始采样；已在运行时返回 False。interval 限制在 [MIN_INTERVAL, MAX_INTERVAL]，非数值抛出 ValueError。"""
+        if self.is_running:
+            return False
+        if interval:
+            self.interval = min(MAX_INTERVAL, max(MIN_INTERVAL, float(interval)))
+        self.is_running = True
+        self.started_at = time.time()
+        self.thread = threading.Thread(target=self._sample_loop, name="SamplingProfiler", daemon=True)
+        self.thread.start()
+        return True
+
+    def stop(self):
+        """停止采样，已采集数据保留到下一次 reset/start。"""
+        if not self.is_running:
+            return False
+        self.is_running = False
+        if self.thread:
+            self.thread.join(timeout=1.0)
+            self.thread = None
+        return True
+
+    def reset(self):
+        with self.lock:
+            self.stacks = {}
+            self.samples = 0
+
+    def status(self):
+        with self.lock:
+            per_thread = {label: sum(c.values()) for label, c in self.stacks.items()}
+        return {
+            "running": self.is_running,
+            "interval": self.interval,
+            "samples": self.samples,
+            "threads": per_thread,
+            "duration": (time.time() - self.started_at) if self.started_at else 0.0,
+        }
+
+    def collapsed(self, label=None):
+        """返回折叠栈文本；指定 label 时只输出该线程，否则按 "标签;栈" 合并输出。"""
+        with self.lock:
+            items = {k: dict(v) for k, v in self.stacks.items()}
+        lines = []
+        for thread_label, counter in sorted(items.items()):
+            # label 可以是完整线程标签，也可以只写 detection/game/stream
+            if label and thread_label != label and not thread_label.startswith(label + "["):
+                continue
+            for stack, count in sorted(counter.items(), key=lambda kv: -kv[1]):
+                prefix = "" if label else f"{thread_label};"
+                lines.append(f"{prefix}{stack} {count}")
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def _sample_loop(self):
+        own_ident = threading.get_ident()
+        while self.is_running:
+            t0 = time.perf_counter()
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                label, stack = self._collapse(frame)
+                if label is None:
+                    continue
+                thread_label = f"{label}[{names.get(ident, ident)}]"
+                with self.lock:
+                    counter = self.stacks.get(thread_label)
+                    if counter is None:
+                        counter = self.stacks[thread_label] = Counter()
+                    counter[stack] += 1
+            self.samples += 1
+            # 扣除本次采样自身耗时，保持采样间隔稳定
+            elapsed = time.perf_counter() - t0
+            time.sleep(max(0.0, self.interval - elapsed))
+
+    def _collapse(self, frame):
+        """把帧链折叠成 "root;...;leaf"，并识别所属目标线程。"""
+        names = []
+        label = None
+        depth = 0
+        while frame is not None and depth < self.max_depth:
+            code = frame.f_code
+            if label is None and code.co_name in self.targets:
+                label = self.targets[code.co_name]
+            names.append(f"{code.co_name} ({os.path.basename(code.co_filename)})")
+            frame = frame.f_back
+            depth += 1
+        if label is None:
+            return None, None
+        names.reverse()
+        return label, ";".join(names)
+
+
+# 模块级全局实例
+profiler = SamplingProfiler()
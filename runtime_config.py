@@ -0,0 +1,236 @@
+"""
+运行时性能预设 / Runtime performance presets
+
+config.py 中的常量只作为启动默认值；运行中可调整的性能参数集中保存在 settings 对象里，
+可按名称切换预设（low-power / balanced / low-latency / high-accuracy）或单独修改某项，
+无需重启。
+
+各线程的生效方式：
+  - 编码线程与游戏循环每帧 / 每 tick 直接读取 settings（整份取值字典写时复制，读取无需加锁）；
+  - 摄像头与检测器通过 subscribe() 注册回调，回调只登记新值，
+    由各自的线程在帧边界统一生效（检测分辨率变化时重建跟踪器，见 HandDetector.apply_settings）。
+
+本机的持久覆盖（预设名、download_model.py 选择的推理后端等）保存在 local_settings.json，
+启动时叠加在预设之上，不再改写 config.py。
+"""
+import json
+import os
+import threading
+
+import config
+
+# 可调参数：名称 -> (类型, 最小值, 最大值)；最小/最大值为 None 表示不限制
+RUNTIME_KEYS = {
+    "detection_width": (int, 64, 1280),
+    "detection_height": (int, 36, 720),
+    "detection_pad": (int, 0, 128),
+    "jpeg_quality": (int, 10, 100),
+    "tick_rate": (int, 1, 120),
+    "roi_enable": (bool, None, None),
+    "roi_expand": (float, 1.0, 4.0),
+    "min_cutoff": (float, 0.01, 10.0),
+    "beta": (float, 0.0, 1.0),
+    "lighting_enhance": (bool, None, None),
+    "camera_fps": (int, 1, 120),
+}
+
+# 只在启动时读取的参数（修改后需重启），只能通过 local_settings.json 覆盖
+STARTUP_KEYS = {
+    "hand_backend": (str, None, None),
+    "tasks_model_path": (str, None, None),
+}
+
+
+def config_defaults():
+    """由 config.py 常量得到的默认值（即 balanced 预设）。"""
+    return {
+        "detection_width": config.DETECTION_WIDTH,
+        "detection_height": config.DETECTION_HEIGHT,
+        "detection_pad": getattr(config, "DETECTION_PAD", 0),
+        "jpeg_quality": getattr(config, "JPEG_QUALITY", 85),
+        "tick_rate": getattr(config, "GAME_TICK_RATE", 30),
+        "roi_enable": True,
+        "roi_expand": 1.8,
+        "min_cutoff": 0.5,
+        "beta": 0.005,
+        "lighting_enhance": getattr(config, "LIGHTING_ENHANCE", True),
+        "camera_fps": getattr(config, "CAMERA_FPS", 30),
+        "hand_backend": getattr(config, "HAND_BACKEND", "SOLUTIONS"),
+        "tasks_model_path": getattr(config, "TASKS_MODEL_PATH", ""),
+    }
+
+
+# 预设只列出与 config.py 默认值不同的项
+PRESETS = {
+    # 省电：小检测分辨率、低采集帧率与推送频率，关闭 ROI 重检与光照增强
+    "low-power": {
+        "detection_width": 256, "detection_height": 144, "detection_pad": 16,
+        "jpeg_quality": 70, "tick_rate": 20, "camera_fps": 15,
+        "roi_enable": False, "lighting_enhance": False,
+    },
+    "balanced": {},
+    # 低延迟：小检测分辨率、高采集帧率与推送频率，滤波更偏向响应速度；
+    # ROI 重检会在同一帧上追加一次推理，关闭以缩短单帧耗时
+    "low-latency": {
+        "detection_width": 256, "detection_height": 144, "detection_pad": 16,
+        "jpeg_quality": 75, "tick_rate": 60, "camera_fps": 60,
+        "roi_enable": False, "min_cutoff": 1.0, "beta": 0.01,
+    },
+    # 高精度：大检测分辨率、ROI 放大重检，滤波更平滑
+    "high-accuracy": {
+        "detection_width": 480, "detection_height": 270, "detection_pad": 32,
+        "jpeg_quality": 90, "roi_expand": 2.0, "min_cutoff": 0.3, "beta": 0.003,
+    },
+}
+
+
+def coerce(key, value, specs=None):
+    """按参数定义转换类型并限制范围；未知参数抛出 KeyError，非法值抛出 ValueError。"""
+    specs = specs or RUNTIME_KEYS
+    kind, lo, hi = specs[key]
+    if kind is bool:
+        if isinstance(value, str):
+            value = value.strip().lower() in ("1", "true", "yes", "on")
+        return bool(value)
+    value = kind(value)
+    if lo is not None:
+        value = max(lo, value)
+    if hi is not None:
+        value = min(hi, value)
+    return value
+
+
+class RuntimeConfig:
+    def __init__(self, preset=None, local_path=None):
+        self.local_path = local_path if local_path is not None else getattr(
+            config, "LOCAL_SETTINGS_PATH", "local_settings.json")
+        self.lock = threading.Lock()
+        self.listeners = []
+        self.version = 0
+        self.reload(preset)
+
+    def reload(self, preset=None):
+        """按 config.py、预设与本机设置重新计算全部取值（启动阶段使用，不通知订阅者）。"""
+        local = self.load_local()
+        name = preset or local.get("preset") or getattr(config, "PERFORMANCE_PRESET", "balanced")
+        if name not in PRESETS:
+            print(f"警告：未知的性能预设 {name}，使用 balanced")
+            name = "balanced"
+
+        values = config_defaults()
+        values.update(PRESETS[name])
+        specs = dict(RUNTIME_KEYS, **STARTUP_KEYS)
+        for key, value in local.get("overrides", {}).items():
+            if key in specs:
+                values[key] = coerce(key, value, specs)
+        with self.lock:
+            self.preset = name
+            # 整份字典写时复制：读取方拿到的始终是某一版完整、一致的取值
+            self.values = values
+
+    def __getattr__(self, name):
+        values = self.__dict__.get("values")
+        if values is not None and name in values:
+            return values[name]
+        raise AttributeError(name)
+
+    def snapshot(self):
+        """当前取值（只读，不要修改返回的字典）。"""
+        return self.values
+
+    def subscribe(self, callback):
+        """注册变化回调 callback(values)；在修改设置的线程中调用，回调内只应登记新值。"""
+        self.listeners.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self.listeners:
+            self.listeners.remove(callback)
+
+    def apply_preset(self, name):
+        """
+        切换到命名预设，返回发生变化的参数。
+
+        以 config.py 默认值叠加本机覆盖为基础：与 save_local 一致，只有预设自身定义的参数
+        取预设值，预设未涉及的本机覆盖（例如标定得到的滤波参数）保留。
+        """
+        if name not in PRESETS:
+            raise KeyError(f"未知的性能预设：{name}")
+        defaults = config_defaults()
+        values = {key: defaults[key] for key in RUNTIME_KEYS}
+        for key, value in self.load_local().get("overrides", {}).items():
+            if key in RUNTIME_KEYS:
+                values[key] = coerce(key, value)
+        values.update(PRESETS[name])
+        return self._commit(values, name)
+
+    def update(self, **values):
+        """单独修改若干运行时参数（预设名变为 custom），返回发生变化的参数。"""
+        unknown = [key for key in values if key not in RUNTIME_KEYS]
+        if unknown:
+            raise KeyError(f"不支持运行时修改的参数：{', '.join(unknown)}")
+        return self._commit({key: coerce(key, value) for key, value in values.items()}, "custom")
+
+    def _commit(self, values, preset):
+        with self.lock:
+            new_values = dict(self.values)
+            new_values.update(values)
+            changed = {key: value for key, value in new_values.items() if self.values.get(key) != value}
+            self.values = new_values
+            self.preset = preset
+            self.version += 1
+            listeners = list(self.listeners)
+        if changed:
+            print(f"运行时设置已更新（{preset}）：{changed}")
+            for callback in listeners:
+                try:
+                    callback(new_values)
+                except Exception as e:
+                    print(f"应用运行时设置失败：{e}")
+        return changed
+
+    def status(self):
+        return {"preset": self.preset, "presets": list(PRESETS), "version": self.version,
+                "values": dict(self.values)}
+
+    # ---------- 本机持久设置 ----------
+
+    def load_local(self):
+        if not self.local_path or not os.path.exists(self.local_path):
+            return {}
+        try:
+            with open(self.local_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"警告：无法读取 {self.local_path}：{e}")
+            return {}
+
+    def save_local(self, preset=None, calibration=None, **overrides):
+        """
+        把预设名、标定记录与参数覆盖合并写入 local_settings.json，下次启动生效。
+
+        保存预设时清除该预设自身定义的参数的旧覆盖（例如自动标定写入的检测分辨率），
+        否则下次启动时旧覆盖会叠加在预设之上；本次一并传入的 overrides 仍然生效。
+        """
+        specs = dict(RUNTIME_KEYS, **STARTUP_KEYS)
+        data = self.load_local()
+        stored = data.setdefault("overrides", {})
+        if preset is not None:
+            data["preset"] = preset
+            for key in PRESETS.get(preset, {}):
+                stored.pop(key, None)
+        if calibration is not None:
+            data["calibration"] = calibration
+        for key, value in overrides.items():
+            stored[key] = coerce(key, value, specs)
+        with open(self.local_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        return data
+
+    def shadowed_overrides(self):
+        """本机设置中会在下次启动时叠加在已保存预设之上的运行时参数覆盖。"""
+        return {key: value for key, value in self.load_local().get("overrides", {}).items()
+                if key in RUNTIME_KEYS}
+
+
+# 全局运行时设置
+settings = RuntimeConfig()
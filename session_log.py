@@ -0,0 +1,230 @@
+"""
+会话输入日志与确定性重放 / Session input log and deterministic replay
+
+录制：每个游戏 tick 记录一行紧凑的 JSON 数组（gzip 压缩）：
+    [时间增量 ms, 目标 x, 目标 y, 手势编码, [游戏操作...], 校验和]
+末尾为空的字段省略；校验和每 checksum_every 个 tick 记录一次。
+首行为头部：版本、随机种子（spawn_food 使用）、画面尺寸等。
+运行中修改的游戏参数（如切换性能预设后的 tail_smooth）记为一行对象 {"名称": 值}，
+在下一个 tick 之前生效。
+
+重放：按记录的时间增量推进虚拟时钟，把输入逐 tick 送回 SnakeGame，
+可按任意倍速或尽可能快地运行，并沿途校验状态校验和。
+
+    python session_log.py replay sessions/session-20250101-120000.jsonl.gz
+    python session_log.py replay <log> --speed 1      # 实时速度
+    python session_log.py replay <log> --profile      # 用 cProfile 分析重放
+"""
+import argparse
+import gzip
+import json
+import os
+import time
+
+import config
+from snake_game import SnakeGame
+
+LOG_VERSION = 2
+SUPPORTED_VERSIONS = (1, 2)
+
+# 可在会话中途修改、需要记录的游戏参数
+SETTING_KEYS = ("tail_smooth",)
+
+# 手势与游戏操作的紧凑编码
+GESTURES = (
+    config.GESTURE_NONE,
+    config.GESTURE_UP,
+    config.GESTURE_DOWN,
+    config.GESTURE_LEFT,
+    config.GESTURE_RIGHT,
+    config.GESTURE_PAUSE,
+    config.GESTURE_RESTART,
+)
+GESTURE_CODES = {g: i for i, g in enumerate(GESTURES)}
+ACTIONS = ("restart", "pause", "resume", "exit")
+ACTION_CODES = {a: i for i, a in enumerate(ACTIONS)}
+
+# 目标坐标量化精度（归一化坐标的小数位数），实时与重放使用同一个量化值
+TARGET_DIGITS = 5
+
+
+def quantize_target(finger_pos):
+    if not finger_pos:
+        return None
+    return (round(float(finger_pos[0]), TARGET_DIGITS), round(float(finger_pos[1]), TARGET_DIGITS))
+
+
+class TickClock:
+    """整数毫秒的 tick 时钟：每个 tick 开始时推进一次，tick 内读数不变。"""
+
+    def __init__(self, now_ms=0):
+        self.now_ms = now_ms
+
+    def tick(self, now_ms=None):
+        """推进到 now_ms（默认为当前时间），返回与上一 tick 的增量。"""
+        now_ms = int(round(time.time() * 1000)) if now_ms is None else int(now_ms)
+        dt = now_ms - self.now_ms if self.now_ms else 0
+        self.now_ms = now_ms
+        return dt
+
+    def __call__(self):
+        return self.now_ms
+
+
+class SessionRecorder:
+    def __init__(self, game, path=None, directory=None, checksum_every=30, flush_every=60):
+        directory = directory or getattr(config, "SESSION_LOG_DIR", "sessions")
+        if path is None:
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, time.strftime("session-%Y%m%d-%H%M%S.jsonl.gz"))
+        self.path = path
+        self.checksum_every = checksum_every
+        self.flush_every = flush_every
+        self.ticks = 0
+        self.file = gzip.open(path, "wt", encoding="utf-8")
+        header = {
+            "version": LOG_VERSION,
+            "seed": game.seed,
+            "camera": [config.CAMERA_WIDTH, config.CAMERA_HEIGHT],
+            "control_mode": game.control_mode,
+            "tail_smooth": game.tail_smooth,
+            "checksum_every": checksum_every,
+            "started": time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        self.file.write(json.dumps(header, separators=(",", ":")) + "\n")
+        print(f"会话日志：{path}")
+
+    def record(self, dt, target, gesture, actions, game):
+        """记录一个已执行完毕的 tick。"""
+        row = [dt, target[0] if target else None, target[1] if target else None,
+               GESTURE_CODES.get(gesture, 0)]
+        self.ticks += 1
+        codes = [ACTION_CODES[a] for a in actions if a in ACTION_CODES]
+        checksum = game.checksum() if self.ticks % self.checksum_every == 0 else None
+        if codes or checksum is not None:
+            row.append(codes)
+        if checksum is not None:
+            row.append(checksum)
+        self.file.write(json.dumps(row, separators=(",", ":")) + "\n")
+        # 定期同步刷新，进程异常退出时日志仍可读到最近的位置
+        if self.ticks % self.flush_every == 0:
+            self.file.flush()
+
+    def record_setting(self, name, value):
+        """记录一次游戏参数修改，重放时在下一个 tick 之前生效。"""
+        self.file.write(json.dumps({name: value}, separators=(",", ":")) + "\n")
+
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+
+
+def read_log(path):
+    """逐行读取日志，返回 (header, 行迭代器)；截断的 gzip 尾部会被忽略。"""
+    f = gzip.open(path, "rt", encoding="utf-8")
+    header = json.loads(f.readline())
+
+    def rows():
+        try:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+        except (EOFError, ValueError):
+            pass  # 未正常关闭的日志：读到最后一个完整的 tick
+        finally:
+            f.close()
+
+    return header, rows()
+
+
+def replay(path, speed=None, verify=True, on_tick=None):
+    """
+    重放会话日志。
+
+    speed 为 None 时尽可能快地运行，否则按 speed 倍速等待记录的时间增量。
+    返回统计 {ticks, checked, mismatches, first_mismatch, sim_ms, wall_s, score, state}。
+    """
+    header, rows = read_log(path)
+    if header.get("version") not in SUPPORTED_VERSIONS:
+        raise ValueError(f"不支持的日志版本：{header.get('version')}")
+    if tuple(header.get("camera", ())) != (config.CAMERA_WIDTH, config.CAMERA_HEIGHT):
+        print(f"警告：日志画面尺寸 {header.get('camera')} 与当前配置不同，校验可能失败")
+
+    clock = TickClock(now_ms=1)
+    game = SnakeGame(seed=header["seed"], clock=clock)
+    game.control_mode = header.get("control_mode", game.control_mode)
+    game.tail_smooth = header.get("tail_smooth", game.tail_smooth)
+
+    stats = {"ticks": 0, "checked": 0, "mismatches": 0, "first_mismatch": None}
+    sim_ms = 0
+    t0 = time.perf_counter()
+    for row in rows:
+        if isinstance(row, dict):
+            for name, value in row.items():
+                if name in SETTING_KEYS:
+                    setattr(game, name, value)
+            continue
+        dt, x, y, gesture_code = row[:4]
+        codes = row[4] if len(row) > 4 else []
+        expected = row[5] if len(row) > 5 else None
+
+        sim_ms += dt
+        clock.tick(clock.now_ms + dt)
+        if speed:
+            target_wall = t0 + sim_ms / 1000.0 / speed
+            delay = target_wall - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+        for code in codes:
+            game.apply_action(ACTIONS[code])
+        target = (x, y) if x is not None else None
+        game.step(target, GESTURES[gesture_code])
+        stats["ticks"] += 1
+
+        if verify and expected is not None:
+            stats["checked"] += 1
+            if game.checksum() != expected:
+                stats["mismatches"] += 1
+                if stats["first_mismatch"] is None:
+                    stats["first_mismatch"] = stats["ticks"]
+        if on_tick:
+            on_tick(game, stats["ticks"])
+
+    stats.update(sim_ms=sim_ms, wall_s=time.perf_counter() - t0, score=game.score, state=game.state)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="手势贪吃蛇会话日志重放")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_replay = sub.add_parser("replay", help="重放并校验会话日志")
+    p_replay.add_argument("path")
+    p_replay.add_argument("--speed", type=float, default=None, help="倍速（默认尽可能快）")
+    p_replay.add_argument("--no-verify", action="store_true", help="不校验状态校验和")
+    p_replay.add_argument("--profile", action="store_true", help="用 cProfile 分析重放过程")
+    args = parser.parse_args()
+
+    if args.profile:
+        import cProfile
+        import pstats
+        profile = cProfile.Profile()
+        stats = profile.runcall(replay, args.path, args.speed, not args.no_verify)
+        pstats.Stats(profile).sort_stats("cumulative").print_stats(25)
+    else:
+        stats = replay(args.path, args.speed, not args.no_verify)
+
+    print(f"重放 {stats['ticks']} 个 tick（游戏时间 {stats['sim_ms'] / 1000:.1f} s，"
+          f"耗时 {stats['wall_s']:.2f} s），最终分数 {stats['score']}，状态 {stats['state']}")
+    if stats["checked"]:
+        if stats["mismatches"]:
+            print(f"校验失败：{stats['mismatches']}/{stats['checked']} 个校验点不一致，"
+                  f"首次出现在第 {stats['first_mismatch']} 个 tick")
+            raise SystemExit(1)
+        print(f"校验通过：{stats['checked']} 个校验点一致")
+
+
+if __name__ == "__main__":
+    main()
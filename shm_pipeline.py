@@ -0,0 +1,465 @@
+"""
+共享内存多进程流水线 / Shared-memory multi-process pipeline
+
+可选部署模式（config.MULTIPROCESS_PIPELINE = True）：
+  - 采集进程：读摄像头、预处理（缩放 + 填充），分别写入全尺寸帧环与检测帧环；
+  - 检测进程：从检测帧环取最新帧，运行 HandDetector.process_frame，把结果写入关键点板；
+  - Web/游戏进程（app.py 主进程）：通过 SharedCamera / SharedDetector 代理读取，
+    MJPEG 编码、游戏循环与 Socket.IO 推送不再与推理争抢同一个 GIL。
+
+帧通过 multiprocessing.shared_memory 中固定大小的槽位环传递，每个槽位带序号（写入中为 -1），
+读端在拷贝前后各检查一次序号（seqlock），因此进程间从不序列化帧数据。
+关键点与手势事件写入一块小的共享 float64 数组，同样以版本号保证读取一致。
+
+注意：每个进程各自维护 metrics，主进程的 /metrics 只包含采集代理、游戏与推送阶段。
+空闲调速（idle_governor.py）只在主进程内评估：主进程把检测的最小间隔写入关键点板，
+检测进程据此跳过未到期的帧；检测进程看到手或手势时递增板上的活动计数，主进程读到后恢复全速。
+运行时性能预设（runtime_config.py）只在主进程内热切换：编码质量与 tick 频率立即生效，
+检测与采集参数在子进程中保持启动时的取值。
+"""
+import multiprocessing as mp
+import threading
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import config
+from camera_manager import Frame, NO_FRAME, detection_geometry
+from idle_governor import governor
+from metrics import metrics
+
+FRAME_SLOTS = 4
+EVENT_CAPACITY = 32
+NUM_LANDMARKS = 21
+
+# 关键点板中的编码
+HANDEDNESS_CODES = {"": 0, "Left": 1, "Right": 2}
+HANDEDNESS_NAMES = {v: k for k, v in HANDEDNESS_CODES.items()}
+EVENT_KINDS = ("start", "end")
+
+
+def detection_shape():
+    # 各进程按同一份启动设置（config.py + local_settings.json）得到相同的检测帧几何；
+    # 帧环大小固定，运行中切换预设不改变多进程模式下的检测分辨率
+    width, height, pad = detection_geometry()
+    return (height + 2 * pad, width + 2 * pad, 3)
+
+
+def camera_shape():
+    return (config.CAMERA_HEIGHT, config.CAMERA_WIDTH, 3)
+
+
+class FrameRing:
+    """固定大小槽位的共享内存帧环：单写多读，读端只取最新帧。"""
+
+    def __init__(self, shape, slots=FRAME_SLOTS, name=None, create=False):
+        self.shape = tuple(shape)
+        self.slots = slots
+        frame_bytes = int(np.prod(self.shape))
+        header = 8 + slots * 16
+        size = header + slots * frame_bytes
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=size if create else 0)
+        self.name = self.shm.name
+        buf = self.shm.buf
+        self.latest = np.ndarray((1,), dtype=np.int64, buffer=buf, offset=0)
+        # 每个槽位：(序号, 采集时间戳 ms)；序号 -1 表示写入中
+        self.meta = np.ndarray((slots, 2), dtype=np.float64, buffer=buf, offset=8)
+        self.frames = np.ndarray((slots,) + self.shape, dtype=np.uint8, buffer=buf, offset=header)
+        if create:
+            self.latest[0] = 0
+            self.meta[:] = -1
+
+    def write(self, image, seq, capture_ts):
+        idx = seq % self.slots
+        self.meta[idx, 0] = -1
+        self.frames[idx] = image
+        self.meta[idx, 1] = capture_ts
+        self.meta[idx, 0] = seq
+        self.latest[0] = seq
+
+    def latest_seq(self):
+        return int(self.latest[0])
+
+    def read(self, after=0):
+        """读取序号大于 after 的最新帧，返回 Frame；没有新帧或读取期间被覆盖时返回 None。"""
+        seq = int(self.latest[0])
+        if seq <= after:
+            return None
+        idx = seq % self.slots
+        if self.meta[idx, 0] != seq:
+            return None
+        image = self.frames[idx].copy()
+        capture_ts = float(self.meta[idx, 1])
+        if self.meta[idx, 0] != seq:
+            return None
+        return Frame(image, seq, capture_ts)
+
+    def close(self, unlink=False):
+        # 先释放 numpy 视图，否则 SharedMemory.close 会报 BufferError
+        self.latest = self.meta = self.frames = None
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+class LandmarkBoard:
+    """
+    检测结果共享板（float64 数组）。
+
+    布局：头部 [版本, 帧序号, 采集时间戳, 主手势, 指尖 x, 指尖 y, 有指尖, 手数, 事件总数,
+                活动计数, 检测最小间隔（秒，主进程写入）]
+          + 每只手 [ID, 左右手, 手势, 指尖 x, 指尖 y, 可见, bbox x/y/w/h, 21 x 2 关键点]
+          + 事件环 [轨迹 ID, 类型, 手势, 时间]
+    写端把版本号置为奇数后写入、完成后置为偶数；读端版本号不变才算一次有效读取。
+    检测最小间隔是唯一由主进程写入的字段，检测进程只读取它，不在版本号保护之内。
+    """
+
+    HEADER = 11
+    ACTIVITY = 9
+    DETECTION_INTERVAL = 10
+    HAND_FIELDS = 10 + NUM_LANDMARKS * 2
+    EVENT_FIELDS = 4
+
+    def __init__(self, max_hands, name=None, create=False):
+        self.max_hands = max_hands
+        self.size = self.HEADER + max_hands * self.HAND_FIELDS + EVENT_CAPACITY * self.EVENT_FIELDS
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=self.size * 8 if create else 0)
+        self.name = self.shm.name
+        self.data = np.ndarray((self.size,), dtype=np.float64, buffer=self.shm.buf)
+        self.hands_view = self.data[self.HEADER:self.HEADER + max_hands * self.HAND_FIELDS].reshape(
+            max_hands, self.HAND_FIELDS)
+        self.events_view = self.data[self.HEADER + max_hands * self.HAND_FIELDS:].reshape(
+            EVENT_CAPACITY, self.EVENT_FIELDS)
+        if create:
+            self.data[:] = 0
+            self.data[1] = -1
+
+    # ---------- 写端（检测进程） ----------
+
+    def publish(self, gesture, finger, hands, frame_meta, events):
+        from gesture_debouncer import GESTURE_CODES
+        d = self.data
+        d[0] += 1  # 奇数：写入中
+        seq, capture_ts = frame_meta
+        d[1] = seq if seq is not None else -1
+        d[2] = capture_ts if capture_ts is not None else 0
+        d[3] = GESTURE_CODES.get(gesture, 0)
+        if finger is not None:
+            d[4], d[5], d[6] = finger[0], finger[1], 1
+        else:
+            d[6] = 0
+        n = min(len(hands), self.max_hands)
+        d[7] = n
+        # 看到手或手势：递增活动计数，主进程的调速器据此恢复全速（与 HandDetector 的判断一致）
+        if gesture != config.GESTURE_NONE or any(hand["visible"] for hand in hands):
+            d[self.ACTIVITY] += 1
+        for i, hand in enumerate(hands[:n]):
+            row = self.hands_view[i]
+            row[0] = hand["id"]
+            row[1] = HANDEDNESS_CODES.get(hand["handedness"], 0)
+            row[2] = GESTURE_CODES.get(hand["gesture"], 0)
+            row[3], row[4] = hand["finger"]
+            row[5] = 1 if hand["visible"] else 0
+            row[6:10] = hand["bbox"]
+            row[10:] = np.asarray(hand["landmarks"], dtype=np.float64).ravel()
+        for track_id, kind, event_gesture, t in events:
+            count = int(d[8])
+            self.events_view[count % EVENT_CAPACITY] = (
+                track_id, EVENT_KINDS.index(kind), GESTURE_CODES.get(event_gesture, 0), t)
+            d[8] = count + 1
+        d[0] += 1  # 偶数：写入完成
+
+    def detection_interval(self):
+        return float(self.data[self.DETECTION_INTERVAL])
+
+    # ---------- 读端（Web/游戏进程） ----------
+
+    def set_detection_interval(self, seconds):
+        self.data[self.DETECTION_INTERVAL] = seconds
+
+    def snapshot(self, retries=10):
+        """返回一致的数组拷贝；连续多次遇到写入中时返回最后一次拷贝。"""
+        data = self.data.copy()
+        for _ in range(retries):
+            v1 = self.data[0]
+            data = self.data.copy()
+            if v1 % 2 == 0 and self.data[0] == v1:
+                break
+            time.sleep(0.0002)
+        return data
+
+    def close(self, unlink=False):
+        self.data = self.hands_view = self.events_view = None
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+# ---------- 子进程入口 ----------
+
+def _capture_main(frame_name, detect_name, stop, ready, failed):
+    from camera_manager import preprocess_for_detection
+    from camera_supervisor import CameraSupervisor, camera_sources
+    frame_ring = FrameRing(camera_shape(), name=frame_name)
+    detect_ring = FrameRing(detection_shape(), name=detect_name)
+    # 读帧失败的退避与重开在采集进程内完成（健康状态只记录在本进程日志中）
+    cam = CameraSupervisor(camera_sources())
+    if not cam.start():
+        failed.set()
+        return
+    ready.set()
+    try:
+        while not stop.is_set():
+            captured = cam.read_frame_stamped()
+            if captured.image is None:
+                continue  # 监护器已按退避时间等待
+            frame_ring.write(captured.image, captured.seq, captured.capture_ts)
+            detect_ring.write(preprocess_for_detection(captured.image), captured.seq, captured.capture_ts)
+    finally:
+        cam.release()
+        frame_ring.close()
+        detect_ring.close()
+
+
+def _detection_main(detect_name, board_name, max_hands, stop, ready, failed):
+    detect_ring = FrameRing(detection_shape(), name=detect_name)
+    board = LandmarkBoard(max_hands, name=board_name)
+    try:
+        from hand_detector import HandDetector
+        detector = HandDetector()
+        detector.warmup()
+    except Exception as e:
+        print(f"检测进程初始化失败：{e}")
+        failed.set()
+        return
+    ready.set()
+    last_seq = 0
+    last_admitted_ts = None
+    try:
+        while not stop.is_set():
+            captured = detect_ring.read(last_seq) if detector.can_submit() else None
+            if captured is None:
+                time.sleep(0.002)
+                continue
+            last_seq = captured.seq
+            # 空闲时降低检测频率：间隔由主进程的调速器给出（见 HandDetector.update_frame）
+            interval = board.detection_interval()
+            if interval and last_admitted_ts is not None and captured.capture_ts - last_admitted_ts < interval * 1000:
+                metrics.inc("frames_idle_skipped")
+                continue
+            last_admitted_ts = captured.capture_ts
+            detector.process_frame(captured.image, (captured.seq, captured.capture_ts))
+            _, gesture = detector.get_results()
+            board.publish(gesture, detector.get_finger_position(), detector.get_hands(),
+                          detector.get_frame_meta(), detector.get_gesture_events())
+    finally:
+        detect_ring.close()
+        board.close()
+
+
+# ---------- 主进程代理 ----------
+
+class _ProcessComponent:
+    def __init__(self, ready, failed, timeout):
+        self.ready = ready
+        self.failed = failed
+        self.timeout = timeout
+
+    def wait_ready(self):
+        """等待子进程就绪；子进程报告失败或超时返回 False。"""
+        deadline = time.monotonic() + self.timeout
+        while time.monotonic() < deadline:
+            if self.ready.is_set():
+                return True
+            if self.failed.is_set():
+                return False
+            time.sleep(0.02)
+        return False
+
+
+class SharedCamera(_ProcessComponent):
+    """从全尺寸帧环读取的摄像头代理，接口与 CameraManager 相同。"""
+
+    def __init__(self, ring, ready, failed, timeout=30.0):
+        super().__init__(ready, failed, timeout)
+        self.ring = ring
+        self.last_seq = 0
+        self.is_running = False
+
+    def start(self):
+        self.is_running = self.wait_ready()
+        return self.is_running
+
+    def read_frame_stamped(self, timeout=0.5):
+        """等待下一帧（序号更新）；超时返回 NO_FRAME。"""
+        deadline = time.monotonic() + timeout
+        while self.is_running:
+            captured = self.ring.read(self.last_seq)
+            if captured is not None:
+                self.last_seq = captured.seq
+                return captured
+            if time.monotonic() > deadline:
+                break
+            time.sleep(0.001)
+        return NO_FRAME
+
+    def read_frame(self):
+        return self.read_frame_stamped().image
+
+    def release(self):
+        self.is_running = False
+
+
+class SharedDetector(_ProcessComponent):
+    """
+    从关键点板读取的检测器代理，提供 app.py 使用的 HandDetector 查询接口。
+
+    查询方法不各自读板：调用方每个 tick（每帧）先调用一次 refresh()，本线程随后的查询
+    都由同一份快照回答，手势、指尖、帧序号与手的列表因此总是来自同一次检测结果。
+    快照按线程保存，视频流线程的 refresh() 不会改变游戏循环 tick 中途看到的结果。
+    """
+
+    def __init__(self, board, ready, failed, timeout=60.0):
+        super().__init__(ready, failed, timeout)
+        self.board = board
+        self.last_event_count = 0
+        self.last_activity = 0
+        self.local = threading.local()
+
+    def warmup(self):
+        pass  # 预热在检测进程内完成
+
+    def start(self):
+        if not self.wait_ready():
+            raise RuntimeError("检测进程未能就绪")
+
+    def stop(self):
+        pass
+
+    def update_frame(self, frame, frame_seq=None, capture_ts=None):
+        pass  # 检测帧由采集进程直接写入检测帧环
+
+    def _snapshot(self):
+        """读取关键点板，并与检测进程交换调速状态。"""
+        self.board.set_detection_interval(governor.interval("detection"))
+        data = self.board.snapshot()
+        activity = int(data[LandmarkBoard.ACTIVITY])
+        if activity != self.last_activity:
+            self.last_activity = activity
+            governor.activity()
+        return data
+
+    def refresh(self):
+        """读取一次关键点板快照，供本线程随后的查询使用。"""
+        self.local.data = self._snapshot()
+
+    def _data(self):
+        data = getattr(self.local, "data", None)
+        if data is None:
+            self.refresh()
+            data = self.local.data
+        return data
+
+    def _header(self, data):
+        seq = int(data[1])
+        return (seq if seq >= 0 else None, float(data[2]) if seq >= 0 else None)
+
+    def get_results(self):
+        from gesture_debouncer import GESTURES
+        data = self._data()
+        return None, GESTURES[int(data[3])]
+
+    def get_finger_position(self):
+        data = self._data()
+        if data[6]:
+            return (float(data[4]), float(data[5]))
+        return None
+
+    def get_frame_meta(self):
+        return self._header(self._data())
+
+    def get_hands(self):
+        from gesture_debouncer import GESTURES
+        data = self._data()
+        hands_view = data[LandmarkBoard.HEADER:LandmarkBoard.HEADER + self.board.max_hands * LandmarkBoard.HAND_FIELDS]
+        hands_view = hands_view.reshape(self.board.max_hands, LandmarkBoard.HAND_FIELDS)
+        hands = []
+        for row in hands_view[:int(data[7])]:
+            hands.append({
+                "id": int(row[0]),
+                "handedness": HANDEDNESS_NAMES.get(int(row[1]), ""),
+                "finger": (float(row[3]), float(row[4])),
+                "gesture": GESTURES[int(row[2])],
+                "bbox": tuple(float(v) for v in row[6:10]),
+                "landmarks": row[10:].reshape(NUM_LANDMARKS, 2),
+                "visible": bool(row[5]),
+            })
+        return hands
+
+    def get_gesture_events(self):
+        """取出自上次调用以来的新事件；积压超过事件环容量时只保留最近的部分。"""
+        from gesture_debouncer import GESTURES
+        data = self._data()
+        count = int(data[8])
+        start = max(self.last_event_count, count - EVENT_CAPACITY)
+        offset = LandmarkBoard.HEADER + self.board.max_hands * LandmarkBoard.HAND_FIELDS
+        ring = data[offset:].reshape(EVENT_CAPACITY, LandmarkBoard.EVENT_FIELDS)
+        events = []
+        for i in range(start, count):
+            track_id, kind, gesture, t = ring[i % EVENT_CAPACITY]
+            events.append((int(track_id), EVENT_KINDS[int(kind)], GESTURES[int(gesture)], float(t)))
+        self.last_event_count = count
+        return events
+
+    def draw_landmarks(self, frame, results):
+        """绘制滤波后的骨架（与 HandDetector.draw_landmarks 的跟踪分支一致）。"""
+        import cv2
+        limit = (config.CAMERA_WIDTH - 1, config.CAMERA_HEIGHT - 1)
+        for hand in self.get_hands():
+            if not hand["visible"]:
+                continue
+            pts = hand["landmarks"] * (config.CAMERA_WIDTH, config.CAMERA_HEIGHT)
+            pts = np.clip(pts, 0, limit).astype(np.int32)
+            for x_cam, y_cam in pts:
+                cv2.circle(frame, (int(x_cam), int(y_cam)), 3, (0, 255, 255), -1)
+
+
+class ProcessPipeline:
+    """创建共享内存、启动采集与检测子进程，并提供主进程侧的代理。"""
+
+    def __init__(self, max_hands=None):
+        self.max_hands = max_hands or max(1, int(getattr(config, "MAX_NUM_HANDS", 1)))
+        # 统一使用 spawn：各平台行为一致，且不会从多线程父进程 fork
+        self.ctx = mp.get_context("spawn")
+        self.stop_event = self.ctx.Event()
+        self.frame_ring = FrameRing(camera_shape(), create=True)
+        self.detect_ring = FrameRing(detection_shape(), create=True)
+        self.board = LandmarkBoard(self.max_hands, create=True)
+        camera_ready, camera_failed = self.ctx.Event(), self.ctx.Event()
+        detector_ready, detector_failed = self.ctx.Event(), self.ctx.Event()
+        self.processes = [
+            self.ctx.Process(target=_capture_main, name="CaptureProcess", daemon=True, args=(
+                self.frame_ring.name, self.detect_ring.name, self.stop_event, camera_ready, camera_failed)),
+            self.ctx.Process(target=_detection_main, name="DetectionProcess", daemon=True, args=(
+                self.detect_ring.name, self.board.name, self.max_hands, self.stop_event,
+                detector_ready, detector_failed)),
+        ]
+        self.camera = SharedCamera(self.frame_ring, camera_ready, camera_failed)
+        self.detector = SharedDetector(self.board, detector_ready, detector_failed)
+
+    def start(self):
+        for p in self.processes:
+            p.start()
+        print("多进程流水线已启动：采集进程与检测进程")
+
+    def stop(self, timeout=3.0):
+        self.stop_event.set()
+        self.camera.release()
+        for p in self.processes:
+            p.join(timeout)
+            if p.is_alive():
+                p.terminate()
+        self.frame_ring.close(unlink=True)
+        self.detect_ring.close(unlink=True)
+        self.board.close(unlink=True)
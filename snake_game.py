@@ -1,9 +1,18 @@
 import random
 import time
+import zlib
 import config
 
+def wall_clock_ms():
+    return time.time() * 1000
+
 class SnakeGame:
-    def __init__(self):
+    def __init__(self, seed=None, clock=None):
+        # 食物位置使用独立的随机数生成器；记录种子即可确定性重放（见 session_log.py）
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.rng = random.Random(self.seed)
+        # 毫秒时钟；重放时替换为按记录的时间增量推进的虚拟时钟
+        self.clock = clock or wall_clock_ms
         self.state = "STOPPED" # STOPPED, RUNNING, PAUSED, GAME_OVER
         self.snake = []  # Will store pixel coordinates instead of grid
         self.direction = config.GESTURE_RIGHT
@@ -37,7 +46,7 @@ class SnakeGame:
         self.update_difficulty()
         self.spawn_food()
         self.state = "RUNNING"
-        self.last_move_time = time.time() * 1000
+        self.last_move_time = self.clock()
         self.target_position = (center_x, center_y)
 
     def pause_game(self):
@@ -55,8 +64,8 @@ class SnakeGame:
     def spawn_food(self):
         # 在全屏随机像素位置生成食物
         while True:
-            x = random.randint(20, config.CAMERA_WIDTH - 20)
-            y = random.randint(20, config.CAMERA_HEIGHT - 20)
+            x = self.rng.randint(20, config.CAMERA_WIDTH - 20)
+            y = self.rng.randint(20, config.CAMERA_HEIGHT - 20)
             # 检查是否离蛇头太近
             if self.snake:
                 head_x, head_y = self.snake[0]
@@ -74,6 +83,40 @@ class SnakeGame:
         if self.state == "PAUSED":
             self.state = "RUNNING"
     
+    def apply_action(self, action):
+        """执行前端发来的游戏操作：restart / pause / resume / exit"""
+        if action == 'restart':
+            self.start_game()
+        elif action == 'pause':
+            self.pause_game()
+        elif action == 'resume':
+            self.resume_game()
+        elif action == 'exit':
+            self.stop_game()
+
+    def step(self, target, gesture):
+        """
+        推进一个 tick：target 为归一化指尖位置（可为 None），gesture 为本帧手势。
+
+        实时游戏循环与会话重放都只通过这里驱动游戏，保证两者行为一致。
+        """
+        # 处理暂停状态下OK手势恢复游戏
+        if self.state == "PAUSED" and gesture == config.GESTURE_RESTART:
+            self.resume_game()
+            print("游戏已恢复！")
+        
+        # 如果检测到手指，更新目标位置
+        if target and self.state == "RUNNING":
+            self.set_target_position(target[0], target[1])
+        
+        self.process_gesture(gesture)
+        self.update()
+
+    def checksum(self):
+        """游戏状态校验和，用于校验重放结果。"""
+        state = (self.state, self.score, self.direction, self.food, tuple(self.snake), self.target_position)
+        return zlib.crc32(repr(state).encode("utf-8"))
+
     def process_gesture(self, gesture):
         """处理手势输入"""
         
@@ -117,7 +160,7 @@ class SnakeGame:
                 self.move_smooth()
         else:
             # 手势控制：按固定间隔移动
-            current_time = time.time() * 1000
+            current_time = self.clock()
             if current_time - self.last_move_time >= self.speed:
                 self.move()
                 self.last_move_time = current_time
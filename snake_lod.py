@@ -0,0 +1,121 @@
+"""
+蛇身细节层次简化 / Snake body level-of-detail
+
+把 SnakeGame.snake（每 10 像素一个节段）简化为在给定像素容差内的折线，
+用于 game_state 推送与前端绘制，使数据量与绘制开销不随分数线性增长。
+
+增量计算：按节段的绝对编号（蛇头每插入一个新节段编号减一，其余节段编号不变）
+每 chunk 个节段分一块，每块两端固定为折线顶点，块内用 Ramer–Douglas–Peucker 简化并缓存。
+GESTURE 模式下 move() 在头部插入、尾部弹出，节段编号不随之平移，
+因此每个 tick 只有蛇头所在块与尾部块需要重新简化，中间的身体直接复用缓存。
+
+DIRECT 模式下 move_smooth() 会让身体节段做亚像素级的跟随移动：块内各点相对缓存时
+的位移都不超过 tolerance / 4 时沿用缓存选出的顶点（取当前坐标）。缓存按 tolerance / 2 简化，
+顶点与被省略点各自最多漂移 tolerance / 4，总误差仍不超过 tolerance。
+整条身体被快速拖动时各块都会超过漂移上限而重新简化。
+"""
+import config
+
+
+def rdp(points, tolerance):
+    """Ramer–Douglas–Peucker 折线简化，保留首尾点。"""
+    return [points[i] for i in rdp_indices(points, tolerance)]
+
+
+def rdp_indices(points, tolerance):
+    """Ramer–Douglas–Peucker 折线简化（迭代实现），返回保留点的下标（含首尾）。"""
+    n = len(points)
+    if n < 3 or tolerance <= 0:
+        return list(range(n))
+    tol2 = tolerance * tolerance
+    keep = [False] * n
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        x0, y0 = points[first]
+        x1, y1 = points[last]
+        dx = x1 - x0
+        dy = y1 - y0
+        seg2 = dx * dx + dy * dy
+        max_d2 = -1.0
+        index = -1
+        for i in range(first + 1, last):
+            px, py = points[i]
+            if seg2 > 0:
+                # 点到线段所在直线的距离平方：叉积² / 线段长度²
+                cross = dx * (py - y0) - dy * (px - x0)
+                d2 = cross * cross / seg2
+            else:
+                d2 = (px - x0) ** 2 + (py - y0) ** 2
+            if d2 > max_d2:
+                max_d2 = d2
+                index = i
+        if max_d2 > tol2:
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+    return [i for i, k in enumerate(keep) if k]
+
+
+class SnakeSimplifier:
+    def __init__(self, tolerance=None, chunk=32):
+        self.tolerance = tolerance if tolerance is not None else getattr(config, "SNAKE_LOD_TOLERANCE", 2.0)
+        self.chunk = chunk
+        # 块编号 -> (缓存时的原始点列表, 保留顶点在块内的下标)
+        self.cache = {}
+        self.origin = 0       # snake[0] 的绝对节段编号
+        self.prev_head = None
+        self.last_rebuilt = 0  # 上一次重新简化的块数（调试/指标用）
+
+    def _advance(self, snake):
+        """根据蛇头变化更新 snake[0] 的绝对编号：头部插入了新节段时编号减一。"""
+        if self.prev_head is not None and snake[0] != self.prev_head \
+                and len(snake) > 1 and snake[1] == self.prev_head:
+            self.origin -= 1
+        self.prev_head = snake[0]
+
+    def _reusable(self, cached, points):
+        """缓存的顶点选择是否仍适用：坐标完全相同，或每个点的漂移都不超过 tolerance / 4。"""
+        if cached == points:
+            return True
+        if len(cached) != len(points):
+            return False
+        drift2 = (self.tolerance / 4) ** 2
+        for (x0, y0), (x1, y1) in zip(cached, points):
+            if (x1 - x0) ** 2 + (y1 - y0) ** 2 > drift2:
+                return False
+        return True
+
+    def simplify(self, snake):
+        """返回简化后的像素折线 [(x, y), ...]，首点为蛇头。"""
+        n = len(snake)
+        if self.tolerance <= 0 or n < 3:
+            return list(snake)
+        self._advance(snake)
+
+        step = self.chunk
+        origin = self.origin
+        # 块 k 覆盖绝对编号 [k*step, (k+1)*step]，相邻块共享端点，首尾两块按蛇的实际范围截断
+        first = origin // step
+        last = (origin + n - 2) // step
+        for k in [k for k in self.cache if k < first or k > last]:
+            del self.cache[k]
+
+        rebuilt = 0
+        result = []
+        for k in range(first, last + 1):
+            a = max(k * step, origin) - origin
+            b = min((k + 1) * step, origin + n - 1) - origin
+            points = snake[a:b + 1]
+            entry = self.cache.get(k)
+            if entry is None or not self._reusable(entry[0], points):
+                keep = rdp_indices(points, self.tolerance / 2)
+                entry = (points, keep)
+                self.cache[k] = entry
+                rebuilt += 1
+            # 去掉与上一块重复的起点
+            keep = entry[1] if k == first else entry[1][1:]
+            result.extend(points[i] for i in keep)
+        self.last_rebuilt = rebuilt
+        return result
@@ -0,0 +1,140 @@
+import cv2
+import numpy as np
+
+from capture_negotiator import CaptureNegotiator, CaptureProfile, Measurement
+
+MJPG = cv2.VideoWriter_fourcc(*"MJPG")
+YUYV = cv2.VideoWriter_fourcc(*"YUYV")
+
+PROFILES = [
+    CaptureProfile("CAP_V4L2", "YUYV", 1280, 720, 30, 1),
+    CaptureProfile("CAP_V4L2", "MJPG", 1280, 720, 30, 1),
+    CaptureProfile("CAP_V4L2", "MJPG", 640, 480, 30, 1),
+]
+
+
+class FakeClock:
+    def __init__(self):
+        self.t = 0.0
+
+    def __call__(self):
+        return self.t
+
+
+class FakeDevice:
+    """
+    假的 VideoCapture 工厂：每种 FOURCC 的帧间隔（秒，None 表示读不到帧）。
+
+    同一设备同时打开两次视为驱动报错，记录在 violations 中。
+    """
+
+    def __init__(self, clock, intervals, opens=True):
+        self.clock = clock
+        self.intervals = intervals
+        self.opens = opens
+        self.opened = 0
+        self.released = 0
+        self.live = 0
+        self.violations = 0
+
+    def __call__(self, device, backend):
+        if self.live:
+            self.violations += 1
+        self.opened += 1
+        self.live += 1
+        return FakeCapture(self)
+
+
+class FakeCapture:
+    def __init__(self, owner):
+        self.owner = owner
+        self.props = {}
+        self.released = False
+
+    def isOpened(self):
+        return self.owner.opens
+
+    def set(self, prop, value):
+        self.props[prop] = value
+        return True
+
+    def get(self, prop):
+        return self.props.get(prop, 0)
+
+    def read(self):
+        interval = self.owner.intervals.get(self.props.get(cv2.CAP_PROP_FOURCC))
+        if interval is None:
+            return False, None
+        self.owner.clock.t += interval
+        shape = (int(self.props[cv2.CAP_PROP_FRAME_HEIGHT]), int(self.props[cv2.CAP_PROP_FRAME_WIDTH]), 3)
+        return True, np.zeros(shape, np.uint8)
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            self.owner.released += 1
+            self.owner.live -= 1
+
+
+def make_negotiator(tmp_path, device):
+    negotiator = CaptureNegotiator(profiles=PROFILES, capture_factory=device,
+                                   cache_path=str(tmp_path / "camera_profiles.json"),
+                                   sample_frames=5, warmup_frames=1, clock=device.clock)
+    negotiator.target_fps = 30
+    return negotiator
+
+
+def test_picks_highest_scoring_profile(tmp_path):
+    # YUYV 在 720p 下只有 10 FPS，MJPG 两种分辨率都能跑满 30 FPS
+    device = FakeDevice(FakeClock(), {YUYV: 0.1, MJPG: 1 / 30})
+    negotiator = make_negotiator(tmp_path, device)
+    cap, m = negotiator.negotiate(0)
+    assert m.profile == PROFILES[1]
+    assert (m.width, m.height) == (1280, 720)
+    assert round(m.fps) == 30
+    cap.release()
+
+
+def test_score_prefers_fps_then_resolution_then_latency(tmp_path):
+    negotiator = make_negotiator(tmp_path, FakeDevice(FakeClock(), {}))
+    slow_full = Measurement(PROFILES[0], 10.0, 100.0, 1280, 720)
+    fast_small = Measurement(PROFILES[2], 30.0, 33.0, 640, 480)
+    fast_full = Measurement(PROFILES[1], 30.0, 40.0, 1280, 720)
+    fast_full_quick = Measurement(PROFILES[1], 29.0, 20.0, 1280, 720)
+    ranked = sorted([slow_full, fast_small, fast_full, fast_full_quick], key=negotiator.score, reverse=True)
+    assert ranked == [fast_full_quick, fast_full, fast_small, slow_full]
+
+
+def test_rejected_candidates_released_before_next_open(tmp_path):
+    # YUYV 读不到帧：测量失败的组合同样要释放
+    device = FakeDevice(FakeClock(), {MJPG: 1 / 30})
+    negotiator = make_negotiator(tmp_path, device)
+    cap, m = negotiator.negotiate(0)
+    assert m.profile == PROFILES[1]
+    assert device.violations == 0
+    # 三个候选各打开一次并释放，胜出者重新打开后仍在使用
+    assert device.opened == 4
+    assert device.released == 3 and device.live == 1
+    cap.release()
+
+
+def test_second_open_reuses_cache(tmp_path):
+    device = FakeDevice(FakeClock(), {YUYV: 0.1, MJPG: 1 / 30})
+    cap, dev, profile = make_negotiator(tmp_path, device).open_best(devices=(0,))
+    assert dev == 0 and profile == PROFILES[1]
+    cap.release()
+
+    opened = device.opened
+    cap, dev, cached = make_negotiator(tmp_path, device).open_best(devices=(0,))
+    assert cached == profile
+    # 直接按缓存组合打开，不再逐一实测
+    assert device.opened == opened + 1
+    cap.release()
+
+
+def test_all_candidates_fail(tmp_path):
+    device = FakeDevice(FakeClock(), {MJPG: 1 / 30}, opens=False)
+    negotiator = make_negotiator(tmp_path, device)
+    assert negotiator.open_best(devices=(0, 1)) == (None, None, None)
+    assert device.live == 0
+    assert not (tmp_path / "camera_profiles.json").exists()
@@ -0,0 +1,62 @@
+import config
+from gesture_debouncer import GESTURE_CODES, GestureDebouncer
+
+UP = GESTURE_CODES[config.GESTURE_UP]
+PAUSE = GESTURE_CODES[config.GESTURE_PAUSE]
+NONE = GESTURE_CODES[config.GESTURE_NONE]
+
+
+def make_debouncer():
+    return GestureDebouncer(
+        slots=2,
+        enter_frames={config.GESTURE_UP: 2, config.GESTURE_PAUSE: 4},
+        exit_frames={config.GESTURE_UP: 3},
+    )
+
+
+def feed(debouncer, codes, slot=0):
+    return [debouncer.update(slot, code) for code in codes]
+
+
+def test_enter_threshold_per_gesture():
+    debouncer = make_debouncer()
+    assert feed(debouncer, [UP, UP]) == [[], [("start", config.GESTURE_UP)]]
+
+    debouncer.reset(0)
+    events = feed(debouncer, [PAUSE] * 4)
+    assert events[:3] == [[], [], []]
+    assert events[3] == [("start", config.GESTURE_PAUSE)]
+
+
+def test_short_dropouts_hold_gesture():
+    debouncer = make_debouncer()
+    feed(debouncer, [UP, UP])
+    # 缺席少于退出阈值（3 帧）时手势保持，重新出现后缺席计数清零
+    assert feed(debouncer, [NONE, NONE, UP, NONE, NONE]) == [[]] * 5
+    assert debouncer.current[0] == UP
+
+
+def test_exit_threshold_ends_gesture():
+    debouncer = make_debouncer()
+    feed(debouncer, [UP, UP])
+    events = feed(debouncer, [NONE, NONE, NONE])
+    assert events == [[], [], [("end", config.GESTURE_UP)]]
+    assert debouncer.current[0] == NONE
+
+
+def test_switch_emits_end_then_start():
+    debouncer = make_debouncer()
+    feed(debouncer, [UP, UP])
+    events = feed(debouncer, [PAUSE, UP, PAUSE, PAUSE, PAUSE])
+    # 插入的一帧 UP 不影响 PAUSE 的窗口计票；凑满 4 票时同一帧内先 end 后 start
+    assert events[:4] == [[]] * 4
+    assert events[4] == [("end", config.GESTURE_UP), ("start", config.GESTURE_PAUSE)]
+    assert feed(debouncer, [UP, UP])[-1] == [("end", config.GESTURE_PAUSE), ("start", config.GESTURE_UP)]
+
+
+def test_slots_are_independent_and_end_flushes():
+    debouncer = make_debouncer()
+    feed(debouncer, [UP, UP], slot=0)
+    assert feed(debouncer, [UP], slot=1) == [[]]
+    assert debouncer.end(0) == [("end", config.GESTURE_UP)]
+    assert debouncer.end(1) == []
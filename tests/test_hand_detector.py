@@ -0,0 +1,91 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import hand_detector
+from camera_manager import DetectionGeometry
+from runtime_config import settings
+
+OLD = DetectionGeometry(320, 180, 16)
+NEW = DetectionGeometry(480, 270, 32)
+
+
+class FakeHands:
+    def __init__(self, **kwargs):
+        pass
+
+
+class FakeLandmarker:
+    """只记录提交的时间戳，结果由测试按顺序回调。"""
+
+    def __init__(self):
+        self.submitted = []
+
+    def detect_async(self, image, ts):
+        self.submitted.append(ts)
+
+
+@pytest.fixture
+def detector(monkeypatch):
+    monkeypatch.setattr(hand_detector.mp_hands, "Hands", FakeHands)
+    det = hand_detector.HandDetector(backend="SOLUTIONS", geometry=OLD)
+    # 模拟 LIVE_STREAM：推理始终滞后一帧回调，检测器几乎总有帧在途
+    det.is_live = True
+    det.max_in_flight = 2
+    det.lighting_enabled = False
+    det.tasks_landmarker = FakeLandmarker()
+    det.mp_core = SimpleNamespace(Image=lambda **kwargs: None, ImageFormat=SimpleNamespace(SRGB=None))
+    det.completed = []
+    det._complete_frame = lambda result, frame, meta: det.completed.append((frame.shape, det.geometry))
+    return det
+
+
+def run_tick(det, seq):
+    """检测线程的一次迭代，之后回调最早的在途帧（只保留最新一帧在途）。"""
+    if det.pending_settings is not None:
+        det._apply_pending_settings()
+    if det.can_submit():
+        width, height, pad = det.geometry
+        with det.lock:
+            det.frame_to_process = np.zeros((height + 2 * pad, width + 2 * pad, 3), np.uint8)
+            det.frame_meta_to_process = (seq, seq * 33)
+            det.frame_geometry_to_process = det.geometry
+        det._detection_step()
+    landmarker = det.tasks_landmarker
+    while len(landmarker.submitted) > (0 if det.draining else 1):
+        det._on_live_result(None, None, landmarker.submitted.pop(0))
+
+
+def test_geometry_change_applies_within_bounded_frames(detector):
+    for seq in range(5):
+        run_tick(detector, seq)
+    assert detector.in_flight
+
+    values = dict(settings.snapshot(), detection_width=NEW.width,
+                  detection_height=NEW.height, detection_pad=NEW.pad)
+    detector.apply_settings(values)
+    for seq in range(5, 8):
+        run_tick(detector, seq)
+    assert detector.geometry == NEW
+    assert detector.pending_settings is None and not detector.draining
+    assert detector.tracker.width == NEW.width
+
+    for seq in range(8, 12):
+        run_tick(detector, seq)
+    # 每帧的结果都按它提交时的几何处理
+    for shape, geometry in detector.completed:
+        assert shape[:2] == (geometry.height + 2 * geometry.pad, geometry.width + 2 * geometry.pad)
+    assert detector.completed[-1][1] == NEW
+
+
+def test_draining_stops_submissions(detector):
+    run_tick(detector, 0)
+    run_tick(detector, 1)
+    values = dict(settings.snapshot(), detection_width=NEW.width,
+                  detection_height=NEW.height, detection_pad=NEW.pad)
+    detector.apply_settings(values)
+    detector._apply_pending_settings()
+    assert detector.draining
+    assert not detector.can_submit()
+    assert detector._detection_step() is False
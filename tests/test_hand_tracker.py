@@ -0,0 +1,58 @@
+import numpy as np
+
+from hand_tracker import HandTracker
+
+
+def hand_at(cx, cy, size=40.0):
+    """以 (cx, cy) 为中心的一副假骨架（检测坐标系像素）。"""
+    offsets = np.linspace(-size / 2, size / 2, 21)
+    return np.stack([cx + offsets, cy + offsets[::-1], np.zeros(21)], axis=-1).astype(np.float32)
+
+
+def step(tracker, t, hands):
+    """一帧完整流程，返回每个检测对应的轨迹 ID。"""
+    tracker.begin_frame()
+    points = np.stack([p for p, _ in hands]) if hands else np.zeros((0, 21, 3), np.float32)
+    slots = tracker.associate(points, [h for _, h in hands])
+    tracker.filter_frame(t)
+    tracker.end_frame(t)
+    return [int(tracker.ids[s]) for s in slots]
+
+
+def make_tracker():
+    return HandTracker(max_hands=2, width=640, height=480, max_age=0.5)
+
+
+def test_ids_stable_when_detection_order_swaps():
+    tracker = make_tracker()
+    left, right = hand_at(150, 240), hand_at(450, 240)
+    first = step(tracker, 0.0, [(left, "Left"), (right, "Right")])
+    assert sorted(first) == [0, 1]
+    # 检测结果的列表顺序交换、位置略有移动，ID 仍跟随各自的手
+    swapped = step(tracker, 0.033, [(hand_at(455, 242), "Right"), (hand_at(148, 238), "Left")])
+    assert swapped == [first[1], first[0]]
+
+
+def test_missing_hand_survives_then_expires():
+    tracker = make_tracker()
+    ids = step(tracker, 0.0, [(hand_at(150, 240), "Left"), (hand_at(450, 240), "Right")])
+    # 右手消失：存活期内轨迹保留，但标记为本帧不可见
+    step(tracker, 0.2, [(hand_at(150, 240), "Left")])
+    hands = {h["id"]: h for h in tracker.snapshot()}
+    assert set(hands) == set(ids)
+    assert hands[ids[0]]["visible"] and not hands[ids[1]]["visible"]
+    # 超过 max_age 后释放
+    step(tracker, 0.7, [(hand_at(150, 240), "Left")])
+    assert [h["id"] for h in tracker.snapshot()] == [ids[0]]
+
+
+def test_new_hand_gets_fresh_id():
+    tracker = make_tracker()
+    (first,) = step(tracker, 0.0, [(hand_at(150, 240), "Left")])
+    step(tracker, 1.0, [])
+    assert tracker.snapshot() == []
+    # 轨迹释放后同一位置再出现的手也分配新 ID，不复用旧 ID
+    (second,) = step(tracker, 1.1, [(hand_at(150, 240), "Left")])
+    assert second != first
+    (third,) = step(tracker, 1.133, [(hand_at(150, 240), "Left"), (hand_at(450, 240), "Right")])[1:]
+    assert third not in (first, second)
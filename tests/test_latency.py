@@ -0,0 +1,27 @@
+from latency import LatencyTracker
+
+
+def test_each_client_counts_its_own_first_render():
+    tracker = LatencyTracker()
+    assert tracker.record(1, 100.0, 130.0, client="a") == 30.0
+    assert tracker.record(1, 100.0, 150.0, client="b") == 50.0
+    assert tracker.record(1, 100.0, 160.0, client="a") is None
+    assert tracker.percentiles()["count"] == 2
+
+
+def test_bad_client_input_is_dropped():
+    tracker = LatencyTracker()
+    assert tracker.record("7", "100", "120", client="a") == 20.0
+    assert tracker.record("x", 100.0, 120.0, client="a") is None
+    assert tracker.record(8, "junk", 120.0, client="a") is None
+    assert tracker.record(9, None, 120.0, client="a") is None
+    assert tracker.record(10, 100.0, float("nan"), client="a") is None
+    assert tracker.record(11, 100.0, 90.0, client="a") is None
+    assert tracker.percentiles()["count"] == 1
+
+
+def test_forget_resets_client_sequence():
+    tracker = LatencyTracker()
+    tracker.record(5, 0.0, 10.0, client="a")
+    tracker.forget("a")
+    assert tracker.record(1, 0.0, 10.0, client="a") == 10.0
@@ -0,0 +1,124 @@
+import hashlib
+import http.server
+import os
+import threading
+
+import pytest
+
+import model_manager
+from model_manager import ModelIntegrityError, ModelManager
+
+PAYLOAD = os.urandom(300_000)
+SHA256 = hashlib.sha256(PAYLOAD).hexdigest()
+
+
+class RangeHandler(http.server.BaseHTTPRequestHandler):
+    """支持 Range 的本地镜像；truncate 为某路径设置时，该路径下一次响应只发送前 N 字节后断开。"""
+
+    files = {}
+    truncate = {}
+    requests = []
+
+    def do_GET(self):
+        data = self.files.get(self.path)
+        if data is None:
+            self.send_error(404)
+            return
+        rng = self.headers.get("Range")
+        self.requests.append((self.path, rng))
+        start = 0
+        if rng:
+            start = int(rng.split("=")[1].split("-")[0])
+            if start >= len(data):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(data)}")
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(data) - 1}/{len(data)}")
+        else:
+            self.send_response(200)
+        body = data[start:]
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        limit = self.truncate.pop(self.path, None)
+        self.wfile.write(body if limit is None else body[:limit])
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    RangeHandler.files = {}
+    RangeHandler.truncate = {}
+    RangeHandler.requests = []
+    httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), RangeHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def make_manager(monkeypatch, tmp_path, urls, sha256=SHA256):
+    monkeypatch.setitem(model_manager.MODELS, "test_model",
+                        {"filename": "test_model.task", "sha256": sha256, "urls": urls})
+    monkeypatch.chdir(tmp_path)
+    return ModelManager(cache_dir=str(tmp_path / "models"), mirror_dirs=[], mirror_urls=[], timeout=5)
+
+
+def test_truncated_download_resumes_from_same_url(server, monkeypatch, tmp_path):
+    RangeHandler.files["/a/test_model.task"] = PAYLOAD
+    RangeHandler.truncate["/a/test_model.task"] = 100_000
+    url = server + "/a/test_model.task"
+    manager = make_manager(monkeypatch, tmp_path, [url])
+    dest = manager.cache_path("test_model")
+
+    with pytest.raises(RuntimeError):
+        manager.fetch("test_model", dest)
+    part = manager.part_path(dest, url)
+    assert os.path.getsize(part) == 100_000
+
+    assert manager.fetch("test_model", dest) == dest
+    assert RangeHandler.requests[-1] == ("/a/test_model.task", "bytes=100000-")
+    with open(dest, "rb") as f:
+        assert f.read() == PAYLOAD
+    assert not os.path.exists(part)
+
+
+def test_partial_from_one_mirror_is_not_resumed_from_another(server, monkeypatch, tmp_path):
+    RangeHandler.files["/a/test_model.task"] = PAYLOAD
+    RangeHandler.files["/b/test_model.task"] = PAYLOAD
+    RangeHandler.truncate["/a/test_model.task"] = 100_000
+    manager = make_manager(monkeypatch, tmp_path, [server + "/a/test_model.task", server + "/b/test_model.task"])
+    dest = manager.cache_path("test_model")
+
+    assert manager.fetch("test_model", dest) == dest
+    assert RangeHandler.requests[-1] == ("/b/test_model.task", None)
+    with open(dest, "rb") as f:
+        assert f.read() == PAYLOAD
+
+
+def test_mismatched_leftover_part_is_discarded(server, monkeypatch, tmp_path):
+    RangeHandler.files["/a/test_model.task"] = PAYLOAD
+    url = server + "/a/test_model.task"
+    manager = make_manager(monkeypatch, tmp_path, [url])
+    dest = manager.cache_path("test_model")
+    os.makedirs(os.path.dirname(dest))
+    # 与远端等长但内容不同的残留 .part：服务器回复 416，不能当作下载完成
+    with open(manager.part_path(dest, url), "wb") as f:
+        f.write(b"\0" * len(PAYLOAD))
+
+    assert manager.fetch("test_model", dest) == dest
+    assert RangeHandler.requests[-1] == ("/a/test_model.task", None)
+    with open(dest, "rb") as f:
+        assert f.read() == PAYLOAD
+
+
+def test_unpinned_model_is_rejected_when_required(server, monkeypatch, tmp_path):
+    RangeHandler.files["/a/test_model.task"] = PAYLOAD
+    manager = make_manager(monkeypatch, tmp_path, [server + "/a/test_model.task"], sha256="")
+    manager.require_pinned = True
+    with pytest.raises(ModelIntegrityError):
+        manager.fetch("test_model", manager.cache_path("test_model"))
+    assert not RangeHandler.requests
@@ -0,0 +1,41 @@
+import numpy as np
+
+from one_euro import OneEuroFilter, OneEuroFilterArray
+
+PARAMS = dict(min_cutoff=0.5, beta=0.05, d_cutoff=1.0)
+
+
+def scalar_reference(times, samples):
+    """逐元素的标量滤波器：第一帧用于初始化，原样输出。"""
+    flat = samples[0].ravel()
+    filters = [OneEuroFilter(times[0], float(v), **PARAMS) for v in flat]
+    outputs = [samples[0].copy()]
+    for t, x in zip(times[1:], samples[1:]):
+        outputs.append(np.array([f(t, float(v)) for f, v in zip(filters, x.ravel())]).reshape(x.shape))
+    return outputs
+
+
+def test_array_matches_scalar_filter():
+    rng = np.random.default_rng(0)
+    # 帧间隔有变化：30 FPS -> 掉帧 -> 60 FPS
+    times = np.cumsum([0.0, 1 / 30, 1 / 30, 0.1, 1 / 60, 1 / 60, 1 / 30])
+    samples = [rng.normal(size=(2, 21, 3)) * 50 + 300 for _ in times]
+
+    array_filter = OneEuroFilterArray((2, 21, 3), **PARAMS)
+    idx = np.arange(2)
+    expected = scalar_reference(times, samples)
+    for t, x, want in zip(times, samples, expected):
+        assert np.allclose(array_filter(t, x, idx), want)
+
+
+def test_partial_update_and_reset():
+    array_filter = OneEuroFilterArray((2, 4), **PARAMS)
+    array_filter(0.0, np.zeros((2, 4)), np.arange(2))
+    # 只更新通道 1；通道 0 的状态不变
+    out = array_filter(0.1, np.ones((1, 4)), np.array([1]))
+    ref = OneEuroFilter(0.0, 0.0, **PARAMS)
+    assert np.allclose(out, ref(0.1, 1.0))
+    assert np.allclose(array_filter.x_prev[0], 0.0)
+    # 间隔超过 reset_gap 时重新初始化，原样输出观测值
+    out = array_filter(5.0, np.full((1, 4), 7.0), np.array([0]))
+    assert np.allclose(out, 7.0)
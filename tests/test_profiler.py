@@ -0,0 +1,20 @@
+import pytest
+
+from profiler import MAX_INTERVAL, MIN_INTERVAL, SamplingProfiler
+
+
+@pytest.mark.parametrize("requested, expected", [(0.00001, MIN_INTERVAL), ("0.01", 0.01), (60, MAX_INTERVAL)])
+def test_start_clamps_interval(requested, expected):
+    profiler = SamplingProfiler(targets={})
+    try:
+        assert profiler.start(requested)
+        assert profiler.interval == expected
+    finally:
+        profiler.stop()
+
+
+def test_start_rejects_non_numeric_interval():
+    profiler = SamplingProfiler(targets={})
+    with pytest.raises(ValueError):
+        profiler.start("fast")
+    assert not profiler.is_running
@@ -0,0 +1,33 @@
+from runtime_config import PRESETS, RuntimeConfig
+
+
+def test_saving_preset_clears_overrides_it_defines(tmp_path):
+    cfg = RuntimeConfig(local_path=str(tmp_path / "local_settings.json"))
+    # 自动标定写入的检测分辨率
+    cfg.save_local(hand_backend="TASKS", detection_width=480, detection_height=270, detection_pad=32, beta=0.02)
+    cfg.save_local(preset="low-power")
+    cfg.reload()
+    low_power = PRESETS["low-power"]
+    assert cfg.preset == "low-power"
+    for key in ("detection_width", "detection_height", "detection_pad"):
+        assert getattr(cfg, key) == low_power[key]
+    # 预设没有定义的参数覆盖保留，并如实报告
+    assert cfg.hand_backend == "TASKS"
+    assert cfg.shadowed_overrides() == {"beta": 0.02}
+
+
+def test_overrides_saved_with_preset_still_apply(tmp_path):
+    cfg = RuntimeConfig(local_path=str(tmp_path / "local_settings.json"))
+    cfg.save_local(preset="low-power", jpeg_quality=60)
+    cfg.reload()
+    assert cfg.jpeg_quality == 60
+
+
+def test_apply_preset_keeps_overrides_it_does_not_define(tmp_path):
+    cfg = RuntimeConfig(local_path=str(tmp_path / "local_settings.json"))
+    cfg.save_local(detection_width=480, beta=0.02)
+    cfg.reload()
+    changed = cfg.apply_preset("low-power")
+    assert cfg.detection_width == PRESETS["low-power"]["detection_width"]
+    assert cfg.beta == 0.02
+    assert "beta" not in changed
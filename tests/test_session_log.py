@@ -0,0 +1,69 @@
+import gzip
+import json
+import math
+
+import config
+from session_log import ACTION_CODES, SessionRecorder, TickClock, quantize_target, read_log, replay
+from snake_game import SnakeGame
+
+TICKS = 150
+CHANGED_TICK = 40
+
+
+def record_session(path):
+    """按实时游戏循环的顺序驱动一局游戏并录制，返回每个 tick 的校验和。"""
+    clock = TickClock()
+    game = SnakeGame(seed=1234, clock=clock)
+    recorder = SessionRecorder(game, path=str(path), checksum_every=1)
+    checksums = []
+    now = 1_000_000
+    for tick in range(TICKS):
+        now += 33 if tick % 7 else 34
+        dt = clock.tick(now)
+        actions = ["restart"] if tick == 0 else ["pause"] if tick == 90 else []
+        gesture = config.GESTURE_RESTART if tick == 100 else config.GESTURE_NONE
+        angle = tick / 15
+        target = quantize_target((0.5 + 0.3 * math.cos(angle), 0.5 + 0.3 * math.sin(angle)))
+        if tick == 60:
+            game.tail_smooth = 0.5
+            recorder.record_setting("tail_smooth", 0.5)
+        for action in actions:
+            game.apply_action(action)
+        game.step(target, gesture)
+        recorder.record(dt, target, gesture, actions, game)
+        checksums.append(game.checksum())
+    recorder.close()
+    return checksums
+
+
+def test_replay_reproduces_every_checksum(tmp_path):
+    path = tmp_path / "session.jsonl.gz"
+    recorded = record_session(path)
+    replayed = []
+    stats = replay(str(path), on_tick=lambda game, tick: replayed.append(game.checksum()))
+    assert replayed == recorded
+    assert stats["ticks"] == TICKS and stats["checked"] == TICKS
+    assert stats["mismatches"] == 0
+    assert len(set(recorded)) > TICKS // 2  # 游戏确实在推进
+
+
+def test_changed_action_is_detected(tmp_path):
+    path = tmp_path / "session.jsonl.gz"
+    record_session(path)
+
+    # 在某个 tick 插入一次 pause：之后的状态与录制时不同
+    header, rows = read_log(str(path))
+    tampered = tmp_path / "tampered.jsonl.gz"
+    with gzip.open(tampered, "wt", encoding="utf-8") as f:
+        f.write(json.dumps(header) + "\n")
+        tick = 0
+        for row in rows:
+            if isinstance(row, list):
+                tick += 1
+                if tick == CHANGED_TICK:
+                    row[4] = [ACTION_CODES["pause"]]
+            f.write(json.dumps(row) + "\n")
+
+    stats = replay(str(tampered))
+    assert stats["mismatches"] > 0
+    assert stats["first_mismatch"] == CHANGED_TICK
@@ -0,0 +1,92 @@
+import threading
+
+import pytest
+
+import config
+import shm_pipeline
+from idle_governor import ACTIVE, IDLE, IdleGovernor
+from shm_pipeline import LandmarkBoard, SharedDetector
+
+
+def hand(visible=True, gesture=config.GESTURE_NONE, hand_id=0):
+    return {"id": hand_id, "handedness": "Left", "gesture": gesture, "finger": (0.25, 0.5),
+            "visible": visible, "bbox": (0.1, 0.2, 0.3, 0.4), "landmarks": [[0.5, 0.5]] * 21}
+
+
+@pytest.fixture
+def board():
+    board = LandmarkBoard(2, create=True)
+    yield board
+    board.close(unlink=True)
+
+
+@pytest.fixture
+def governor(monkeypatch):
+    governor = IdleGovernor(enabled=True, grace=0.0)
+    monkeypatch.setattr(shm_pipeline, "governor", governor)
+    return governor
+
+
+def make_detector(board):
+    ready = threading.Event()
+    ready.set()
+    return SharedDetector(board, ready, threading.Event())
+
+
+def test_governor_state_crosses_the_board(board, governor):
+    detector = make_detector(board)
+    governor.set_clients(1)
+    governor.update("STOPPED")
+    assert governor.level == IDLE
+    # 主进程读取时写入检测最小间隔，检测进程据此降频
+    detector.refresh()
+    assert board.detection_interval() == pytest.approx(governor.interval("detection"))
+    assert board.detection_interval() > 0
+
+    # 检测进程看到手：活动计数递增，主进程恢复全速
+    board.publish(config.GESTURE_NONE, None, [hand()], (1, 10.0), [])
+    detector.refresh()
+    assert governor.level == ACTIVE
+    detector.refresh()
+    assert board.detection_interval() == 0.0
+
+
+def test_no_activity_without_visible_hand(board, governor):
+    detector = make_detector(board)
+    governor.set_clients(1)
+    governor.update("STOPPED")
+    board.publish(config.GESTURE_NONE, None, [hand(visible=False)], (1, 10.0), [])
+    detector.refresh()
+    assert governor.level == IDLE
+
+
+def test_accessors_share_one_snapshot_per_refresh(board, governor):
+    detector = make_detector(board)
+    board.publish(config.GESTURE_UP, (0.25, 0.5), [hand(gesture=config.GESTURE_UP)], (1, 10.0),
+                  [(0, "start", config.GESTURE_UP, 0.01)])
+    detector.refresh()
+    assert detector.get_results() == (None, config.GESTURE_UP)
+
+    # 检测进程在同一 tick 内发布了下一帧：本 tick 的其余查询仍来自刷新时的快照
+    board.publish(config.GESTURE_NONE, None, [], (2, 43.0), [(0, "end", config.GESTURE_UP, 0.04)])
+    assert detector.get_finger_position() == (0.25, 0.5)
+    assert detector.get_frame_meta() == (1, 10.0)
+    assert [h["gesture"] for h in detector.get_hands()] == [config.GESTURE_UP]
+    assert detector.get_gesture_events() == [(0, "start", config.GESTURE_UP, 0.01)]
+
+    detector.refresh()
+    assert detector.get_frame_meta() == (2, 43.0)
+    assert detector.get_hands() == [] and detector.get_finger_position() is None
+    assert detector.get_gesture_events() == [(0, "end", config.GESTURE_UP, 0.04)]
+
+
+def test_refresh_is_per_thread(board, governor):
+    detector = make_detector(board)
+    board.publish(config.GESTURE_NONE, None, [], (1, 10.0), [])
+    detector.refresh()
+    board.publish(config.GESTURE_NONE, None, [], (2, 43.0), [])
+    # 另一个线程（视频流）刷新不影响本线程 tick 中途的结果
+    thread = threading.Thread(target=detector.refresh)
+    thread.start()
+    thread.join()
+    assert detector.get_frame_meta() == (1, 10.0)
@@ -0,0 +1,68 @@
+import math
+import random
+
+from snake_lod import SnakeSimplifier, rdp
+
+
+def segment_distance(p, a, b):
+    (px, py), (ax, ay), (bx, by) = p, a, b
+    dx, dy = bx - ax, by - ay
+    seg2 = dx * dx + dy * dy
+    t = 0.0 if seg2 == 0 else max(0.0, min(1.0, ((px - ax) * dx + (py - ay) * dy) / seg2))
+    return math.hypot(px - ax - t * dx, py - ay - t * dy)
+
+
+def max_deviation(points, line):
+    return max(min(segment_distance(p, line[i], line[i + 1]) for i in range(len(line) - 1))
+               for p in points)
+
+
+def wandering_path(n, seed=1):
+    """网格上随机转弯的折线（每 10 像素一个节段），蛇头在前。"""
+    rng = random.Random(seed)
+    x, y, d = 0, 0, (1, 0)
+    path = [(x, y)]
+    for _ in range(n - 1):
+        if rng.random() < 0.15:
+            d = rng.choice([(d[1], d[0]), (-d[1], -d[0])])
+        x, y = x + d[0] * 10, y + d[1] * 10
+        path.append((x, y))
+    return path[::-1]
+
+
+def test_rdp_keeps_endpoints_and_tolerance():
+    points = wandering_path(100)
+    line = rdp(points, 2.0)
+    assert line[0] == points[0] and line[-1] == points[-1]
+    assert max_deviation(points, line) <= 2.0
+
+
+def test_gesture_move_rebuilds_only_head_and_tail_chunks():
+    # GESTURE 模式：头部插入新节段、尾部弹出（偶尔吃到食物不弹出）
+    trail = wandering_path(600, seed=2)
+    snake = trail[-200:]
+    lod = SnakeSimplifier(tolerance=2.0, chunk=32)
+    lod.simplify(snake)
+    rebuilt = []
+    for tick in range(300):
+        snake = [trail[-201 - tick]] + snake
+        if tick % 50:
+            snake.pop()
+        line = lod.simplify(snake)
+        rebuilt.append(lod.last_rebuilt)
+        assert line[0] == snake[0] and line[-1] == snake[-1]
+        assert max_deviation(snake, line) <= 2.0 + 1e-9
+    assert max(rebuilt) <= 2
+
+
+def test_direct_mode_settling_reuses_chunks():
+    # DIRECT 模式：蛇头停下后身体仍做亚像素跟随，只要漂移不超过上限就复用缓存
+    snake = [(float(x), float(y)) for x, y in wandering_path(200, seed=3)]
+    lod = SnakeSimplifier(tolerance=2.0, chunk=32)
+    lod.simplify(snake)
+    rng = random.Random(4)
+    for _ in range(50):
+        snake = [snake[0]] + [(x + rng.uniform(-0.05, 0.05), y + rng.uniform(-0.05, 0.05)) for x, y in snake[1:]]
+        line = lod.simplify(snake)
+        assert lod.last_rebuilt <= 2
+        assert max_deviation(snake, line) <= 2.0 + 1e-9
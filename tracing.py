@@ -0,0 +1,85 @@
+"""
+逐帧流水线追踪 / Per-frame pipeline tracing
+
+开启后，每个阶段（采集、预处理、推理、ROI 回退、手势投票、游戏更新、推送、编码）
+记录一个带线程 id 与帧序号的 span，存入有界环形缓冲区，
+可导出为 Chrome / Perfetto 可直接打开的 trace-event JSON。
+"""
+import os
+import threading
+import time
+from collections import deque
+
+
+class TraceRecorder:
+    def __init__(self, capacity=20000):
+        self.enabled = False
+        self.events = deque(maxlen=capacity)
+        self.thread_names = {}
+        self.pid = os.getpid()
+
+    def start(self, clear=True):
+        if clear:
+            self.clear()
+        self.enabled = True
+
+    def stop(self):
+        self.enabled = False
+
+    def clear(self):
+        self.events.clear()
+        self.thread_names.clear()
+
+    def add_span(self, name, t0, duration, frame_seq=None):
+        """记录一个完整 span；t0/duration 为 perf_counter 秒。"""
+        if not self.enabled:
+            return
+        tid = threading.get_ident()
+        if tid not in self.thread_names:
+            self.thread_names[tid] = threading.current_thread().name
+        # deque.append 在 CPython 下是原子的，无需加锁
+        self.events.append(("X", name, t0, duration, tid, frame_seq))
+
+    def instant(self, name, frame_seq=None):
+        """记录瞬时事件，例如丢帧。"""
+        if not self.enabled:
+            return
+        tid = threading.get_ident()
+        if tid not in self.thread_names:
+            self.thread_names[tid] = threading.current_thread().name
+        self.events.append(("i", name, time.perf_counter(), 0.0, tid, frame_seq))
+
+    def status(self):
+        return {
+            "enabled": self.enabled,
+            "events": len(self.events),
+            "capacity": self.events.maxlen,
+        }
+
+    def export(self):
+        """导出 Chrome trace-event 格式（JSON Object Format）。"""
+        events = list(self.events)
+        trace = []
+        for tid, name in list(self.thread_names.items()):
+            trace.append({"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid,
+                          "args": {"name": name}})
+        for ph, name, t0, duration, tid, frame_seq in events:
+            event = {
+                "name": name,
+                "cat": "pipeline",
+                "ph": ph,
+                "ts": t0 * 1e6,
+                "pid": self.pid,
+                "tid": tid,
+                "args": {"frame_seq": frame_seq},
+            }
+            if ph == "X":
+                event["dur"] = duration * 1e6
+            else:
+                event["s"] = "t"
+            trace.append(event)
+        return {"traceEvents": trace, "displayTimeUnit": "ms"}
+
+
+# 模块级全局实例
+tracer = TraceRecorder()